@@ -0,0 +1,27 @@
+"""Incremental streak state
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('streaks', sa.Column('grace_week_start', sa.Date(), nullable=True))
+    op.add_column('streaks', sa.Column('last_event_date', sa.Date(), nullable=True))
+    op.add_column('streaks', sa.Column('last_checkin_date', sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('streaks', 'last_checkin_date')
+    op.drop_column('streaks', 'last_event_date')
+    op.drop_column('streaks', 'grace_week_start')
@@ -0,0 +1,33 @@
+"""Bandit arm statistics
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('bandit_arms',
+        sa.Column('habit_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('hour', sa.Integer(), nullable=False),
+        sa.Column('pulls', sa.Integer(), nullable=False),
+        sa.Column('successes', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+        sa.PrimaryKeyConstraint('habit_id', 'hour'),
+        sa.CheckConstraint('hour >= 0 AND hour < 24', name='check_arm_hour')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('bandit_arms')
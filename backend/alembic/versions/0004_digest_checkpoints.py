@@ -0,0 +1,36 @@
+"""Digest run checkpoints
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column('digest_runs', 'user_id', existing_type=postgresql.UUID(as_uuid=True), nullable=True)
+    op.add_column('digest_runs', sa.Column('period_start', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('digest_runs', sa.Column('status', sa.String(), nullable=False, server_default='completed'))
+    op.add_column('digest_runs', sa.Column('cursor_user_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('digest_runs', sa.Column('chunks_done', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('digest_runs', sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_digest_runs_period_start'), 'digest_runs', ['period_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_digest_runs_period_start'), table_name='digest_runs')
+    op.drop_column('digest_runs', 'finished_at')
+    op.drop_column('digest_runs', 'chunks_done')
+    op.drop_column('digest_runs', 'cursor_user_id')
+    op.drop_column('digest_runs', 'status')
+    op.drop_column('digest_runs', 'period_start')
+    op.alter_column('digest_runs', 'user_id', existing_type=postgresql.UUID(as_uuid=True), nullable=False)
@@ -0,0 +1,41 @@
+"""Habit completion rollups
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('habit_daily_rollups',
+        sa.Column('habit_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('hour', sa.Integer(), nullable=False),
+        sa.Column('checkins', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+        sa.PrimaryKeyConstraint('habit_id', 'day', 'hour')
+    )
+    
+    op.create_table('habit_hour_rollups',
+        sa.Column('habit_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('hour_of_week', sa.Integer(), nullable=False),
+        sa.Column('checkins', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+        sa.PrimaryKeyConstraint('habit_id', 'hour_of_week'),
+        sa.CheckConstraint('hour_of_week >= 0 AND hour_of_week < 168', name='check_hour_of_week')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('habit_hour_rollups')
+    op.drop_table('habit_daily_rollups')
@@ -0,0 +1,46 @@
+"""Event projections
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('projection_offsets',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('last_ts', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_event_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    
+    op.create_table('habit_weekly_totals',
+        sa.Column('habit_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('checkins', sa.Integer(), nullable=False),
+        sa.Column('misses', sa.Integer(), nullable=False),
+        sa.Column('reminders_sent', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+        sa.PrimaryKeyConstraint('habit_id', 'week_start')
+    )
+    
+    # Tailing reads events in (ts, id) order
+    op.create_index('ix_events_ts_id', 'events', ['ts', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_ts_id', table_name='events')
+    op.drop_table('habit_weekly_totals')
+    op.drop_table('projection_offsets')
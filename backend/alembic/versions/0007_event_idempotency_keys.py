@@ -0,0 +1,27 @@
+"""Event idempotency keys
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('idempotency_key', sa.String(), nullable=True))
+    op.create_unique_constraint(
+        'uq_events_user_idempotency_key', 'events', ['user_id', 'idempotency_key']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_events_user_idempotency_key', 'events', type_='unique')
+    op.drop_column('events', 'idempotency_key')
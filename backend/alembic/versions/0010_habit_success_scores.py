@@ -0,0 +1,33 @@
+"""Habit success scores
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('habit_success_scores',
+        sa.Column('habit_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('probability', sa.Float(), nullable=False),
+        sa.Column('model_version', sa.String(), nullable=False),
+        sa.Column('features', sa.JSON(), nullable=False),
+        sa.Column('data_version', sa.Integer(), nullable=False),
+        sa.Column('scored_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+        sa.PrimaryKeyConstraint('habit_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('habit_success_scores')
@@ -0,0 +1,144 @@
+"""Partition events by month
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+EVENT_COLUMNS = "id, user_id, habit_id, type, ts, payload, idempotency_key"
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _event_columns():
+    return [
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('habit_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('ts', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('idempotency_key', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    ]
+
+
+def upgrade() -> None:
+    # A partitioned table can only enforce uniqueness that includes ts, so
+    # idempotency keys move to their own table
+    op.create_table('event_idempotency_keys',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('idempotency_key', sa.String(), nullable=False),
+        sa.Column('event_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'idempotency_key')
+    )
+    op.create_index(
+        op.f('ix_event_idempotency_keys_created_at'), 'event_idempotency_keys', ['created_at'], unique=False
+    )
+    op.execute(
+        "INSERT INTO event_idempotency_keys (user_id, idempotency_key, event_id, created_at) "
+        "SELECT user_id, idempotency_key, id, ts FROM events WHERE idempotency_key IS NOT NULL"
+    )
+    op.drop_constraint('uq_events_user_idempotency_key', 'events', type_='unique')
+
+    op.create_table('event_archives',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('format', sa.String(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('counts', sa.JSON(), nullable=False),
+        sa.Column('sha256', sa.String(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_event_archives_month'), 'event_archives', ['month'], unique=False)
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Range-partition events by month: copy into a partitioned table, then
+    # build its indexes. ix_events_habit_id (a prefix of ix_events_habit_ts)
+    # and the unused GIN index on payload are not recreated.
+    op.execute("ALTER TABLE events RENAME TO events_unpartitioned")
+    op.execute("ALTER TABLE events_unpartitioned RENAME CONSTRAINT events_pkey TO events_unpartitioned_pkey")
+    for index in (
+        'ix_events_habit_ts', 'ix_events_payload', 'ix_events_habit_id',
+        'ix_events_ts', 'ix_events_ts_id', 'ix_events_user_id'
+    ):
+        op.drop_index(index, table_name='events_unpartitioned')
+
+    op.create_table('events',
+        *_event_columns(),
+        sa.PrimaryKeyConstraint('id', 'ts'),
+        postgresql_partition_by='RANGE (ts)'
+    )
+
+    first = op.get_bind().execute(sa.text("SELECT min(ts) FROM events_unpartitioned")).scalar()
+    month = (first.date() if first else date.today()).replace(day=1)
+    last = date.today().replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+
+    while month <= last:
+        following = _next_month(month)
+        op.execute(
+            f"CREATE TABLE events_y{month:%Y}m{month:%m} PARTITION OF events "
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{following} 00:00:00+00')"
+        )
+        month = following
+    op.execute("CREATE TABLE events_default PARTITION OF events DEFAULT")
+
+    op.execute(f"INSERT INTO events ({EVENT_COLUMNS}) SELECT {EVENT_COLUMNS} FROM events_unpartitioned")
+    op.drop_table('events_unpartitioned')
+
+    op.create_index('ix_events_habit_ts', 'events', ['habit_id', 'ts'], unique=False)
+    op.create_index(op.f('ix_events_ts'), 'events', ['ts'], unique=False)
+    op.create_index('ix_events_ts_id', 'events', ['ts', 'id'], unique=False)
+    op.create_index(op.f('ix_events_user_id'), 'events', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TABLE events RENAME TO events_partitioned")
+        op.execute("ALTER TABLE events_partitioned RENAME CONSTRAINT events_pkey TO events_partitioned_pkey")
+        for index in ('ix_events_habit_ts', 'ix_events_ts', 'ix_events_ts_id', 'ix_events_user_id'):
+            op.drop_index(index, table_name='events_partitioned')
+
+        op.create_table('events', *_event_columns(), sa.PrimaryKeyConstraint('id'))
+        op.execute(f"INSERT INTO events ({EVENT_COLUMNS}) SELECT {EVENT_COLUMNS} FROM events_partitioned")
+        op.drop_table('events_partitioned')
+
+        op.create_index('ix_events_habit_ts', 'events', ['habit_id', 'ts'], unique=False)
+        op.create_index('ix_events_payload', 'events', ['payload'], unique=False, postgresql_using='gin')
+        op.create_index(op.f('ix_events_habit_id'), 'events', ['habit_id'], unique=False)
+        op.create_index(op.f('ix_events_ts'), 'events', ['ts'], unique=False)
+        op.create_index('ix_events_ts_id', 'events', ['ts', 'id'], unique=False)
+        op.create_index(op.f('ix_events_user_id'), 'events', ['user_id'], unique=False)
+
+    op.drop_index(op.f('ix_event_archives_month'), table_name='event_archives')
+    op.drop_table('event_archives')
+
+    op.create_unique_constraint(
+        'uq_events_user_idempotency_key', 'events', ['user_id', 'idempotency_key']
+    )
+    op.drop_index(op.f('ix_event_idempotency_keys_created_at'), table_name='event_idempotency_keys')
+    op.drop_table('event_idempotency_keys')
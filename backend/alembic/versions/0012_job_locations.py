@@ -0,0 +1,64 @@
+"""Normalized, indexed job locations
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def _has_jobs() -> bool:
+    # Databases without a jobs table get these columns when 0013 creates it
+    return sa.inspect(op.get_bind()).has_table('jobs')
+
+
+def upgrade() -> None:
+    if not _has_jobs():
+        return
+
+    # Filled at ingest; rows from before this migration are backfilled by
+    # app.scripts.normalize_job_locations (loc_remote IS NULL = not yet parsed)
+    op.add_column('jobs', sa.Column('loc_city', sa.String(), nullable=True))
+    op.add_column('jobs', sa.Column('loc_state', sa.String(length=2), nullable=True))
+    op.add_column('jobs', sa.Column('loc_remote', sa.Boolean(), nullable=True))
+
+    op.create_index('ix_jobs_loc_state', 'jobs', ['loc_state'], unique=False)
+    op.create_index(
+        'ix_jobs_loc_remote', 'jobs', ['loc_remote'], unique=False,
+        postgresql_where=sa.text('loc_remote'), sqlite_where=sa.text('loc_remote')
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Trigram GIN index keeps substring matches (LIKE '%york%') index-backed
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            'ix_jobs_loc_city_trgm', 'jobs', ['loc_city'], unique=False,
+            postgresql_using='gin', postgresql_ops={'loc_city': 'gin_trgm_ops'}
+        )
+    else:
+        # Elsewhere cities are matched by prefix range over a B-tree
+        op.create_index('ix_jobs_loc_city', 'jobs', ['loc_city'], unique=False)
+
+
+def downgrade() -> None:
+    if not _has_jobs():
+        return
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_jobs_loc_city_trgm', table_name='jobs')
+    else:
+        op.drop_index('ix_jobs_loc_city', table_name='jobs')
+    op.drop_index('ix_jobs_loc_remote', table_name='jobs')
+    op.drop_index('ix_jobs_loc_state', table_name='jobs')
+
+    op.drop_column('jobs', 'loc_remote')
+    op.drop_column('jobs', 'loc_state')
+    op.drop_column('jobs', 'loc_city')
@@ -0,0 +1,76 @@
+"""Jobs table for bulk ingestion
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == 'postgresql'
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table('jobs'):
+        op.create_table('jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(), nullable=False),
+            sa.Column('company', sa.String(), nullable=False),
+            sa.Column('location', sa.String(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column('apply_url', sa.String(), nullable=True),
+            sa.Column('posted_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('source', sa.String(), nullable=False),
+            sa.Column('external_id', sa.String(), nullable=False),
+            sa.Column('tsv', postgresql.TSVECTOR() if is_postgres else sa.Text(), nullable=True),
+            sa.Column('loc_city', sa.String(), nullable=True),
+            sa.Column('loc_state', sa.String(length=2), nullable=True),
+            sa.Column('loc_remote', sa.Boolean(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_jobs_posted_at'), 'jobs', ['posted_at'], unique=False)
+        op.create_index('ix_jobs_loc_state', 'jobs', ['loc_state'], unique=False)
+        op.create_index(
+            'ix_jobs_loc_remote', 'jobs', ['loc_remote'], unique=False,
+            postgresql_where=sa.text('loc_remote'), sqlite_where=sa.text('loc_remote')
+        )
+        if is_postgres:
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            op.create_index(
+                'ix_jobs_loc_city_trgm', 'jobs', ['loc_city'], unique=False,
+                postgresql_using='gin', postgresql_ops={'loc_city': 'gin_trgm_ops'}
+            )
+        else:
+            op.create_index('ix_jobs_loc_city', 'jobs', ['loc_city'], unique=False)
+    else:
+        if 'updated_at' not in {column['name'] for column in inspector.get_columns('jobs')}:
+            op.add_column('jobs', sa.Column(
+                'updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()
+            ))
+        # Keep the newest copy of postings that were inserted more than once
+        op.execute(
+            "DELETE FROM jobs WHERE id NOT IN "
+            "(SELECT max(id) FROM jobs GROUP BY source, external_id) AND external_id IS NOT NULL"
+        )
+
+    op.create_index('uq_jobs_source_external_id', 'jobs', ['source', 'external_id'], unique=True)
+    if is_postgres:
+        op.execute("CREATE INDEX IF NOT EXISTS ix_jobs_tsv ON jobs USING gin (tsv)")
+
+
+def downgrade() -> None:
+    # The table itself is kept: it may predate 0013
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_jobs_tsv")
+    op.drop_index('uq_jobs_source_external_id', table_name='jobs')
@@ -0,0 +1,24 @@
+"""Index jobs.updated_at for incremental typeahead refreshes
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The suggest index reads only jobs written since its last refresh
+    op.create_index(op.f('ix_jobs_updated_at'), 'jobs', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_jobs_updated_at'), table_name='jobs')
@@ -0,0 +1,35 @@
+"""Reminder sends, one per habit and local day
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reminder_sends',
+        sa.Column('habit_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('local_date', sa.Date(), nullable=False),
+        sa.Column('hour', sa.Integer(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+        sa.PrimaryKeyConstraint('habit_id', 'local_date'),
+        sa.CheckConstraint('hour >= 0 AND hour < 24', name='check_send_hour')
+    )
+    op.create_index(op.f('ix_reminder_sends_local_date'), 'reminder_sends', ['local_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reminder_sends_local_date'), table_name='reminder_sends')
+    op.drop_table('reminder_sends')
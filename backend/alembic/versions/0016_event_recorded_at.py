@@ -0,0 +1,33 @@
+"""Record when events were inserted, for projection tailing
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=True))
+    # Existing projection offsets are (ts, id) positions; backfilling with ts
+    # keeps them valid for the rows already written
+    op.execute("UPDATE events SET recorded_at = ts")
+    op.alter_column('events', 'recorded_at', nullable=False, server_default=sa.func.now())
+
+    # Tailing reads events in (recorded_at, id) order instead of (ts, id)
+    op.drop_index('ix_events_ts_id', table_name='events')
+    op.create_index('ix_events_recorded_at_id', 'events', ['recorded_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_recorded_at_id', table_name='events')
+    op.create_index('ix_events_ts_id', 'events', ['ts', 'id'], unique=False)
+    op.drop_column('events', 'recorded_at')
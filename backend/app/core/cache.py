@@ -0,0 +1,202 @@
+"""In-process caches and the pluggable result cache."""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL.
+
+    Entries may carry a tag (e.g. a user id) so that every entry for the
+    tag can be dropped at once.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, _ = entry
+            if expires_at <= self.clock():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tag: Hashable = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, self.clock() + ttl, tag)
+            if tag is not None:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def delete_tag(self, tag: Hashable):
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[2] is not None:
+            keys = self._tags.get(entry[2])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[entry[2]]
+
+
+class InProcessBackend:
+    """Result cache backend holding Python objects in a bounded TTL/LRU cache."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key: str):
+        self._cache.delete(key)
+
+
+class LocalRedis:
+    """In-process stand-in for the subset of the redis-py client we use.
+
+    Values are stored as bytes with an LRU bound, like a Redis server running
+    with ``maxmemory-policy allkeys-lru``, so the Redis code path can run in
+    development and tests without a server.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self._cache = TTLCache(maxsize=maxsize, ttl=float("inf"))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value, ex: Optional[int] = None):
+        self._cache.set(key, value if isinstance(value, bytes) else str(value).encode(), ttl=ex)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        for key in keys:
+            self._cache.delete(key)
+        return len(keys)
+
+
+class RedisBackend:
+    """Result cache backend storing JSON values in Redis (or a compatible client)."""
+
+    def __init__(self, client, prefix: str = "habitloop:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(self.prefix + key, json.dumps(value, default=str).encode(), ex=max(1, int(ttl)))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+
+class ResultCache:
+    """Memoize computed results under versioned keys.
+
+    Keys include a data version, so a write never has to delete anything:
+    the next read simply misses and older versions age out of the LRU.
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Result cache read failed for {key}: {e}")
+            value = None
+
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = compute()
+        if value is not None:
+            try:
+                self.backend.set(key, value, self.ttl if ttl is None else ttl)
+            except Exception as e:
+                logger.warning(f"Result cache write failed for {key}: {e}")
+        return value
+
+
+def build_result_cache() -> ResultCache:
+    """Result cache for the configured backend."""
+    backend_name = settings.cache_backend
+
+    if backend_name == "redis":
+        try:
+            import redis
+            backend = RedisBackend(redis.Redis.from_url(settings.redis_url or "redis://localhost:6379/0"))
+        except ImportError:
+            logger.warning("redis package not installed, using the local Redis stand-in")
+            backend_name = "local_redis"
+
+    if backend_name == "local_redis":
+        backend = RedisBackend(LocalRedis(maxsize=settings.cache_max_entries))
+    elif backend_name != "redis":
+        backend = InProcessBackend(maxsize=settings.cache_max_entries, ttl=settings.cache_ttl_seconds)
+
+    return ResultCache(backend, ttl=settings.cache_ttl_seconds)
+
+
+result_cache = build_result_cache()
@@ -1,8 +1,7 @@
 """Configuration settings for the application."""
 
-import os
-from typing import List, Optional
-from pydantic_settings import BaseSettings
+from typing import Annotated, List, Optional
+from pydantic_settings import BaseSettings, NoDecode
 from pydantic import field_validator
 
 
@@ -11,30 +10,71 @@ class Settings(BaseSettings):
     
     # Database - Use SQLite for local development
     postgres_url: str = "sqlite:///./habitloop.db"
+    db_pool_size: int = 5  # Per process; size to worker threads / concurrency
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Seconds; below server/proxy idle timeouts
+    db_pool_pre_ping: bool = True
+    db_connect_timeout: int = 10
+    db_application_name: str = "habitloop"
     
-    # CORS - Updated for GitHub Pages deployment with environment variable support
-    cors_env = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,https://segnimekonnen7.github.io")
-    allowed_origins: List[str] = [origin.strip() for origin in cors_env.split(",")]
-    
-    # Debug logging
-    print(f"DEBUG: CORS origins loaded: {allowed_origins}")
-    print(f"DEBUG: Environment variable ALLOWED_ORIGINS: {cors_env}")
+    # CORS - comma-separated in ALLOWED_ORIGINS (e.g. for GitHub Pages deployments)
+    allowed_origins: Annotated[List[str], NoDecode] = ["http://localhost:3000", "https://segnimekonnen7.github.io"]
     
     # Email
     sendgrid_api_key: Optional[str] = None
     alerts_from_email: str = "alerts@habitloop.local"
     app_base_url: str = "http://localhost:3000"
+    email_transport: Optional[str] = None  # sendgrid, file or log; defaults by API key
+    email_sink_path: str = "./outbox.ndjson"
+    email_workers: int = 4
+    email_queue_size: int = 1000
+    email_batch_size: int = 100
+    email_max_retries: int = 3
     
     # Auth
     jwt_secret: str = "please-change-me"
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 60 * 24 * 7  # 7 days
+    auth_cache_size: int = 10000
+    auth_cache_ttl_seconds: int = 60  # Bounds staleness across processes
     
     # Scheduler
     scheduler_interval_minutes: int = 15
+    digest_chunk_size: int = 500
+    projection_interval_seconds: int = 60
+    projection_batch_size: int = 1000
+    projection_settle_seconds: int = 5  # Tail events recorded at least this long ago, once their transactions commit
+    
+    # Event retention
+    event_retention_months: int = 13  # Older months are archived and dropped; 0 keeps everything
+    event_archive_dir: str = "./archive"
+    event_archive_format: str = "ndjson"  # ndjson (gzipped) or parquet (needs pyarrow)
+    event_partition_months_ahead: int = 3
+    event_retention_hour: int = 4  # UTC hour of the nightly retention job
     
     # Bandit
     bandit_epsilon: float = 0.1
+    bandit_strategy: str = "epsilon_greedy"  # epsilon_greedy, thompson or ucb
+    bandit_flush_size: int = 500
+    
+    # Success model
+    success_model_dir: str = "./models"
+    success_scoring_hour: int = 3  # UTC hour of the nightly batch scoring job
+    success_scoring_chunk_size: int = 500
+    
+    # Job search
+    job_count_cache_size: int = 1000
+    job_count_cache_ttl_seconds: int = 60
+    job_exact_count_threshold: int = 1000  # count=estimate falls back to COUNT(*) below this
+    job_suggest_refresh_seconds: int = 30  # Pick up newly ingested jobs this often
+    job_suggest_rebuild_seconds: int = 3600  # Full recount of the typeahead index
+    
+    # Result cache
+    cache_backend: str = "memory"  # memory, redis or local_redis
+    cache_max_entries: int = 10000
+    cache_ttl_seconds: int = 3600
+    redis_url: Optional[str] = None
     
     @field_validator("allowed_origins", mode="before")
     @classmethod
@@ -0,0 +1,249 @@
+"""Outbound email queue and transports."""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def render(template: str, substitutions: Dict[str, str]) -> str:
+    """Fill ``-key-`` substitution tags in a template."""
+    for key, value in substitutions.items():
+        template = template.replace(f"-{key}-", str(value))
+    return template
+
+
+def build_message(kind: str, to: str, subject: str, html: str, substitutions: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an outbound message.
+
+    ``html`` is a shared template with ``-key-`` tags, so messages of the same
+    kind can be sent together as SendGrid personalizations.
+    """
+    return {
+        "kind": kind,
+        "to": to,
+        "subject": subject,
+        "html": html,
+        "substitutions": {key: str(value) for key, value in substitutions.items()},
+    }
+
+
+class LogTransport:
+    """Development transport that only logs messages."""
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> List[bool]:
+        for message in messages:
+            logger.info(f"DEV: {message['kind']} for {message['to']}: {message['substitutions']}")
+        return [True] * len(messages)
+
+
+class FileSinkTransport:
+    """Local stand-in transport appending rendered messages as NDJSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> List[bool]:
+        lines = [
+            json.dumps({
+                "kind": message["kind"],
+                "to": message["to"],
+                "subject": message["subject"],
+                "html": render(message["html"], message["substitutions"]),
+                "sent_at": datetime.utcnow().isoformat(),
+            })
+            for message in messages
+        ]
+        with self._lock, open(self.path, "a") as sink:
+            sink.write("\n".join(lines) + "\n")
+        return [True] * len(messages)
+
+
+class SendGridTransport:
+    """SendGrid transport sending one request per template batch."""
+
+    def __init__(self, api_key: str, from_email: str):
+        from sendgrid import SendGridAPIClient
+
+        self.client = SendGridAPIClient(api_key=api_key)
+        self.from_email = from_email
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> List[bool]:
+        from sendgrid.helpers.mail import Mail, Personalization, Substitution, To
+
+        results = [False] * len(messages)
+        groups = defaultdict(list)
+        for i, message in enumerate(messages):
+            groups[(message["kind"], message["html"])].append(i)
+
+        for (kind, html), indexes in groups.items():
+            mail = Mail(from_email=self.from_email, subject=messages[indexes[0]]["subject"], html_content=html)
+            for i in indexes:
+                personalization = Personalization()
+                personalization.add_to(To(messages[i]["to"]))
+                personalization.subject = messages[i]["subject"]
+                for key, value in messages[i]["substitutions"].items():
+                    personalization.add_substitution(Substitution(f"-{key}-", value))
+                mail.add_personalization(personalization)
+
+            try:
+                response = self.client.send(mail)
+                ok = response.status_code < 400
+                logger.info(f"Sent {len(indexes)} {kind} emails, status: {response.status_code}")
+            except Exception as e:
+                ok = False
+                logger.error(f"Failed to send {len(indexes)} {kind} emails: {e}")
+
+            for i in indexes:
+                results[i] = ok
+
+        return results
+
+
+class EmailDispatcher:
+    """Bounded outbound queue drained by a pool of async workers.
+
+    Workers pull up to ``batch_size`` queued messages at a time and hand them
+    to the transport in a worker thread, so blocking HTTP calls never run on
+    the event loop. Failed messages are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        transport,
+        workers: int = 4,
+        max_queue: int = 1000,
+        batch_size: int = 100,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.5
+    ):
+        self.transport = transport
+        self.workers = workers
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._metrics_lock = threading.Lock()
+        self._reset_metrics()
+
+    async def start(self):
+        """Start the worker pool on the running event loop."""
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Email dispatcher started with {self.workers} workers")
+
+    async def stop(self):
+        """Drain queued messages and stop the workers."""
+        if not self._tasks:
+            return
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        logger.info("Email dispatcher stopped")
+
+    async def submit(self, message: Dict[str, Any]) -> bool:
+        """Queue a message and wait for its delivery result.
+
+        Without a running dispatcher (scripts, tests) the message is delivered
+        directly; from another event loop it is handed over thread-safely.
+        """
+        if self._loop is None or not self._loop.is_running():
+            self._count("enqueued")
+            return (await self._deliver([message]))[0]
+
+        if asyncio.get_running_loop() is not self._loop:
+            future = asyncio.run_coroutine_threadsafe(self.submit(message), self._loop)
+            return await asyncio.wrap_future(future)
+
+        self._count("enqueued")
+        future = self._loop.create_future()
+        await self._queue.put((message, future))
+        return await future
+
+    def tick_metrics(self) -> Dict[str, Any]:
+        """Return throughput counters since the last call and reset them."""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+            self._reset_metrics()
+
+        elapsed = time.monotonic() - metrics.pop("since")
+        metrics["elapsed_s"] = round(elapsed, 3)
+        metrics["sent_per_s"] = round(metrics["sent"] / elapsed, 1) if elapsed > 0 else 0.0
+        metrics["queued"] = self._queue.qsize() if self._queue is not None else 0
+        return metrics
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                results = await self._deliver([message for message, _ in batch])
+            except Exception as e:
+                logger.error(f"Email batch of {len(batch)} failed: {e}")
+                results = [False] * len(batch)
+
+            for (_, future), ok in zip(batch, results):
+                if not future.done():
+                    future.set_result(ok)
+                self._queue.task_done()
+
+    async def _deliver(self, messages: List[Dict[str, Any]]) -> List[bool]:
+        results = [False] * len(messages)
+        pending = list(range(len(messages)))
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries", len(pending))
+                await asyncio.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+
+            self._count("batches")
+            try:
+                sent = await asyncio.to_thread(self.transport.send_batch, [messages[i] for i in pending])
+            except Exception as e:
+                logger.error(f"Email transport error: {e}")
+                sent = [False] * len(pending)
+
+            for i, ok in zip(pending, sent):
+                results[i] = ok
+            pending = [i for i, ok in zip(pending, sent) if not ok]
+            if not pending:
+                break
+
+        self._count("sent", len(messages) - len(pending))
+        self._count("failed", len(pending))
+        return results
+
+    def _count(self, key: str, amount: int = 1):
+        with self._metrics_lock:
+            self._metrics[key] += amount
+
+    def _reset_metrics(self):
+        self._metrics = {
+            "enqueued": 0,
+            "sent": 0,
+            "failed": 0,
+            "retries": 0,
+            "batches": 0,
+            "since": time.monotonic(),
+        }
@@ -0,0 +1,51 @@
+"""Conditional GET support keyed on a per-user data version."""
+
+import time
+import uuid
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select, update
+
+from app.models.user import User
+
+# Responses depend on each habit's local "today"; UTC offsets are multiples
+# of 15 minutes, so a tag bucketed this finely never outlives a local day.
+DAY_BUCKET_SECONDS = 15 * 60
+
+
+def bump_user_version(user_id: uuid.UUID):
+    """Statement invalidating every ETag of a user; execute in the mutating transaction."""
+    return update(User).where(User.id == user_id).values(
+        data_version=User.data_version + 1
+    ).execution_options(synchronize_session=False)
+
+
+def user_version_query(user_id: uuid.UUID):
+    return select(User.data_version).where(User.id == user_id)
+
+
+def make_etag(version: Optional[int], now: Optional[float] = None) -> str:
+    bucket = int((time.time() if now is None else now) // DAY_BUCKET_SECONDS)
+    return f'W/"{version or 0}.{bucket}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Weak comparison of ``etag`` against the request's If-None-Match."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
@@ -1,16 +1,38 @@
 """Security utilities."""
 
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import event
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.models.user import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Detached, immutable view of the authenticated user."""
+    id: uuid.UUID
+    email: str
+    name: Optional[str]
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(id=user.id, email=user.email, name=user.name, is_active=user.is_active is not False)
+
+
+# Validated token -> UserSnapshot, tagged by user id for invalidation.
+# Per process; the TTL bounds how long another process's changes go unseen.
+user_cache = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl_seconds)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token."""
     to_encode = data.copy()
@@ -19,23 +41,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.jwt_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[uuid.UUID]:
-    """Verify JWT token and return user ID."""
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    """Decode and validate a JWT (signature and expiry); None if invalid."""
     try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-        return uuid.UUID(user_id)
+        return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
     except JWTError:
         return None
 
 
+def token_subject(payload: Optional[Dict[str, Any]]) -> Optional[uuid.UUID]:
+    """User ID of a decoded access token; None for other token types."""
+    if payload is None or payload.get("type") == "magic_link":
+        return None
+
+    try:
+        return uuid.UUID(payload.get("sub"))
+    except (TypeError, ValueError):
+        return None
+
+
+def verify_token(token: str) -> Optional[uuid.UUID]:
+    """Verify JWT token and return user ID."""
+    return token_subject(decode_token(token))
+
+
+def invalidate_user(user_id: uuid.UUID):
+    """Drop every cached token for a user in this process."""
+    user_cache.delete_tag(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+
 def create_magic_link_token(email: str) -> str:
     """Create magic link token."""
     data = {"email": email, "type": "magic_link"}
@@ -0,0 +1,102 @@
+"""Connection pool instrumentation."""
+
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last is open
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Counters for one engine's pool: checkouts, waits, overflow, timeouts."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.engine = None
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    @property
+    def pool(self):
+        # Read through the engine; dispose() replaces its pool
+        return self.engine.pool if self.engine is not None else None
+
+    def observe_wait(self, seconds: float, timed_out: bool = False):
+        millis = seconds * 1000
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if millis <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self.wait_buckets[bucket] += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *args):
+        pool = self.pool
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        size = pool.size() if hasattr(pool, "size") else 0
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if size and checked_out > size:
+                self.overflow_checkouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.pool
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + [f"gt_{WAIT_BUCKETS_MS[-1]}ms"]
+            return {
+                "pool": type(pool).__name__ if pool is not None else None,
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_seconds_total / waits * 1000, 3) if waits else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+                "wait_ms_histogram": dict(zip(labels, self.wait_buckets)),
+            }
+
+
+def instrumented_pool_class(pool_class, metrics: PoolMetrics):
+    """Subclass ``pool_class`` so every checkout records how long it waited."""
+
+    class InstrumentedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+                raise
+            metrics.observe_wait(time.perf_counter() - started)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+
+def instrument_engine(sync_engine, metrics: PoolMetrics) -> PoolMetrics:
+    """Attach pool event listeners to a (sync) engine."""
+    metrics.engine = sync_engine
+    event.listen(sync_engine, "connect", metrics.on_connect)
+    event.listen(sync_engine, "checkout", metrics.on_checkout)
+    return metrics
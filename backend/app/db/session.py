@@ -1,22 +1,107 @@
 """Database session management."""
 
+from typing import Any, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql import functions
 
 from app.core.config import settings
+from app.db.pool_metrics import PoolMetrics, instrument_engine, instrumented_pool_class
+
+
+def async_database_url(url: str) -> str:
+    """Map a database URL onto its async driver (asyncpg / aiosqlite)."""
+    scheme, _, rest = url.partition("://")
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+def engine_options(url: str, metrics: PoolMetrics, is_async: bool = False) -> Dict[str, Any]:
+    """Dialect-aware connect args and pool settings for ``create_engine``."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        options = {"connect_args": {} if is_async else {"check_same_thread": False}}
+        if url.database in (None, "", ":memory:"):
+            # In-memory databases live in a single connection; keep the default pool
+            return options
+    elif url.get_driver_name() == "asyncpg":
+        options = {"connect_args": {
+            "timeout": settings.db_connect_timeout,
+            "server_settings": {"application_name": settings.db_application_name},
+        }}
+    elif backend == "postgresql":
+        options = {"connect_args": {
+            "connect_timeout": settings.db_connect_timeout,
+            "application_name": settings.db_application_name,
+        }}
+    else:
+        options = {}
+
+    options.update(
+        poolclass=instrumented_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    return options
+
+
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP has whole seconds; use the microsecond text format
+    # SQLAlchemy binds datetimes in, so server-set values compare correctly
+    return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
 
-# Use SQLite for local development
-engine = create_engine(settings.postgres_url, connect_args={"check_same_thread": False})
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+engine = create_engine(settings.postgres_url, **engine_options(settings.postgres_url, sync_pool_metrics))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_engine(engine, sync_pool_metrics)
+
+# Async engine for request handlers, so DB waits don't block the event loop
+async_url = async_database_url(settings.postgres_url)
+async_engine = create_async_engine(async_url, **engine_options(async_url, async_pool_metrics, is_async=True))
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+instrument_engine(async_engine.sync_engine, async_pool_metrics)
 
 Base = declarative_base()
 
 
+def pool_status() -> Dict[str, Any]:
+    """Pool metrics for both engines, for the health endpoint."""
+    return {
+        "sync": sync_pool_metrics.snapshot(),
+        "async": async_pool_metrics.snapshot(),
+    }
+
+
 def get_db():
     """Get database session."""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Get async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,96 @@
+"""Dialect-aware upserts and conflict-tolerant inserts."""
+
+from typing import Any, Dict, List, Sequence
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def increment_counters(
+    db: Session,
+    model,
+    key_columns: Sequence[str],
+    counter_columns: Sequence[str],
+    rows: List[Dict[str, Any]],
+    chunk_size: int = 1000
+):
+    """Insert rows, or atomically add their counters to existing rows.
+    
+    Uses INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and SQLite. Any other
+    column in the rows (e.g. ``updated_at``) is overwritten on conflict.
+    """
+    if not rows:
+        return
+    
+    dialect = _dialect(db)
+    other_columns = [
+        column for column in rows[0]
+        if column not in key_columns and column not in counter_columns
+    ]
+    
+    for i in range(0, len(rows), chunk_size):
+        stmt = dialect.insert(model).values(rows[i:i + chunk_size])
+        set_ = {
+            column: getattr(model, column) + getattr(stmt.excluded, column)
+            for column in counter_columns
+        }
+        set_.update({column: getattr(stmt.excluded, column) for column in other_columns})
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[getattr(model, column) for column in key_columns],
+            set_=set_
+        )
+        db.execute(stmt)
+
+
+def upsert_rows(
+    db: Session,
+    model,
+    key_columns: Sequence[str],
+    rows: List[Dict[str, Any]],
+    chunk_size: int = 1000
+):
+    """Insert rows, or overwrite every non-key column of existing rows."""
+    if not rows:
+        return
+    
+    dialect = _dialect(db)
+    other_columns = [column for column in rows[0] if column not in key_columns]
+    
+    for i in range(0, len(rows), chunk_size):
+        stmt = dialect.insert(model).values(rows[i:i + chunk_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[getattr(model, column) for column in key_columns],
+            set_={column: getattr(stmt.excluded, column) for column in other_columns}
+        )
+        db.execute(stmt)
+
+
+def insert_ignoring_conflicts(
+    db: Session,
+    model,
+    conflict_columns: Sequence[str],
+    rows: List[Dict[str, Any]],
+    returning: Sequence[str] = ("id",),
+    chunk_size: int = 1000
+) -> List[Any]:
+    """Multi-row INSERT ... ON CONFLICT DO NOTHING.
+    
+    Returns the ``returning`` columns of the rows actually inserted; rows that
+    hit the unique constraint on ``conflict_columns`` are skipped.
+    """
+    if not rows:
+        return []
+    
+    dialect = _dialect(db)
+    inserted = []
+    
+    for i in range(0, len(rows), chunk_size):
+        stmt = dialect.insert(model).values(rows[i:i + chunk_size]).on_conflict_do_nothing(
+            index_elements=[getattr(model, column) for column in conflict_columns]
+        ).returning(*[getattr(model, column) for column in returning])
+        inserted.extend(db.execute(stmt).all())
+    
+    return inserted
+
+
+def _dialect(db: Session):
+    return postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
@@ -8,8 +8,12 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 from app.core.config import settings
+from app.core.email import email_service
 from app.routers import auth, habits, reminders, admin, insights, calendar, health
 from app.services.scheduler_service import SchedulerService
+from app.services.projection_service import ProjectionRunner, ProjectionConflict
+from app.services.success_model import current_model, score_habits
+from app.services.event_archive import EventArchiver, ensure_partitions
 from app.db.session import SessionLocal
 
 # Configure logging
@@ -26,6 +30,9 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Habit Loop API")
     
+    # Start email dispatcher workers
+    await email_service.dispatcher.start()
+    
     # Start scheduler
     scheduler.start()
     
@@ -37,6 +44,15 @@ async def lifespan(app: FastAPI):
         replace_existing=True
     )
     
+    # Add projection job (tails events into derived tables)
+    scheduler.add_job(
+        run_projection_job,
+        trigger=IntervalTrigger(seconds=settings.projection_interval_seconds),
+        id="projection_job",
+        replace_existing=True,
+        max_instances=1
+    )
+    
     # Add weekly digest job (runs every Sunday at 18:00)
     scheduler.add_job(
         run_weekly_digest_job,
@@ -48,6 +64,35 @@ async def lifespan(app: FastAPI):
         replace_existing=True
     )
     
+    # Finish a digest run interrupted by the last shutdown
+    scheduler.add_job(
+        run_weekly_digest_resume_job,
+        id="weekly_digest_resume_job",
+        replace_existing=True
+    )
+    
+    # Add nightly success scoring job (precomputes per-habit probabilities)
+    scheduler.add_job(
+        run_success_scoring_job,
+        trigger="cron",
+        hour=settings.success_scoring_hour,
+        minute=0,
+        id="success_scoring_job",
+        replace_existing=True,
+        max_instances=1
+    )
+    
+    # Add nightly retention job (creates upcoming partitions, archives old months)
+    scheduler.add_job(
+        run_event_retention_job,
+        trigger="cron",
+        hour=settings.event_retention_hour,
+        minute=30,
+        id="event_retention_job",
+        replace_existing=True,
+        max_instances=1
+    )
+    
     logger.info("Scheduler started")
     
     yield
@@ -55,6 +100,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Habit Loop API")
     scheduler.shutdown()
+    await email_service.dispatcher.stop()
 
 
 def run_reminder_job():
@@ -70,6 +116,21 @@ def run_reminder_job():
         db.close()
 
 
+def run_projection_job():
+    """Run projection job."""
+    db = SessionLocal()
+    try:
+        processed = ProjectionRunner(db).run(batch_size=settings.projection_batch_size)
+        if processed:
+            logger.info(f"Projection job completed: {processed}")
+    except ProjectionConflict as e:
+        logger.warning(f"Projection job skipped: {e}")
+    except Exception as e:
+        logger.error(f"Projection job failed: {e}")
+    finally:
+        db.close()
+
+
 def run_weekly_digest_job():
     """Run weekly digest job."""
     db = SessionLocal()
@@ -83,6 +144,49 @@ def run_weekly_digest_job():
         db.close()
 
 
+def run_weekly_digest_resume_job():
+    """Resume an unfinished weekly digest run."""
+    db = SessionLocal()
+    try:
+        stats = SchedulerService(db).resume_weekly_digest()
+        if stats:
+            logger.info(f"Weekly digest resumed: {stats}")
+    except Exception as e:
+        logger.error(f"Weekly digest resume failed: {e}")
+    finally:
+        db.close()
+
+
+def run_success_scoring_job():
+    """Run success scoring job."""
+    model = current_model(settings.success_model_dir)
+    if model is None:
+        logger.info("Success scoring job skipped: no trained model")
+        return
+    
+    db = SessionLocal()
+    try:
+        scored = score_habits(db, model, chunk_size=settings.success_scoring_chunk_size)
+        logger.info(f"Success scoring job completed: {scored} habits with model {model.version}")
+    except Exception as e:
+        logger.error(f"Success scoring job failed: {e}")
+    finally:
+        db.close()
+
+
+def run_event_retention_job():
+    """Run event retention job."""
+    db = SessionLocal()
+    try:
+        created = ensure_partitions(db, settings.event_partition_months_ahead)
+        stats = EventArchiver(db).run()
+        logger.info(f"Event retention job completed: {stats}, partitions created: {created}")
+    except Exception as e:
+        logger.error(f"Event retention job failed: {e}")
+    finally:
+        db.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Habit Loop API",
@@ -2,18 +2,39 @@
 
 from .user import User
 from .habit import Habit
-from .event import Event
+from .habit_completion import HabitCompletion
+from .event import Event, EventIdempotencyKey
 from .streak import Streak
 from .reminder import Reminder
+from .reminder_send import ReminderSend
 from .experiment import Experiment
 from .digest_run import DigestRun
+from .bandit_arm import BanditArm
+from .rollup import HabitDailyRollup, HabitHourRollup, HabitWeeklyTotal
+from .projection_offset import ProjectionOffset
+from .revoked_token import RevokedToken
+from .success_score import HabitSuccessScore
+from .event_archive import EventArchive
+from .job import Job
 
 __all__ = [
     "User",
     "Habit", 
+    "HabitCompletion",
     "Event",
+    "EventIdempotencyKey",
     "Streak",
     "Reminder",
+    "ReminderSend",
     "Experiment",
     "DigestRun",
+    "BanditArm",
+    "HabitDailyRollup",
+    "HabitHourRollup",
+    "HabitWeeklyTotal",
+    "ProjectionOffset",
+    "RevokedToken",
+    "HabitSuccessScore",
+    "EventArchive",
+    "Job",
 ]
@@ -0,0 +1,23 @@
+"""Bandit arm statistics model."""
+
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, ForeignKey, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.session import Base
+
+
+class BanditArm(Base):
+    """Per-habit, per-hour reminder arm statistics."""
+    
+    __tablename__ = "bandit_arms"
+    
+    habit_id = Column(UUID(as_uuid=True), ForeignKey("habits.id"), primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    pulls = Column(Integer, nullable=False, default=0)
+    successes = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        CheckConstraint("hour >= 0 AND hour < 24", name="check_arm_hour"),
+    )
@@ -2,18 +2,23 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.session import Base
 
 
 class DigestRun(Base):
-    """Digest run model."""
+    """Digest run model, checkpointed after every processed chunk of users."""
     
     __tablename__ = "digest_runs"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     ran_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     count_sent = Column(Integer, nullable=False, default=0)
+    period_start = Column(DateTime(timezone=True), nullable=True, index=True)
+    status = Column(String, nullable=False, default="running")  # 'running', 'completed', 'abandoned'
+    cursor_user_id = Column(UUID(as_uuid=True), nullable=True)  # Last user id fully processed
+    chunks_done = Column(Integer, nullable=False, default=0)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -2,7 +2,7 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Text, JSON, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -10,17 +10,48 @@ from app.db.session import Base
 
 
 class Event(Base):
-    """Event model for event sourcing pattern."""
+    """Event model for event sourcing pattern.
+    
+    On PostgreSQL the table is range-partitioned by month on ``ts`` (primary
+    key ``(id, ts)``); filter on ``ts`` where possible so queries only touch
+    the partitions they need. Months past retention are archived and dropped
+    (see EventArchiver).
+    
+    ``ts`` is when the event happened and is set by clients, so offline syncs
+    can write it in the past. ``recorded_at`` is set by the database on
+    insert; projections tail events in that order.
+    """
     
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_habit_ts", "habit_id", "ts"),
+        Index("ix_events_recorded_at_id", "recorded_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
-    habit_id = Column(UUID(as_uuid=True), ForeignKey("habits.id"), nullable=False, index=True)
+    habit_id = Column(UUID(as_uuid=True), ForeignKey("habits.id"), nullable=False)
     type = Column(String, nullable=False)  # 'checkin', 'miss', 'reminder_sent', etc.
     ts = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
-    payload = Column(JSONB, nullable=True)
+    payload = Column(JSONB().with_variant(JSON(), "sqlite"), nullable=True)
+    idempotency_key = Column(String, nullable=True)  # Unique per user via EventIdempotencyKey
+    recorded_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     
     # Relationships
     user = relationship("User", backref="events")
-    habit = relationship("Habit", backref="events")
\ No newline at end of file
+    habit = relationship("Habit", backref="events")
+
+
+class EventIdempotencyKey(Base):
+    """Client-supplied event key, claimed once per user so offline syncs are safe to retry.
+    
+    Kept outside ``events`` because a partitioned table can only enforce
+    uniqueness that includes the partition key.
+    """
+    
+    __tablename__ = "event_idempotency_keys"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    idempotency_key = Column(String, primary_key=True)
+    event_id = Column(UUID(as_uuid=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, index=True)
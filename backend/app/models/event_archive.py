@@ -0,0 +1,21 @@
+"""Event archive model."""
+
+from datetime import datetime
+from sqlalchemy import Column, Date, DateTime, Integer, JSON, String
+
+from app.db.session import Base
+
+
+class EventArchive(Base):
+    """A month of events exported to a compressed file and removed from ``events``."""
+    
+    __tablename__ = "event_archives"
+    
+    id = Column(Integer, primary_key=True)
+    month = Column(Date, nullable=False, index=True)  # First day of the month (UTC); late events add more files
+    path = Column(String, nullable=False)
+    format = Column(String, nullable=False)  # ndjson.gz or parquet
+    rows = Column(Integer, nullable=False)
+    counts = Column(JSON, nullable=False)  # Events per type
+    sha256 = Column(String, nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
@@ -2,7 +2,7 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Integer, Numeric, ForeignKey, CheckConstraint, DateTime
+from sqlalchemy import Column, String, Text, Integer, Numeric, ForeignKey, CheckConstraint, DateTime, JSON
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -18,7 +18,7 @@ class Habit(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     notes = Column(Text)
-    schedule_json = Column(JSONB, nullable=False)
+    schedule_json = Column(JSONB().with_variant(JSON(), "sqlite"), nullable=False)
     goal_type = Column(String, nullable=False)
     target_value = Column(Numeric)
     grace_per_week = Column(Integer, nullable=False, default=1)
@@ -27,7 +27,6 @@ class Habit(Base):
     
     # Relationships
     user = relationship("User", backref="habits")
-    completions = relationship("HabitCompletion", backref="habit")
     
     __table_args__ = (
         CheckConstraint("goal_type IN ('check', 'count', 'duration')", name="check_goal_type"),
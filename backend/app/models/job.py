@@ -0,0 +1,36 @@
+"""Job posting model."""
+
+from datetime import datetime
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.db.session import Base
+
+
+class Job(Base):
+    """Scraped job posting, searched by the jobs router and loaded by JobIngestor."""
+    
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Re-crawls update a posting in place instead of duplicating it
+        Index("uq_jobs_source_external_id", "source", "external_id", unique=True),
+        Index("ix_jobs_tsv", "tsv", postgresql_using="gin"),
+        # Substring location matches; a plain B-tree (prefix matches) outside PostgreSQL
+        Index("ix_jobs_loc_city_trgm", "loc_city", postgresql_using="gin", postgresql_ops={"loc_city": "gin_trgm_ops"}),
+        Index("ix_jobs_loc_remote", "loc_remote", postgresql_where=text("loc_remote"), sqlite_where=text("loc_remote")),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    title = Column(String, nullable=False)
+    company = Column(String, nullable=False)
+    location = Column(String, nullable=False, default="")
+    description = Column(Text, nullable=False, default="")
+    apply_url = Column(String, nullable=True)
+    posted_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    source = Column(String, nullable=False)
+    external_id = Column(String, nullable=False)
+    tsv = Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True)  # Weighted title/company/description
+    loc_city = Column(String, nullable=True)  # Normalized at ingest (see normalize_location)
+    loc_state = Column(String(2), nullable=True, index=True)
+    loc_remote = Column(Boolean, nullable=True)  # NULL until the location is normalized
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, index=True)  # Last ingest that changed the posting
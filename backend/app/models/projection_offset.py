@@ -0,0 +1,20 @@
+"""Projection offset model."""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.session import Base
+
+
+class ProjectionOffset(Base):
+    """Position of a projector in the events stream, as a (recorded_at, id) cursor."""
+    
+    __tablename__ = "projection_offsets"
+    
+    name = Column(String, primary_key=True)
+    last_ts = Column(DateTime(timezone=True), nullable=True)  # recorded_at of the last event applied
+    last_event_id = Column(UUID(as_uuid=True), nullable=True)
+    version = Column(Integer, nullable=False, default=0)  # Bumped on every advance, used for compare-and-set
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
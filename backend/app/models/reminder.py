@@ -1,7 +1,7 @@
 """Reminder model."""
 
 import uuid
-from sqlalchemy import Column, String, Integer, ForeignKey, CheckConstraint
+from sqlalchemy import Column, String, Integer, ForeignKey, CheckConstraint, JSON
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 from app.db.session import Base
@@ -15,8 +15,8 @@ class Reminder(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     habit_id = Column(UUID(as_uuid=True), ForeignKey("habits.id"), nullable=False, unique=True)
     channel = Column(String, nullable=False)
-    window = Column(JSONB, nullable=False)
-    quiet_hours = Column(JSONB)
+    window = Column(JSONB().with_variant(JSON(), "sqlite"), nullable=False)
+    quiet_hours = Column(JSONB().with_variant(JSON(), "sqlite"))
     best_hour = Column(Integer)
     timezone = Column(String, nullable=False)
     
@@ -0,0 +1,27 @@
+"""Reminder send model."""
+
+from datetime import datetime
+from sqlalchemy import Column, Date, DateTime, Integer, ForeignKey, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.session import Base
+
+
+class ReminderSend(Base):
+    """A habit's reminder hour for one local day, and when it was claimed for sending.
+    
+    The row is written when the day's hour is chosen. Setting ``sent_at`` from
+    NULL claims the send, so retried ticks and concurrent workers send once.
+    """
+    
+    __tablename__ = "reminder_sends"
+    
+    habit_id = Column(UUID(as_uuid=True), ForeignKey("habits.id"), primary_key=True)
+    local_date = Column(Date, primary_key=True, index=True)  # In the reminder's timezone
+    hour = Column(Integer, nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        CheckConstraint("hour >= 0 AND hour < 24", name="check_send_hour"),
+    )
@@ -0,0 +1,18 @@
+"""Revoked token model."""
+
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.session import Base
+
+
+class RevokedToken(Base):
+    """A JWT (by ``jti``) that must no longer authenticate, until it expires."""
+    
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
@@ -0,0 +1,43 @@
+"""Habit completion rollup models."""
+
+from sqlalchemy import Column, Date, Integer, ForeignKey, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.session import Base
+
+
+class HabitDailyRollup(Base):
+    """Checkins per habit, local day and local hour."""
+    
+    __tablename__ = "habit_daily_rollups"
+    
+    habit_id = Column(UUID(as_uuid=True), ForeignKey("habits.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    checkins = Column(Integer, nullable=False, default=0)
+
+
+class HabitHourRollup(Base):
+    """All-time checkins per habit and local hour of week (0 = Monday 00:00)."""
+    
+    __tablename__ = "habit_hour_rollups"
+    
+    habit_id = Column(UUID(as_uuid=True), ForeignKey("habits.id"), primary_key=True)
+    hour_of_week = Column(Integer, primary_key=True)
+    checkins = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        CheckConstraint("hour_of_week >= 0 AND hour_of_week < 168", name="check_hour_of_week"),
+    )
+
+
+class HabitWeeklyTotal(Base):
+    """Event totals per habit and local week (starting Monday)."""
+    
+    __tablename__ = "habit_weekly_totals"
+    
+    habit_id = Column(UUID(as_uuid=True), ForeignKey("habits.id"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    checkins = Column(Integer, nullable=False, default=0)
+    misses = Column(Integer, nullable=False, default=0)
+    reminders_sent = Column(Integer, nullable=False, default=0)
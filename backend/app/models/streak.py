@@ -2,14 +2,14 @@
 
 import uuid
 from datetime import datetime, date
-from sqlalchemy import Column, Date, Integer, ForeignKey
+from sqlalchemy import Column, Date, DateTime, Integer, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.session import Base
 
 
 class Streak(Base):
-    """Streak model."""
+    """Materialized streak state, updated incrementally on checkin/miss."""
     
     __tablename__ = "streaks"
     
@@ -18,4 +18,7 @@ class Streak(Base):
     start_date = Column(Date, nullable=False)
     length_days = Column(Integer, nullable=False)
     grace_used = Column(Integer, nullable=False, default=0)
+    grace_week_start = Column(Date, nullable=True)  # Week that grace_used applies to
+    last_event_date = Column(Date, nullable=True)  # Last local date already accounted for
+    last_checkin_date = Column(Date, nullable=True)
     updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
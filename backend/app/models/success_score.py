@@ -0,0 +1,20 @@
+"""Precomputed habit success score model."""
+
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, JSON, String
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.session import Base
+
+
+class HabitSuccessScore(Base):
+    """Latest model probability per habit, written by the nightly scoring job."""
+    
+    __tablename__ = "habit_success_scores"
+    
+    habit_id = Column(UUID(as_uuid=True), ForeignKey("habits.id"), primary_key=True)
+    probability = Column(Float, nullable=False)
+    model_version = Column(String, nullable=False)
+    features = Column(JSON, nullable=False)
+    data_version = Column(Integer, nullable=False)  # Owner's users.data_version when scored
+    scored_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
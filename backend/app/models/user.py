@@ -2,9 +2,8 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Boolean, Integer
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
 
 from app.db.session import Base
 
@@ -18,8 +17,7 @@ class User(Base):
     email = Column(String, unique=True, nullable=False, index=True)
     name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped on habit/event writes; drives ETags
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     
-    # Relationships
-    habits = relationship("Habit", backref="user")
-    habit_completions = relationship("HabitCompletion", backref="user")
\ No newline at end of file
+    # habits, habit_completions and events are backrefs from those models
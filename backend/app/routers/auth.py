@@ -1,32 +1,74 @@
 """Authentication router."""
 
+from datetime import datetime, timezone
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.user import User
+from app.models.revoked_token import RevokedToken
+from app.core.security import UserSnapshot, decode_token, token_subject, user_cache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 security = HTTPBearer()
 
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
 
 def get_current_user(
-    token: str = Depends(security),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> UserSnapshot:
+    """Get current authenticated user.
+
+    Validated tokens are cached with a snapshot of their user, so repeat
+    requests skip both JWT decoding and the users-table lookup. Entries
+    expire with the token or after ``auth_cache_ttl_seconds``, whichever
+    comes first, and are dropped when the user is updated or the token is
+    revoked in this process.
+    """
+    token = credentials.credentials
+    snapshot = user_cache.get(token)
+    if snapshot is not None:
+        return snapshot
+
+    payload = decode_token(token)
+    user_id = token_subject(payload)
+    if user_id is None or not payload.get("jti"):
+        raise credentials_exception
+
+    # One round trip for the user and the token's revocation status
+    revoked = db.query(RevokedToken.jti).filter(RevokedToken.jti == payload["jti"]).exists()
+    row = db.query(User, revoked).filter(User.id == user_id).first()
+    if row is None or row[1] or row[0].is_active is False:
+        raise credentials_exception
+
+    snapshot = UserSnapshot.from_user(row[0])
+    expires_in = payload["exp"] - datetime.now(timezone.utc).timestamp()
+    user_cache.set(token, snapshot, ttl=expires_in, tag=snapshot.id)
+    return snapshot
+
+
+@router.post("/logout")
+def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user."""
-    # For now, return a mock user for development
-    # In production, you'd validate the JWT token here
-    user = db.query(User).first()
-    if not user:
-        # Create a mock user for development
-        user = User(
-            email="demo@example.com",
-            name="Demo User"
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    
-    return user
\ No newline at end of file
+):
+    """Revoke the current access token."""
+    payload = decode_token(credentials.credentials)
+    db.merge(RevokedToken(
+        jti=payload["jti"],
+        user_id=current_user.id,
+        expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc)
+    ))
+    db.commit()
+
+    user_cache.delete(credentials.credentials)
+    return {"message": "Logged out"}
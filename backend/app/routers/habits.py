@@ -1,28 +1,39 @@
 """Habits router."""
 
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.models.user import User
 from app.models.habit import Habit
-from app.models.event import Event
-from app.schemas.habit import HabitCreate, HabitUpdate, HabitSummary
-from app.schemas.event import EventCreate
+from app.models.event import Event, EventIdempotencyKey
+from app.models.streak import Streak
+from app.models.reminder import Reminder
+from app.schemas.habit import Habit as HabitSchema, HabitCreate, HabitUpdate, HabitSummary
+from app.schemas.event import EventCreate, EventBatchCreate, EventBatchResult, EventPage
 from app.routers.auth import get_current_user
+from app.core.etag import (
+    bump_user_version, user_version_query, make_etag, is_not_modified, not_modified_response, set_etag
+)
+from app.db.upsert import insert_ignoring_conflicts
 from app.services.streak_service import StreakService
+from app.services.projection_service import ProjectionRunner
+from app.services.event_export import events_page, iter_event_rows, ndjson_lines, csv_lines
 
 router = APIRouter(prefix="/habits", tags=["habits"])
 
 
-@router.post("/", response_model=Habit)
+@router.post("/", response_model=HabitSchema)
 async def create_habit(
     habit_data: HabitCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new habit."""
     habit = Habit(
@@ -37,31 +48,48 @@ async def create_habit(
     )
     
     db.add(habit)
-    db.commit()
-    db.refresh(habit)
+    await db.execute(bump_user_version(current_user.id))
+    await db.commit()
+    await db.refresh(habit)
     
     return habit
 
 
 @router.get("/", response_model=List[HabitSummary])
 async def list_habits(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List user's habits with summaries."""
-    habits = db.query(Habit).filter(Habit.user_id == current_user.id).all()
+    """List user's habits with summaries.
+
+    Habits, their materialized streaks and reminder best hours are fetched in
+    a single joined query, so the number of round trips does not grow with
+    the number of habits. Polling clients sending If-None-Match get a 304
+    after a single version lookup while nothing has changed.
+    """
+    etag = make_etag(await db.scalar(user_version_query(current_user.id)))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
+    
+    rows = (await db.execute(
+        select(Habit, Streak, Reminder.best_hour).outerjoin(
+            Streak, Streak.habit_id == Habit.id
+        ).outerjoin(
+            Reminder, Reminder.habit_id == Habit.id
+        ).where(
+            Habit.user_id == current_user.id
+        ).order_by(Habit.created_at)
+    )).all()
     
-    streak_service = StreakService(db)
+    # Summaries are computed from the loaded rows; no further queries
+    streak_service = StreakService(None)
     habit_summaries = []
     
-    for habit in habits:
-        # Get streak summary
-        streak_summary = streak_service.get_streak_summary(habit)
-        
-        # Get best hour from reminder
-        best_hour = None
-        if habit.reminder:
-            best_hour = habit.reminder.best_hour
+    for habit, streak, best_hour in rows:
+        streak_summary = streak_service.summarize(habit, streak)
         
         habit_summary = HabitSummary(
             id=habit.id,
@@ -81,17 +109,17 @@ async def list_habits(
     return habit_summaries
 
 
-@router.get("/{habit_id}", response_model=Habit)
+@router.get("/{habit_id}", response_model=HabitSchema)
 async def get_habit(
     habit_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get habit details."""
-    habit = db.query(Habit).filter(
+    habit = await db.scalar(select(Habit).where(
         Habit.id == habit_id,
         Habit.user_id == current_user.id
-    ).first()
+    ))
     
     if not habit:
         raise HTTPException(status_code=404, detail="Habit not found")
@@ -99,18 +127,18 @@ async def get_habit(
     return habit
 
 
-@router.patch("/{habit_id}", response_model=Habit)
+@router.patch("/{habit_id}", response_model=HabitSchema)
 async def update_habit(
     habit_id: uuid.UUID,
     habit_data: HabitUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a habit."""
-    habit = db.query(Habit).filter(
+    habit = await db.scalar(select(Habit).where(
         Habit.id == habit_id,
         Habit.user_id == current_user.id
-    ).first()
+    ))
     
     if not habit:
         raise HTTPException(status_code=404, detail="Habit not found")
@@ -119,8 +147,9 @@ async def update_habit(
     for field, value in habit_data.dict(exclude_unset=True).items():
         setattr(habit, field, value)
     
-    db.commit()
-    db.refresh(habit)
+    await db.execute(bump_user_version(current_user.id))
+    await db.commit()
+    await db.refresh(habit)
     
     return habit
 
@@ -129,35 +158,133 @@ async def update_habit(
 async def delete_habit(
     habit_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a habit."""
-    habit = db.query(Habit).filter(
+    habit = await db.scalar(select(Habit).where(
         Habit.id == habit_id,
         Habit.user_id == current_user.id
-    ).first()
+    ))
     
     if not habit:
         raise HTTPException(status_code=404, detail="Habit not found")
     
-    db.delete(habit)
-    db.commit()
+    await db.delete(habit)
+    await db.execute(bump_user_version(current_user.id))
+    await db.commit()
     
     return {"message": "Habit deleted"}
 
 
+@router.post("/events:batch", response_model=EventBatchResult)
+async def ingest_events(
+    batch: EventBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Record many checkins/misses across habits, e.g. after an offline sync.
+
+    Ownership of every habit is checked with one query. Idempotency keys are
+    claimed with multi-row INSERT ... ON CONFLICT DO NOTHING and only events
+    with a newly claimed (or no) key are written, so retrying a sync with the
+    same idempotency keys does not duplicate events. Streaks
+    and rollups are then updated once per affected habit. Events may carry
+    a past ``ts``; tailed projections follow insertion order, so they still
+    pick them up.
+    """
+    habit_ids = {item.habit_id for item in batch.events}
+    habits = {
+        habit.id: habit
+        for habit in await db.scalars(select(Habit).where(
+            Habit.id.in_(habit_ids),
+            Habit.user_id == current_user.id
+        ))
+    }
+
+    missing = habit_ids - habits.keys()
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Habits not found: {', '.join(sorted(str(habit_id) for habit_id in missing))}"
+        )
+
+    now = datetime.utcnow()
+    rows, seen_keys = [], set()
+    for item in batch.events:
+        if item.idempotency_key is not None:
+            if item.idempotency_key in seen_keys:
+                continue
+            seen_keys.add(item.idempotency_key)
+
+        ts = item.ts or now
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+        rows.append({
+            "id": uuid.uuid4(),
+            "user_id": current_user.id,
+            "habit_id": item.habit_id,
+            "type": item.type,
+            "ts": ts,
+            "payload": item.payload,
+            "idempotency_key": item.idempotency_key
+        })
+
+    def write(session: Session):
+        # Claim the keys first; only events whose key is new (or unkeyed) are written
+        keys = [
+            {
+                "user_id": current_user.id,
+                "idempotency_key": row["idempotency_key"],
+                "event_id": row["id"],
+                "created_at": now
+            }
+            for row in rows if row["idempotency_key"] is not None
+        ]
+        claimed_ids = {
+            event_id for (event_id,) in insert_ignoring_conflicts(
+                session, EventIdempotencyKey, ("user_id", "idempotency_key"), keys,
+                returning=("event_id",)
+            )
+        }
+        accepted = [
+            row for row in rows
+            if row["idempotency_key"] is None or row["id"] in claimed_ids
+        ]
+        if accepted:
+            session.execute(insert(Event), accepted)
+        events = [Event(**row) for row in accepted]
+
+        # Update live projections (streaks, rollups) in the same transaction
+        if events:
+            ProjectionRunner(session).apply_live(events, habits)
+        return events
+
+    events = await db.run_sync(write)
+    if events:
+        await db.execute(bump_user_version(current_user.id))
+    await db.commit()
+
+    return {
+        "received": len(batch.events),
+        "inserted": len(events),
+        "duplicates": len(batch.events) - len(events),
+        "event_ids": [event.id for event in events]
+    }
+
+
 @router.post("/{habit_id}/checkin")
 async def checkin_habit(
     habit_id: uuid.UUID,
     event_data: EventCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Record a habit checkin."""
-    habit = db.query(Habit).filter(
+    habit = await db.scalar(select(Habit).where(
         Habit.id == habit_id,
         Habit.user_id == current_user.id
-    ).first()
+    ))
     
     if not habit:
         raise HTTPException(status_code=404, detail="Habit not found")
@@ -172,12 +299,12 @@ async def checkin_habit(
     )
     
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.flush()
     
-    # Update streak
-    streak_service = StreakService(db)
-    streak_service.update_streak(habit)
+    # Update live projections (streak, rollups) in the same transaction
+    await db.run_sync(lambda session: ProjectionRunner(session).apply_live([event], {habit.id: habit}))
+    await db.execute(bump_user_version(current_user.id))
+    await db.commit()
     
     return {"message": "Checkin recorded", "event_id": event.id}
 
@@ -187,13 +314,13 @@ async def miss_habit(
     habit_id: uuid.UUID,
     event_data: EventCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Record a habit miss."""
-    habit = db.query(Habit).filter(
+    habit = await db.scalar(select(Habit).where(
         Habit.id == habit_id,
         Habit.user_id == current_user.id
-    ).first()
+    ))
     
     if not habit:
         raise HTTPException(status_code=404, detail="Habit not found")
@@ -208,25 +335,62 @@ async def miss_habit(
     )
     
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.flush()
     
-    # Update streak
-    streak_service = StreakService(db)
-    streak_service.update_streak(habit)
+    # Update live projections (streak, rollups) in the same transaction
+    await db.run_sync(lambda session: ProjectionRunner(session).apply_live([event], {habit.id: habit}))
+    await db.execute(bump_user_version(current_user.id))
+    await db.commit()
     
     return {"message": "Miss recorded", "event_id": event.id}
 
 
-@router.get("/{habit_id}/events")
+@router.get("/{habit_id}/events", response_model=EventPage)
 async def get_habit_events(
     habit_id: uuid.UUID,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get events for a habit, newest first, one page at a time.
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    habit = await db.scalar(select(Habit).where(
+        Habit.id == habit_id,
+        Habit.user_id == current_user.id
+    ))
+    
+    if not habit:
+        raise HTTPException(status_code=404, detail="Habit not found")
+    
+    try:
+        events, next_cursor = await db.run_sync(
+            lambda session: events_page(session, habit_id, limit, cursor, from_date, to_date)
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return {"items": events, "next_cursor": next_cursor}
+
+
+@router.get("/{habit_id}/events/export")
+def export_habit_events(
+    habit_id: uuid.UUID,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get events for a habit."""
+    """Stream a habit's full event history as NDJSON or CSV, oldest first.
+
+    Kept on the sync engine: FastAPI iterates the body in its threadpool, and
+    the server-side cursor needs a sync connection for the whole stream.
+    """
     habit = db.query(Habit).filter(
         Habit.id == habit_id,
         Habit.user_id == current_user.id
@@ -235,14 +399,20 @@ async def get_habit_events(
     if not habit:
         raise HTTPException(status_code=404, detail="Habit not found")
     
-    # Build query
-    query = db.query(Event).filter(Event.habit_id == habit_id)
-    
-    if from_date:
-        query = query.filter(Event.ts >= from_date)
-    if to_date:
-        query = query.filter(Event.ts <= to_date)
+    bind = db.get_bind()
     
-    events = query.order_by(Event.ts.desc()).all()
+    def stream():
+        # The request session may be closed before the body is sent
+        export_db = Session(bind=bind)
+        try:
+            rows = iter_event_rows(export_db, habit_id, from_date, to_date)
+            yield from (csv_lines(rows) if format == "csv" else ndjson_lines(rows))
+        finally:
+            export_db.close()
     
-    return events
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="habit-{habit_id}-events.{format}"'}
+    )
@@ -2,10 +2,18 @@
 
 from fastapi import APIRouter
 
+from app.db.session import pool_status
+
 router = APIRouter(prefix="/health", tags=["health"])
 
 
 @router.get("/")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "message": "Habit Loop API is running"}
\ No newline at end of file
+    return {"status": "healthy", "message": "Habit Loop API is running"}
+
+
+@router.get("/db")
+async def database_pool_health():
+    """Connection pool metrics: checked-out count, checkout waits, overflow and timeouts."""
+    return pool_status()
@@ -1,14 +1,17 @@
 """Insights router with ML-like features."""
 
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.user import User
 from app.models.habit import Habit
+from app.models.success_score import HabitSuccessScore
 from app.routers.auth import get_current_user
-from app.services.prediction_service import PredictionService
+from app.core.etag import make_etag, is_not_modified, not_modified_response, set_etag
+from app.services.prediction_service import PredictionService, stored_prediction
 from app.services.smart_reminder_service import SmartReminderService
 
 router = APIRouter(prefix="/insights", tags=["insights"])
@@ -17,23 +20,41 @@ router = APIRouter(prefix="/insights", tags=["insights"])
 @router.get("/habits/{habit_id}/success-prediction")
 async def predict_habit_success(
     habit_id: uuid.UUID,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Predict likelihood of maintaining habit streak."""
     
-    # Verify habit belongs to user
-    habit = db.query(Habit).filter(
-        Habit.id == habit_id,
-        Habit.user_id == current_user.id
-    ).first()
+    # Verify habit belongs to user, fetching its nightly score alongside
+    row = (await db.execute(
+        select(Habit, User.data_version, HabitSuccessScore)
+        .join(User, User.id == Habit.user_id)
+        .outerjoin(HabitSuccessScore, HabitSuccessScore.habit_id == Habit.id)
+        .where(
+            Habit.id == habit_id,
+            Habit.user_id == current_user.id
+        )
+    )).first()
     
-    if not habit:
+    if not row:
         raise HTTPException(status_code=404, detail="Habit not found")
     
-    # Get prediction
-    prediction_service = PredictionService(db)
-    result = prediction_service.predict_habit_success(str(habit_id))
+    habit, version, score = row
+    etag = make_etag(version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
+    
+    stored = stored_prediction(score, version)
+    if stored is not None:
+        return stored
+    
+    # Score live when the habit changed since the nightly run
+    result = await db.run_sync(
+        lambda session: PredictionService(session).predict_habit_success(habit.id, version)
+    )
     
     return result
 
@@ -41,25 +62,37 @@ async def predict_habit_success(
 @router.get("/habits/{habit_id}/optimal-reminder")
 async def get_optimal_reminder_time(
     habit_id: uuid.UUID,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get optimal reminder time based on completion patterns."""
     
     # Verify habit belongs to user
-    habit = db.query(Habit).filter(
-        Habit.id == habit_id,
-        Habit.user_id == current_user.id
-    ).first()
+    row = (await db.execute(
+        select(Habit, User.data_version).join(User, User.id == Habit.user_id).where(
+            Habit.id == habit_id,
+            Habit.user_id == current_user.id
+        )
+    )).first()
     
-    if not habit:
+    if not row:
         raise HTTPException(status_code=404, detail="Habit not found")
     
+    habit, version = row
+    etag = make_etag(version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
+    
     # Get optimal reminder time
-    reminder_service = SmartReminderService(db)
-    result = reminder_service.analyze_optimal_reminder_time(
-        str(current_user.id), 
-        str(habit_id)
+    result = await db.run_sync(
+        lambda session: SmartReminderService(session).analyze_optimal_reminder_time(
+            current_user.id,
+            habit.id,
+            version
+        )
     )
     
     if not result:
@@ -71,27 +104,39 @@ async def get_optimal_reminder_time(
 @router.get("/habits/{habit_id}/completion-stats")
 async def get_completion_stats(
     habit_id: uuid.UUID,
-    days: int = 30,
+    request: Request,
+    response: Response,
+    days: int = Query(default=30, ge=1, le=3650),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get completion statistics for a habit."""
     
     # Verify habit belongs to user
-    habit = db.query(Habit).filter(
-        Habit.id == habit_id,
-        Habit.user_id == current_user.id
-    ).first()
+    row = (await db.execute(
+        select(Habit, User.data_version).join(User, User.id == Habit.user_id).where(
+            Habit.id == habit_id,
+            Habit.user_id == current_user.id
+        )
+    )).first()
     
-    if not habit:
+    if not row:
         raise HTTPException(status_code=404, detail="Habit not found")
     
+    habit, version = row
+    etag = make_etag(version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
+    
     # Get completion stats
-    reminder_service = SmartReminderService(db)
-    result = reminder_service.get_completion_stats(
-        str(current_user.id), 
-        str(habit_id), 
-        days
+    result = await db.run_sync(
+        lambda session: SmartReminderService(session).get_completion_stats(
+            current_user.id,
+            habit.id,
+            days,
+            habit.timezone
+        )
     )
     
     return result
\ No newline at end of file
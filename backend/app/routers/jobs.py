@@ -1,12 +1,29 @@
-from fastapi import APIRouter, Depends, Query
+import re
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from ..core.cache import TTLCache
+from ..core.config import settings
 from ..db.session import SessionLocal
-from ..schemas import JobOut, SearchResult
-from ..utils.geo import expand_location_terms
+from ..schemas import JobOut, SearchResult, Suggestion
+from ..services.job_suggest import SuggestIndex
+from ..utils.cursors import encode_cursor, decode_cursor
+from ..utils.geo import REMOTE_RE, clean_place, state_code
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+JOB_COLUMNS = "id, title, company, location, description, apply_url, posted_at, source, external_id"
+# float8 so the rank round-trips exactly through the cursor
+RANK_SQL = "ts_rank(tsv, plainto_tsquery('english', :q))::float8"
+
+# (query, location, sources, mode) -> (total, is_estimate); totals barely move between page loads
+count_cache = TTLCache(maxsize=settings.job_count_cache_size, ttl=settings.job_count_cache_ttl_seconds)
+# Typeahead answers come from memory; the database is only read to refresh it
+suggest_index = SuggestIndex(SessionLocal, settings.job_suggest_refresh_seconds, settings.job_suggest_rebuild_seconds)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -14,56 +31,153 @@ def get_db():
     finally:
         db.close()
 
+def _location_clause(loc: str, params: dict, dialect: str) -> str | None:
+    """Match any comma/pipe-separated term against the normalized location columns.
+
+    States match ``loc_state`` (a state name also matches as a city, e.g.
+    "New York"), "remote" matches ``loc_remote`` and anything else matches
+    ``loc_city``: as a substring through the trigram index on PostgreSQL,
+    as a prefix range over the B-tree index elsewhere.
+    """
+    clauses = []
+    for i, term in enumerate(t for t in re.split(r"[,|]", loc) if t.strip()):
+        if REMOTE_RE.search(term):
+            clauses.append("loc_remote")
+            continue
+
+        state = state_code(term)
+        if state:
+            params[f"loc_state_{i}"] = state
+            clauses.append(f"loc_state = :loc_state_{i}")
+
+        city = clean_place(term)
+        if city and (not state or len(city) > 2):
+            if dialect == "postgresql":
+                params[f"loc_city_{i}"] = "%" + re.sub(r"([%_\\])", r"\\\1", city) + "%"
+                clauses.append(f"loc_city LIKE :loc_city_{i}")
+            else:
+                params[f"loc_city_{i}"], params[f"loc_city_end_{i}"] = city, city + "\uffff"
+                clauses.append(f"(loc_city >= :loc_city_{i} AND loc_city < :loc_city_end_{i})")
+
+    return "(" + " OR ".join(clauses) + ")" if clauses else None
+
+def _filters(query: str, loc: str | None, source: list[str] | None, dialect: str) -> tuple[list[str], dict]:
+    params: dict = {}
+    where = ["1=1"]
+
+    if source:
+        where.append("source = ANY(:sources)")
+        params["sources"] = source
+
+    if loc:
+        clause = _location_clause(loc, params, dialect)
+        if clause:
+            where.append(clause)
+
+    if query:
+        params["q"] = query
+        where.append("tsv @@ plainto_tsquery('english', :q)")
+
+    return where, params
+
+def _count(db: Session, where_sql: str, params: dict, mode: str) -> tuple[int, bool]:
+    """Exact COUNT(*), or the planner's row estimate when it is large enough to matter."""
+    if mode == "estimate" and db.get_bind().dialect.name == "postgresql":
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM jobs WHERE {where_sql}"), params).scalar()
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate > settings.job_exact_count_threshold:
+            return estimate, True
+    return db.execute(text(f"SELECT COUNT(*) FROM jobs WHERE {where_sql}"), params).scalar() or 0, False
+
 @router.get("/search", response_model=SearchResult)
 def search_jobs(
     query: str = Query(default=""),
     loc: str | None = None,
-    page: int = 1,
-    per_page: int = 20,
+    cursor: str | None = None,
+    per_page: int = Query(default=20, ge=1, le=100),
     source: list[str] | None = Query(default=None),
+    count: Literal["exact", "estimate"] = "exact",
     db: Session = Depends(get_db),
 ):
-    offset = (page - 1) * per_page
-    params: dict = {"limit": per_page, "offset": offset}
-    where = ["1=1"]
+    """Search jobs, best match (or newest) first.
 
-    if source:
-        where.append("source = ANY(:sources)")
-        params["sources"] = source
+    Pages are keyset-paginated on (rank, posted_at, id), or (posted_at, id)
+    without a query, so every page costs the same; follow ``next_cursor``.
+    The total is cached briefly per query and filters, and with
+    ``count=estimate`` large totals come from planner statistics instead of
+    a full COUNT(*).
+    """
+    query = query.strip()
+    where, params = _filters(query, loc, source, db.get_bind().dialect.name)
+    sort = ["posted_at", "id"]
+    if query:
+        sort.insert(0, RANK_SQL)
 
-    if loc:
-        pats = expand_location_terms(loc)
-        if pats:
-            clauses = []
-            for i, p in enumerate(pats):
-                key = f"loc_{i}"
-                params[key] = p
-                clauses.append(f"location ILIKE :{key}")
-            where.append("(" + " OR ".join(clauses) + ")")
-
-    rank_sql = ""
-    if query.strip():
-        params["q"] = query.strip()
-        where.append("tsv @@ plainto_tsquery('english', :q)")
-        rank_sql = ", ts_rank(tsv, plainto_tsquery('english', :q)) AS rank"
+    key = (query.lower(), (loc or "").strip().lower(), tuple(sorted(source or ())), count)
+    cached = count_cache.get(key)
+    if cached is None:
+        cached = _count(db, " AND ".join(where), params, count)
+        count_cache.set(key, cached)
+    total, is_estimate = cached
 
-    where_sql = " AND ".join(where)
-    total = db.execute(text(f"SELECT COUNT(*) FROM jobs WHERE {where_sql}"), params).scalar() or 0
-    order = "ORDER BY posted_at DESC" if not rank_sql else "ORDER BY rank DESC, posted_at DESC"
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+            if len(values) != len(sort):
+                raise ValueError("Invalid cursor")
+            *rank, posted_at, job_id = values
+            params.update({f"c_{i}": float(v) for i, v in enumerate(rank)})
+            params["c_posted_at"] = datetime.fromisoformat(posted_at)
+            params["c_id"] = int(job_id)
+        except (TypeError, ValueError):
+            # Well-formed tokens can still hold nulls or numbers where strings belong
+            raise HTTPException(400, "Invalid cursor")
+        bounds = [f":c_{i}" for i in range(len(rank))] + [":c_posted_at", ":c_id"]
+        # Every sort column is descending, so one row comparison resumes after the cursor
+        where.append(f"({', '.join(sort)}) < ({', '.join(bounds)})")
 
+    rank_sql = f", {RANK_SQL} AS rank" if query else ""
+    params["limit"] = per_page + 1
     rows = db.execute(text(
-        f"SELECT id, title, company, location, description, apply_url, posted_at, source, external_id {rank_sql} "
-        f"FROM jobs WHERE {where_sql} {order} LIMIT :limit OFFSET :offset"
+        f"SELECT {JOB_COLUMNS}{rank_sql} FROM jobs WHERE {' AND '.join(where)} "
+        f"ORDER BY {', '.join(f'{column} DESC' for column in sort)} LIMIT :limit"
     ), params).mappings().all()
 
-    return SearchResult(total=total, page=page, per_page=per_page, items=[JobOut(**dict(r)) for r in rows])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        posted_at = last["posted_at"]
+        next_cursor = encode_cursor(
+            *([last["rank"]] if query else []),
+            posted_at.isoformat() if isinstance(posted_at, datetime) else posted_at,
+            last["id"]
+        )
+
+    return SearchResult(
+        total=total, total_is_estimate=is_estimate, per_page=per_page,
+        next_cursor=next_cursor, items=[JobOut(**dict(r)) for r in rows]
+    )
+
+@router.get("/suggest", response_model=list[Suggestion])
+def suggest_jobs(
+    q: str = Query(min_length=1),
+    kind: Literal["title", "company", "location"] | None = None,
+    limit: int = Query(default=8, ge=1, le=20),
+):
+    """Titles, companies and locations starting with ``q``, most posted first.
+
+    Served from an in-memory prefix index that picks up newly ingested jobs
+    every ``job_suggest_refresh_seconds``.
+    """
+    suggest_index.maybe_refresh()
+    return [Suggestion(kind=k, text=t, count=n) for k, t, n in suggest_index.suggest(q, kind, limit)]
 
 @router.get("/{job_id}", response_model=JobOut)
 def get_job(job_id: int, db: Session = Depends(get_db)):
     row = db.execute(text(
-        "SELECT id, title, company, location, description, apply_url, posted_at, source, external_id FROM jobs WHERE id=:id"
+        f"SELECT {JOB_COLUMNS} FROM jobs WHERE id=:id"
     ), {"id": job_id}).mappings().first()
     if not row:
-        from fastapi import HTTPException
         raise HTTPException(404, "Job not found")
     return JobOut(**row)
@@ -5,6 +5,7 @@ from .habit import Habit, HabitCreate, HabitUpdate, HabitSummary
 from .event import Event, EventCreate
 from .reminder import Reminder, ReminderCreate
 from .insights import WeeklyInsights, AtRiskHabit
+from .job import JobOut, SearchResult, Suggestion
 
 __all__ = [
     "User",
@@ -19,4 +20,7 @@ __all__ = [
     "ReminderCreate",
     "WeeklyInsights",
     "AtRiskHabit",
+    "JobOut",
+    "SearchResult",
+    "Suggestion",
 ]
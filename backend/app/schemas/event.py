@@ -1,8 +1,8 @@
 """Event schemas."""
 
 from datetime import datetime
-from typing import Optional, Any, Dict
-from pydantic import BaseModel
+from typing import Optional, Any, Dict, List
+from pydantic import BaseModel, Field
 import uuid
 
 
@@ -12,6 +12,26 @@ class EventCreate(BaseModel):
     payload: Optional[Dict[str, Any]] = None
 
 
+class EventBatchItem(EventCreate):
+    """Schema for one event in a batch upload."""
+    habit_id: uuid.UUID
+    type: str = Field(..., pattern="^(checkin|miss)$")
+    idempotency_key: Optional[str] = Field(None, max_length=128)
+
+
+class EventBatchCreate(BaseModel):
+    """Schema for a batch of events, e.g. an offline sync."""
+    events: List[EventBatchItem] = Field(..., min_length=1, max_length=5000)
+
+
+class EventBatchResult(BaseModel):
+    """Schema for the outcome of a batch upload."""
+    received: int
+    inserted: int
+    duplicates: int
+    event_ids: List[uuid.UUID]
+
+
 class Event(BaseModel):
     """Schema for event."""
     id: uuid.UUID
@@ -22,4 +42,9 @@ class Event(BaseModel):
     payload: Optional[Dict[str, Any]] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class EventPage(BaseModel):
+    """Schema for a keyset-paginated page of events."""
+    items: List[Event]
+    next_cursor: Optional[str] = None
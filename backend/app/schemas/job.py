@@ -1,3 +1,5 @@
+"""Job search schemas."""
+
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
@@ -13,8 +15,14 @@ class JobOut(BaseModel):
     source: str
     external_id: Optional[str] = None
 
+class Suggestion(BaseModel):
+    kind: str  # title, company or location
+    text: str
+    count: int  # Postings using it
+
 class SearchResult(BaseModel):
     total: int
-    page: int
+    total_is_estimate: bool = False  # From planner statistics (count=estimate)
     per_page: int
+    next_cursor: Optional[str] = None  # Pass back as ``cursor`` for the next page
     items: List[JobOut]
@@ -0,0 +1,113 @@
+"""Benchmark memory use of the streaming event export.
+
+Seeds one habit with N events, then streams exports of increasing size and
+reports the peak RSS growth while each export runs. With a server-side
+cursor the growth should stay flat as the number of events grows.
+"""
+
+import argparse
+import os
+import resource
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import Base
+from app.models import *
+from app.services.event_export import iter_event_rows, ndjson_lines, csv_lines
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """Resident set size in bytes (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def seed(db: Session, events: int, chunk_size: int = 10000):
+    """Create a user and habit with ``events`` checkins, one per minute."""
+    user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com")
+    db.add(user)
+    db.flush()
+    habit = Habit(
+        user_id=user.id, title="Export benchmark", schedule_json={"type": "daily"},
+        goal_type="check", timezone="UTC"
+    )
+    db.add(habit)
+    db.commit()
+
+    start = datetime(2020, 1, 1)
+    for i in range(0, events, chunk_size):
+        db.execute(insert(Event), [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user.id,
+                "habit_id": habit.id,
+                "type": "checkin",
+                "ts": start + timedelta(minutes=n),
+                "payload": {"n": n}
+            }
+            for n in range(i, min(i + chunk_size, events))
+        ])
+        db.commit()
+
+    return habit.id
+
+
+def measure(bind, habit_id, limit_to: datetime, fmt: str):
+    """Stream an export up to ``limit_to`` and return (rows, bytes, seconds, peak RSS growth)."""
+    db = Session(bind=bind)
+    baseline = peak = current_rss()
+    rows = size = 0
+    started = time.perf_counter()
+
+    try:
+        lines = iter_event_rows(db, habit_id, to_date=limit_to)
+        chunks = csv_lines(lines) if fmt == "csv" else ndjson_lines(lines)
+        for i, chunk in enumerate(chunks):
+            size += len(chunk)
+            rows += chunk.count("\n")
+            if i % 1000 == 0:
+                peak = max(peak, current_rss())
+    finally:
+        db.close()
+
+    return rows, size, time.perf_counter() - started, max(peak, current_rss()) - baseline
+
+
+def run(url: str, events: int, fmt: str):
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+
+    db = Session(bind=engine)
+    print(f"Seeding {events} events...")
+    habit_id = seed(db, events)
+    db.close()
+
+    start = datetime(2020, 1, 1)
+    print(f"{'events':>10} {'MB out':>8} {'seconds':>8} {'rows/s':>10} {'RSS +MB':>8}")
+    for fraction in (0.01, 0.1, 1.0):
+        count = max(1, int(events * fraction))
+        rows, size, seconds, rss = measure(engine, habit_id, start + timedelta(minutes=count - 1), fmt)
+        print(
+            f"{count:>10} {size / 1e6:>8.1f} {seconds:>8.2f} "
+            f"{rows / seconds:>10.0f} {rss / 1e6:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark streaming event export memory")
+    parser.add_argument("--url", default=settings.postgres_url, help="Database URL (created if empty)")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    run(args.url, args.events, args.format)
@@ -0,0 +1,93 @@
+"""Benchmark the job search index against the per-request list scan.
+
+Builds synthetic listings shaped like ENHANCED_INTERNSHIPS and times the
+Flask APIs' old scan (lowercasing every field of every job per query)
+against JobIndex lookups. Match counts differ slightly: the scan matches
+substrings anywhere ("ai" in "maintain"), the index matches word prefixes.
+
+    python -m app.scripts.bench_job_index --listings 100000
+"""
+
+import argparse
+import random
+import time
+
+from app.utils.job_index import JobIndex, location_terms
+
+TITLES = ["Software Engineering", "Backend", "Frontend", "Full Stack", "Machine Learning", "Data Science",
+          "Data Engineering", "Mobile", "Security", "Site Reliability", "Product Design", "Research"]
+COMPANIES = ["Google", "Microsoft", "Amazon", "Meta", "Netflix", "Airbnb", "Apple", "Stripe", "Uber", "Spotify",
+             "Pinterest", "Palantir", "Tesla", "OpenAI", "Shopify", "Square", "Salesforce", "LinkedIn"]
+PLACES = ["Mountain View, CA", "Seattle, WA", "Menlo Park, CA", "San Francisco, CA", "New York, NY", "Austin, TX",
+          "Boston, MA", "Chicago, IL", "Denver, CO", "Los Angeles, CA", "Atlanta, GA", "Remote"]
+WORDS = ("build scalable systems services data pipelines cloud infrastructure real-time models research users "
+         "millions mobile applications payments security analytics platform distributed teams python react "
+         "kubernetes experiments recommendations search storage networking compilers").split()
+QUERIES = [
+    ("software engineer", "California"), ("data", ""), ("machine learning", "new york"), ("", "TX"),
+    ("backend", "Seattle, WA"), ("kubernetes python", ""), ("stripe payments", "san francisco"),
+]
+
+
+def make_listings(count: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "title": f"{rng.choice(TITLES)} Intern",
+            "company": rng.choice(COMPANIES),
+            "location": rng.choice(PLACES),
+            "type": f"{rng.choice(['Summer', 'Fall', 'Spring'])} 2024",
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(12, 30))).capitalize() + ".",
+            "category": rng.choice(TITLES).lower().replace(" ", "-"),
+        }
+        for i in range(count)
+    ]
+
+
+def scan(listings, keyword: str, location: str):
+    """The Flask APIs' search loop."""
+    keyword, terms = keyword.lower(), location_terms(location)
+    return [
+        job for job in listings
+        if (keyword in job["title"].lower() or keyword in job["description"].lower()
+            or keyword in job["category"].lower() or keyword in job["company"].lower())
+        and (not terms or any(term in job["location"].lower() for term in terms))
+    ]
+
+
+def best_of(fn, repeat: int) -> float:
+    """Best-of-``repeat`` milliseconds for one call."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(listings: int, repeat: int, seed: int):
+    data = make_listings(listings, seed)
+    started = time.perf_counter()
+    index = JobIndex(data)
+    print(f"{listings} listings, index built in {time.perf_counter() - started:.2f}s "
+          f"(ms per query; the index ranks the best 20)")
+    print(f"  {'query':<36}{'scan':>9}{'index':>9}{'speedup':>9}{'matches (scan/index)':>24}")
+
+    for keyword, location in QUERIES:
+        terms = location_terms(location)
+        scanned = best_of(lambda: scan(data, keyword, location), repeat)
+        indexed = best_of(lambda: index.search(keyword, terms, limit=20), repeat)
+        matches = f"{len(scan(data, keyword, location))}/{index.search(keyword, terms, limit=0)[0]}"
+        label = f"{keyword!r} in {location!r}"
+        print(f"  {label:<36}{scanned:9.2f}{indexed:9.2f}{scanned / indexed:8.1f}x{matches:>24}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the job search index against a list scan")
+    parser.add_argument("--listings", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args.listings, args.repeat, args.seed)
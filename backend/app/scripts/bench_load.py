@@ -0,0 +1,278 @@
+"""Concurrent load benchmark for the API.
+
+Runs N concurrent clients and reports throughput and latency percentiles
+per endpoint. Requests come either from ``--path`` (GETs against the given
+paths) or from ``--scenario``, where each client acts as one of the users
+seeded by ``seed_demo --bulk`` and mixes listing habits, checking in and
+reading insights. Scenario tokens are signed with the local ``jwt_secret``,
+so a remote server must share it and the database.
+
+With ``--in-process`` requests go straight to the ASGI app and the report
+includes SQL statements per request for each endpoint, counted with one
+extra sequential request each (concurrent requests can't be told apart).
+``--json`` saves the report; ``--baseline`` compares against a saved one
+and exits non-zero when an endpoint's p95 or query count regresses.
+
+    python -m app.scripts.seed_demo --bulk --users 200
+    python -m app.scripts.bench_load --scenario --in-process --clients 50 --json bench.json
+    python -m app.scripts.bench_load --clients 200 --path /habits/ --token <token>
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Endpoint name, method, path template and share of scenario requests
+SCENARIO = (
+    ("list_habits", "GET", "/habits/", 3),
+    ("checkin", "POST", "/habits/{habit_id}/checkin", 1),
+    ("completion_stats", "GET", "/insights/habits/{habit_id}/completion-stats", 2),
+    ("success_prediction", "GET", "/insights/habits/{habit_id}/success-prediction", 1),
+)
+
+
+@dataclass(frozen=True)
+class Call:
+    name: str
+    method: str
+    path: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Optional[Dict[str, Any]] = None
+
+
+class QueryCounter:
+    """Counts SQL statements executed on any engine while active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _before_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(Engine, "before_cursor_execute", self._before_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, "before_cursor_execute", self._before_execute)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def path_calls(paths: List[str], requests: int, token: Optional[str] = None) -> List[Call]:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return [Call(paths[i % len(paths)], "GET", paths[i % len(paths)], headers) for i in range(requests)]
+
+
+def scenario_users(db: Session, limit: int) -> List[Tuple[str, List]]:
+    """(access token, habit ids) for up to ``limit`` bulk-seeded users that have habits."""
+    from app.core.security import create_access_token
+    from app.models.habit import Habit
+    from app.models.user import User
+    from app.scripts.seed_demo import BENCH_EMAIL_DOMAIN
+
+    users = db.query(User.id).filter(
+        User.email.like(f"%@{BENCH_EMAIL_DOMAIN}")
+    ).order_by(User.email).limit(limit).all()
+
+    habits: Dict[Any, List] = {}
+    for habit_id, user_id in db.query(Habit.id, Habit.user_id).filter(
+        Habit.user_id.in_([user_id for (user_id,) in users])
+    ).order_by(Habit.id):
+        habits.setdefault(user_id, []).append(habit_id)
+
+    return [
+        (create_access_token({"sub": str(user_id)}), habits[user_id])
+        for (user_id,) in users if user_id in habits
+    ]
+
+
+def scenario_calls(token: str, habit_ids: List, requests: int, offset: int = 0) -> List[Call]:
+    """``requests`` calls cycling through the weighted scenario, rotating over the user's habits."""
+    headers = {"Authorization": f"Bearer {token}"}
+    mix = [(name, method, path) for name, method, path, weight in SCENARIO for _ in range(weight)]
+
+    calls = []
+    for i in range(offset, offset + requests):
+        name, method, path = mix[i % len(mix)]
+        habit_id = habit_ids[i // len(mix) % len(habit_ids)]
+        body = {"payload": {"source": "bench"}} if method == "POST" else None
+        calls.append(Call(name, method, path.format(habit_id=habit_id), headers, body))
+    return calls
+
+
+async def send(client: httpx.AsyncClient, call: Call) -> int:
+    try:
+        response = await client.request(call.method, call.path, headers=call.headers, json=call.body)
+        return response.status_code
+    except httpx.HTTPError:
+        return 0
+
+
+async def client_loop(client: httpx.AsyncClient, calls: List[Call],
+                      latencies: Dict[str, List[float]], errors: Dict[str, Dict[int, int]]):
+    for call in calls:
+        started = time.perf_counter()
+        status = await send(client, call)
+        latencies.setdefault(call.name, []).append((time.perf_counter() - started) * 1000)
+        if status != 200:
+            endpoint_errors = errors.setdefault(call.name, {})
+            endpoint_errors[status] = endpoint_errors.get(status, 0) + 1
+
+
+async def count_queries(client: httpx.AsyncClient, calls: List[List[Call]]) -> Dict[str, int]:
+    """SQL statements for one sequential request to each endpoint."""
+    queries = {}
+    for call in (call for client_calls in calls for call in client_calls):
+        if call.name not in queries:
+            with QueryCounter() as counter:
+                await send(client, call)
+            queries[call.name] = counter.count
+    return queries
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, Dict[int, int]],
+              elapsed: float, queries: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    def stats(samples: List[float], endpoint_errors: Dict[int, int]) -> Dict[str, Any]:
+        return {
+            "requests": len(samples),
+            "throughput": round(len(samples) / elapsed, 1),
+            "mean": round(statistics.mean(samples), 2),
+            **{f"p{pct}": round(percentile(samples, pct), 2) for pct in (50, 95, 99)},
+            "errors": {str(status): count for status, count in endpoint_errors.items()}
+        }
+
+    endpoints = {name: stats(samples, errors.get(name, {})) for name, samples in sorted(latencies.items())}
+    for name, count in (queries or {}).items():
+        endpoints[name]["queries"] = count
+
+    all_errors: Dict[int, int] = {}
+    for endpoint_errors in errors.values():
+        for status, count in endpoint_errors.items():
+            all_errors[status] = all_errors.get(status, 0) + count
+
+    return {
+        "elapsed": round(elapsed, 3),
+        "total": stats([sample for samples in latencies.values() for sample in samples], all_errors),
+        "endpoints": endpoints
+    }
+
+
+async def run(calls: List[List[Call]], base_url: str = "http://localhost:8000",
+              in_process: bool = False) -> Dict[str, Any]:
+    """Run each client's calls concurrently and summarize per endpoint."""
+    clients = len(calls)
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    transport = None
+    if in_process:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, Dict[int, int]] = {}
+
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=60) as client:
+        # Warm up connections and caches
+        warmup = {call.name: call for client_calls in calls for call in client_calls}
+        await asyncio.gather(*(send(client, call) for call in warmup.values()))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, client_calls, latencies, errors) for client_calls in calls))
+        elapsed = time.perf_counter() - started
+
+        queries = await count_queries(client, calls) if in_process else None
+
+    return summarize(latencies, errors, elapsed, queries)
+
+
+def print_report(report: Dict[str, Any], title: str):
+    print(title)
+    print(f"  {'endpoint':<20} {'reqs':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+    for name, stats in [*report["endpoints"].items(), ("total", report["total"])]:
+        print(
+            f"  {name:<20} {stats['requests']:>6} {stats['throughput']:>8.0f} "
+            f"{stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f} {stats.get('queries', '-'):>8}"
+        )
+        if stats["errors"]:
+            print(f"  {'':<20} errors: {stats['errors']}")
+
+
+def regressions(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float,
+                min_delta_ms: float = 1.0) -> List[str]:
+    """Endpoints whose p95 grew by more than ``max_regression`` (and ``min_delta_ms``) or that run more queries."""
+    found = []
+    for name, stats in report["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if base is None:
+            continue
+        if stats["p95"] > base["p95"] * (1 + max_regression) and stats["p95"] - base["p95"] > min_delta_ms:
+            found.append(f"{name}: p95 {base['p95']:.1f} ms -> {stats['p95']:.1f} ms")
+        if "queries" in stats and "queries" in base and stats["queries"] > base["queries"]:
+            found.append(f"{name}: queries {base['queries']} -> {stats['queries']}")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API latency under concurrent load")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", help="GET path to hit; repeat for several")
+    parser.add_argument("--scenario", action="store_true", help="Act as bulk-seeded users (seed_demo --bulk)")
+    parser.add_argument("--in-process", action="store_true", help="Call the ASGI app directly and count queries")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--token", help="Bearer token for authenticated routes")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed p95 growth, as a fraction")
+    args = parser.parse_args()
+
+    if args.scenario:
+        from app.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            users = scenario_users(db, args.clients)
+        finally:
+            db.close()
+        if not users:
+            print("❌ No benchmark users found; run python -m app.scripts.seed_demo --bulk first")
+            sys.exit(1)
+        calls = [
+            scenario_calls(*users[i % len(users)], args.requests, offset=i)
+            for i in range(args.clients)
+        ]
+    else:
+        calls = [path_calls(args.path or ["/habits/"], args.requests, args.token) for _ in range(args.clients)]
+
+    report = asyncio.run(run(calls, args.base_url, args.in_process))
+    target = "the in-process app" if args.in_process else args.base_url
+    print_report(report, f"{args.clients} clients x {args.requests} requests against {target} (ms)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.max_regression)
+        if found:
+            print("\n❌ Regressions against baseline:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
@@ -0,0 +1,90 @@
+"""Micro-benchmark for prediction feature extraction.
+
+Builds synthetic completion histories and times the per-metric Python
+helpers (each re-parsing the completion list, as predict_success used to)
+against parsing once and extracting every feature from a datetime64 array.
+
+    python -m app.scripts.bench_prediction_features --completions 10000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.services.completion_features import extract_features, to_datetime64
+from app.services.prediction_service import _parse_all, parse_completed_at
+
+
+def make_history(completions: int, now: datetime, seed: int):
+    """Completions spread over roughly one per 3 hours, most recent first."""
+    rng = random.Random(seed)
+    ts, history = now, []
+    for _ in range(completions):
+        ts -= timedelta(minutes=rng.randint(1, 360))
+        history.append({"completed_at": ts.isoformat() + "Z"})
+    return history
+
+
+def recent(completions, days, now):
+    cutoff = now - timedelta(days=days)
+    return [c for c in completions if (ts := parse_completed_at(c)) is not None and ts >= cutoff]
+
+
+def legacy_features(completions, now):
+    """Per-metric passes over the raw completions, parsing in each one."""
+    dates = {ts.date() for ts in _parse_all(completions)}
+    streak = 0
+    while now.date() - timedelta(days=streak) in dates:
+        streak += 1
+    consistency = round(len({ts.date() for ts in _parse_all(recent(completions, 30, now))}) / 30, 3)
+    recent_7 = len(recent(completions, 7, now))
+    return len(_parse_all(completions)), streak, consistency, recent_7
+
+
+def vectorized_features(completions, now):
+    features = extract_features(to_datetime64(_parse_all(completions)), now)
+    return features.total, features.current_streak, features.consistency_30, features.recent_7
+
+
+def bench(fn, histories, now, repeat: int) -> float:
+    """Best-of-``repeat`` mean milliseconds per history."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for history in histories:
+            fn(history, now)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000 / len(histories)
+
+
+def run(completions: int, histories: int, repeat: int):
+    now = datetime.utcnow()
+    data = [make_history(completions, now, seed) for seed in range(histories)]
+
+    for history in data:
+        if legacy_features(history, now) != vectorized_features(history, now):
+            print(f"❌ Feature mismatch: {legacy_features(history, now)} != {vectorized_features(history, now)}")
+            return
+
+    parse_only = bench(lambda history, _: _parse_all(history), data, now, repeat)
+    legacy = bench(legacy_features, data, now, repeat)
+    vectorized = bench(vectorized_features, data, now, repeat)
+    array = [to_datetime64(_parse_all(history)) for history in data]
+    features_only = bench(extract_features, array, now, repeat)
+
+    print(f"{histories} histories x {completions} completions (ms per history)")
+    print(f"  parse once:              {parse_only:8.2f}")
+    print(f"  per-metric passes:       {legacy:8.2f}")
+    print(f"  parse + vectorized:      {vectorized:8.2f}  ({legacy / vectorized:.1f}x)")
+    print(f"  features from datetime64:{features_only:8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark prediction feature extraction")
+    parser.add_argument("--completions", type=int, default=10_000)
+    parser.add_argument("--histories", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.completions, args.histories, args.repeat)
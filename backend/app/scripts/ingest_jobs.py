@@ -0,0 +1,53 @@
+"""Bulk-load scraped jobs from NDJSON files (or stdin) into the jobs table.
+
+    python -m app.scripts.ingest_jobs crawl-*.ndjson --batch-size 10000
+    python scraper.py | python -m app.scripts.ingest_jobs - --source indeed
+"""
+
+import argparse
+import sys
+
+from app.db.session import SessionLocal
+from app.services.job_ingest import IngestStats, JobIngestor
+
+
+def ingest_jobs(paths, batch_size: int = 10000, source: str = None) -> IngestStats:
+    """Upsert every job in ``paths`` ("-" reads stdin) and report throughput."""
+    db = SessionLocal()
+    total = IngestStats()
+
+    try:
+        ingestor = JobIngestor(db, batch_size=batch_size, default_source=source)
+        for path in paths:
+            if path == "-":
+                stats = ingestor.ingest_lines(sys.stdin)
+            else:
+                with open(path, encoding="utf-8") as f:
+                    stats = ingestor.ingest_lines(f)
+
+            print(f"{path}: {stats.received} received, {stats.written} written, "
+                  f"{stats.duplicates} duplicates, {stats.invalid} invalid "
+                  f"in {stats.seconds:.1f}s ({stats.rows_per_second:.0f} rows/s)")
+            for field in ("received", "invalid", "duplicates", "written", "seconds"):
+                setattr(total, field, getattr(total, field) + getattr(stats, field))
+
+        print(f"\n✅ Ingested {total.received} jobs, {total.written} new or changed "
+              f"({total.rows_per_second:.0f} rows/s)")
+        return total
+
+    except Exception as e:
+        print(f"❌ Error ingesting jobs: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load scraped jobs from NDJSON")
+    parser.add_argument("paths", nargs="+", help="NDJSON files; - for stdin")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--source", help="Source for records that don't name one")
+    args = parser.parse_args()
+
+    ingest_jobs(args.paths, args.batch_size, args.source)
@@ -0,0 +1,62 @@
+"""Backfill normalized location columns (loc_city, loc_state, loc_remote) on jobs.
+
+New jobs get them at ingest; run this once after migration 0012, and after
+any import that writes jobs directly.
+"""
+
+import argparse
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.utils.geo import normalize_location
+
+
+def normalize_pending(db: Session, chunk_size: int = 5000) -> int:
+    """Parse the location of every job not normalized yet; returns how many were updated."""
+    updated, last_id = 0, None
+    while True:
+        rows = db.execute(text(
+            "SELECT id, location FROM jobs WHERE loc_remote IS NULL"
+            + (" AND id > :last_id" if last_id is not None else "")
+            + " ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": chunk_size}).all()
+        if not rows:
+            return updated
+
+        params = []
+        for job_id, location in rows:
+            parsed = normalize_location(location)
+            params.append({"id": job_id, "city": parsed.city, "state": parsed.state, "remote": parsed.remote})
+        db.execute(text(
+            "UPDATE jobs SET loc_city = :city, loc_state = :state, loc_remote = :remote WHERE id = :id"
+        ), params)
+        db.commit()
+
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+
+def normalize_job_locations(chunk_size: int = 5000):
+    """Backfill normalized job locations."""
+    db = SessionLocal()
+
+    try:
+        updated = normalize_pending(db, chunk_size)
+        print(f"\n✅ Normalized locations of {updated} jobs")
+
+    except Exception as e:
+        print(f"❌ Error normalizing job locations: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill normalized job locations")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    normalize_job_locations(args.chunk_size)
@@ -0,0 +1,51 @@
+"""Rebuild event projections from scratch, or catch up tailed projections."""
+
+import argparse
+
+from app.db.session import SessionLocal
+from app.models.event_archive import EventArchive
+from app.services.projection_service import ProjectionRunner, DEFAULT_PROJECTORS
+
+
+def rebuild_projections(names=None, partitions: int = 4, batch_size: int = 1000, force: bool = False):
+    """Reset and replay the named projections (all when omitted)."""
+    db = SessionLocal()
+
+    try:
+        # Archived months are gone from events, so a rebuild would drop them from projections
+        archived = db.query(EventArchive.month).distinct().count()
+        if archived and not force:
+            print(f"❌ {archived} months of events are archived and would be lost from projections; use --force")
+            return
+
+        runner = ProjectionRunner(db)
+        for name in names or [projector.name for projector in DEFAULT_PROJECTORS]:
+            count = runner.rebuild(name, partitions=partitions, batch_size=batch_size)
+            print(f"Rebuilt {name} from {count} events")
+
+        # Pick up anything written while the rebuild was running
+        processed = runner.run(batch_size=batch_size)
+        print(f"\n✅ Projections rebuilt, caught up: {processed}")
+
+    except Exception as e:
+        print(f"❌ Error rebuilding projections: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild event projections")
+    parser.add_argument(
+        "--projection",
+        action="append",
+        choices=[projector.name for projector in DEFAULT_PROJECTORS],
+        help="Projection to rebuild; repeat for several (default: all)"
+    )
+    parser.add_argument("--partitions", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if old events were archived")
+    args = parser.parse_args()
+
+    rebuild_projections(args.projection, args.partitions, args.batch_size, args.force)
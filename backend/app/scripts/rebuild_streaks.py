@@ -0,0 +1,63 @@
+"""Rebuild materialized streaks and rollups by replaying the events table."""
+
+import argparse
+import uuid
+
+from app.db.session import SessionLocal
+from app.models.habit import Habit
+from app.services.streak_service import StreakService
+from app.services.rollup_service import RollupService
+
+
+def rebuild_streaks(user_id: uuid.UUID = None, habit_id: uuid.UUID = None, chunk_size: int = 500):
+    """Rebuild streaks and rollups for all habits, or a single user's / habit's.
+
+    Habits created before the last archived month keep their streaks and rollups.
+    """
+    db = SessionLocal()
+
+    try:
+        query = db.query(Habit).order_by(Habit.id)
+        if user_id:
+            query = query.filter(Habit.user_id == user_id)
+        if habit_id:
+            query = query.filter(Habit.id == habit_id)
+
+        streak_service = StreakService(db)
+        rollup_service = RollupService(db)
+        total = 0
+        last_id = None
+
+        # Walk habits in keyset-ordered chunks so each replay stays bounded
+        while True:
+            chunk_query = query
+            if last_id is not None:
+                chunk_query = chunk_query.filter(Habit.id > last_id)
+            habits = chunk_query.limit(chunk_size).all()
+            if not habits:
+                break
+
+            total += streak_service.rebuild_all(habits)
+            rollup_service.rebuild_all(habits)
+            last_id = habits[-1].id
+            db.expunge_all()
+            print(f"Rebuilt streaks and rollups for {total} habits")
+
+        print(f"\n✅ Rebuilt streaks and rollups for {total} habits")
+
+    except Exception as e:
+        print(f"❌ Error rebuilding streaks: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild habit streaks and rollups from events")
+    parser.add_argument("--user-id", type=uuid.UUID)
+    parser.add_argument("--habit-id", type=uuid.UUID)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    rebuild_streaks(args.user_id, args.habit_id, args.chunk_size)
@@ -1,8 +1,18 @@
-"""Seed script for demo data."""
+"""Seed script for demo data.
 
+Without arguments, seeds one demo user with three habits. ``--bulk`` seeds
+synthetic benchmark users at a configurable scale instead, e.g.
+
+    python -m app.scripts.seed_demo --bulk --users 1000 --habits-per-user 5 --days 90
+"""
+
+import argparse
+import random
 import uuid
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
 from decimal import Decimal
+from typing import Dict
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
@@ -12,6 +22,18 @@ from app.models.event import Event
 from app.models.reminder import Reminder
 from app.models.experiment import Experiment
 from app.services.streak_service import StreakService
+from app.services.rollup_service import RollupService
+from app.services.projection_service import ProjectionRunner
+from app.services.schedule_engine import compile_schedule
+from app.utils.timezones import get_zone
+
+BENCH_EMAIL_DOMAIN = "bench.habitloop.local"
+BENCH_SCHEDULES = (
+    {"type": "daily"},
+    {"type": "weekly", "days": [1, 3, 5]},
+    {"type": "times_per_week", "count": 4},
+)
+BENCH_TIMEZONES = ("UTC", "America/Chicago", "Europe/Berlin", "Asia/Tokyo")
 
 
 def seed_demo_data():
@@ -110,7 +132,7 @@ def seed_demo_data():
                 event_date = date.today() - timedelta(days=days_ago)
                 
                 # Check if habit is due on this date
-                if is_habit_due_on_date(habit, event_date):
+                if compile_schedule(habit.schedule_json).due_on(event_date):
                     # 70% chance of completion
                     if (days_ago + habit.id.int % 3) % 3 != 0:  # Pseudo-random but consistent
                         # Create checkin event
@@ -133,8 +155,10 @@ def seed_demo_data():
                         )
                         db.add(event)
             
-            # Update streak for this habit
+            # Rebuild streak and rollups for this habit from the generated events
+            db.flush()
             streak_service.update_streak(habit)
+            RollupService(db).rebuild_all([habit])
         
         db.commit()
         print("Generated 21 days of events and updated streaks")
@@ -165,22 +189,131 @@ def seed_demo_data():
         db.close()
 
 
-def is_habit_due_on_date(habit, check_date):
-    """Check if habit is due on a specific date."""
-    schedule = habit.schedule_json
-    
-    if schedule.get("type") == "daily":
-        return True
-    elif schedule.get("type") == "weekly":
-        days = schedule.get("days", [])
-        weekday = check_date.weekday() + 1  # Monday = 1, Sunday = 7
-        return weekday in days
-    elif schedule.get("type") == "times_per_week":
-        # For simplicity, assume every other day
-        return check_date.day % 2 == 0
-    
-    return False
+def seed_bulk(
+    db: Session,
+    users: int,
+    habits_per_user: int,
+    days: int,
+    seed: int = 0,
+    chunk_size: int = 5000
+) -> Dict[str, int]:
+    """Bulk-insert synthetic users, habits and ``days`` of events, then project them.
+
+    Users are ``bench-<n>@bench.habitloop.local`` and are appended after any
+    existing ones, so repeated runs grow the dataset. Each habit gets its own
+    completion rate and usual checkin hour, and a checkin or miss on each of
+    its due days. The same ``seed`` gives the same schedules and history.
+    """
+    rng = random.Random(seed)
+    offset = db.query(func.count(User.id)).filter(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}")).scalar()
+    today = date.today()
+    counts = {"users": 0, "habits": 0, "events": 0}
+
+    user_rows, habit_rows, event_rows = [], [], []
+    habit_ids = []
+
+    def flush():
+        # Parents first, so foreign keys hold at every chunk boundary
+        for model, rows in ((User, user_rows), (Habit, habit_rows), (Event, event_rows)):
+            if rows:
+                db.execute(insert(model), rows)
+                rows.clear()
+        db.commit()
+
+    for n in range(offset, offset + users):
+        user_id = uuid.uuid4()
+        user_rows.append({
+            "id": user_id,
+            "email": f"bench-{n:06d}@{BENCH_EMAIL_DOMAIN}",
+            "name": f"Bench User {n}",
+            "is_active": True,
+            "data_version": 0,
+            "created_at": datetime.utcnow()
+        })
+
+        for h in range(habits_per_user):
+            habit_id = uuid.uuid4()
+            habit_ids.append(habit_id)
+            schedule = BENCH_SCHEDULES[rng.randrange(len(BENCH_SCHEDULES))]
+            tz_name = BENCH_TIMEZONES[rng.randrange(len(BENCH_TIMEZONES))]
+            habit_rows.append({
+                "id": habit_id,
+                "user_id": user_id,
+                "title": f"Bench habit {h}",
+                "schedule_json": schedule,
+                "goal_type": "check",
+                "grace_per_week": 1,
+                "timezone": tz_name,
+                "created_at": datetime.utcnow() - timedelta(days=days)
+            })
+
+            zone = get_zone(tz_name)
+            compiled = compile_schedule(schedule)
+            rate = rng.uniform(0.3, 0.95)
+            hour = rng.randint(6, 21)
+            for days_ago in range(days, 0, -1):
+                day = today - timedelta(days=days_ago)
+                if not compiled.due_on(day):
+                    continue
+                local = datetime.combine(day, datetime.min.time()).replace(
+                    hour=hour, minute=rng.randrange(60), tzinfo=zone
+                )
+                event_rows.append({
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "habit_id": habit_id,
+                    "type": "checkin" if rng.random() < rate else "miss",
+                    "ts": local.astimezone(timezone.utc).replace(tzinfo=None),
+                    "payload": {}
+                })
+                counts["events"] += 1
+
+        counts["users"] += 1
+        counts["habits"] += habits_per_user
+        if len(event_rows) >= chunk_size:
+            flush()
+
+    flush()
+
+    # Streaks and rollups for the new habits only: rebuilding every habit
+    # would replay just the retained events of ones with archived history
+    for i in range(0, len(habit_ids), 1000):
+        habits = db.query(Habit).filter(Habit.id.in_(habit_ids[i:i + 1000])).all()
+        StreakService(db).rebuild_all(habits)
+        RollupService(db).rebuild_all(habits)
+
+    # Tailed projections pick the new events up by recorded_at
+    ProjectionRunner(db, settle_seconds=0).run()
+    return counts
+
+
+def seed_bulk_data(users: int, habits_per_user: int, days: int, seed: int = 0):
+    """Seed benchmark data at scale."""
+    db = SessionLocal()
+
+    try:
+        counts = seed_bulk(db, users, habits_per_user, days, seed)
+        print(f"\n✅ Bulk data seeded: {counts['users']} users, {counts['habits']} habits, "
+              f"{counts['events']} events over {days} days")
+
+    except Exception as e:
+        print(f"❌ Error seeding bulk data: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
 
 if __name__ == "__main__":
-    seed_demo_data()
+    parser = argparse.ArgumentParser(description="Seed demo or benchmark data")
+    parser.add_argument("--bulk", action="store_true", help="Seed synthetic benchmark users instead of the demo user")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--habits-per-user", type=int, default=5)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.bulk:
+        seed_bulk_data(args.users, args.habits_per_user, args.days, args.seed)
+    else:
+        seed_demo_data()
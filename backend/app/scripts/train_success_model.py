@@ -0,0 +1,49 @@
+"""Train the habit success model and optionally score every habit with it."""
+
+import argparse
+import json
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.prediction_service import rule_based_probability
+from app.services.success_model import score_habits, train
+
+
+def train_success_model(model_dir: str, step_days: int = 7, test_fraction: float = 0.2,
+                        l2: float = 1.0, score: bool = False):
+    """Fit on all habit histories, save a new model version and report held-out metrics."""
+    db = SessionLocal()
+
+    try:
+        model = train(db, step_days=step_days, test_fraction=test_fraction, l2=l2,
+                      baseline=rule_based_probability)
+        path = model.save(model_dir)
+
+        print(f"Trained on {model.metrics['examples']} examples")
+        for name in ("test", "baseline_test"):
+            if name in model.metrics:
+                print(f"  {name}: {json.dumps(model.metrics[name])}")
+        print(f"\n✅ Saved model {model.version} to {path}")
+
+        if score:
+            scored = score_habits(db, model, chunk_size=settings.success_scoring_chunk_size)
+            print(f"✅ Scored {scored} habits")
+
+    except Exception as e:
+        print(f"❌ Error training success model: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the habit success model")
+    parser.add_argument("--model-dir", default=settings.success_model_dir)
+    parser.add_argument("--step-days", type=int, default=7, help="Days between training cutoffs per habit")
+    parser.add_argument("--test-fraction", type=float, default=0.2, help="Latest share of cutoffs held out")
+    parser.add_argument("--l2", type=float, default=1.0)
+    parser.add_argument("--score", action="store_true", help="Score every habit with the new model")
+    args = parser.parse_args()
+
+    train_success_model(args.model_dir, args.step_days, args.test_fraction, args.l2, args.score)
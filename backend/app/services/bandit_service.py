@@ -1,25 +1,107 @@
 """Contextual bandit service for reminder timing."""
 
 import logging
+import math
 import random
-from datetime import datetime, time
-from typing import Dict, List, Optional, Tuple
+import threading
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
 
 from app.models.habit import Habit
 from app.models.reminder import Reminder
 from app.models.event import Event
+from app.models.bandit_arm import BanditArm
 from app.core.config import settings
+from app.db.upsert import increment_counters
+from app.services.schedule_engine import compile_schedule, local_today
+from app.utils.timezones import to_local
 
 logger = logging.getLogger(__name__)
 
+ArmStats = Dict[int, Dict[str, int]]
+
+
+class ArmStatsBuffer:
+    """In-process write-behind buffer of arm stat increments.
+
+    Pulls and rewards are accumulated per (habit_id, hour) and written in
+    one batched upsert, so selecting hours for thousands of habits does not
+    cost a write per habit. Pending deltas are merged into reads.
+    """
+    
+    def __init__(self, flush_size: int):
+        self.flush_size = flush_size
+        self._pending: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+        self._lock = threading.Lock()
+    
+    def add(self, habit_id, hour: int, pulls: int = 0, successes: int = 0) -> bool:
+        """Buffer an increment; returns True once the buffer should be flushed."""
+        with self._lock:
+            delta = self._pending[(habit_id, hour)]
+            delta[0] += pulls
+            delta[1] += successes
+            return len(self._pending) >= self.flush_size
+    
+    def pending_for(self, habit_ids: Iterable) -> Dict[Tuple, List[int]]:
+        """Snapshot of buffered deltas for the given habits."""
+        habit_ids = set(habit_ids)
+        with self._lock:
+            return {
+                key: list(delta) for key, delta in self._pending.items()
+                if key[0] in habit_ids
+            }
+    
+    def flush(self, db: Session) -> int:
+        """Write all buffered increments with a single atomic upsert.
+        
+        The upsert runs on its own session bound to ``db``'s engine, so it
+        never commits or rolls back the caller's transaction.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: [0, 0])
+        
+        if not pending:
+            return 0
+        
+        now = datetime.utcnow()
+        rows = [
+            {"habit_id": habit_id, "hour": hour, "pulls": pulls, "successes": successes, "updated_at": now}
+            for (habit_id, hour), (pulls, successes) in pending.items()
+        ]
+        
+        session = Session(bind=db.get_bind())
+        try:
+            increment_counters(session, BanditArm, ("habit_id", "hour"), ("pulls", "successes"), rows)
+            session.commit()
+        except Exception:
+            session.rollback()
+            # Put the deltas back so they are retried on the next flush
+            with self._lock:
+                for key, (pulls, successes) in pending.items():
+                    delta = self._pending[key]
+                    delta[0] += pulls
+                    delta[1] += successes
+            raise
+        finally:
+            session.close()
+        
+        logger.info(f"Flushed {len(rows)} bandit arm updates")
+        return len(rows)
+
+
+arm_stats_buffer = ArmStatsBuffer(settings.bandit_flush_size)
+
 
 class BanditService:
     """Contextual bandit service for optimizing reminder timing."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, strategy: Optional[str] = None, buffer: Optional[ArmStatsBuffer] = None):
         self.db = db
         self.epsilon = settings.bandit_epsilon
+        self.strategy = strategy or settings.bandit_strategy
+        self.buffer = buffer or arm_stats_buffer
     
     def get_candidate_hours(self, reminder: Reminder) -> List[int]:
         """Get candidate hours for reminder within the window."""
@@ -44,61 +126,151 @@ class BanditService:
         
         return hours
     
-    def choose_hour(self, habit: Habit, reminder: Reminder) -> int:
-        """Choose optimal hour for reminder using ε-greedy bandit."""
-        candidate_hours = self.get_candidate_hours(reminder)
+    def choose_hour(self, habit: Habit, reminder: Reminder, arm_stats: Optional[ArmStats] = None,
+                    candidate_hours: Optional[List[int]] = None, record_pull: bool = True) -> int:
+        """Choose optimal hour for reminder using the configured bandit strategy.
+        
+        ``candidate_hours`` overrides the hours derived from the reminder window.
+        Callers that record the pull once the reminder is sent pass
+        ``record_pull=False``.
+        """
+        if candidate_hours is None:
+            candidate_hours = self.get_candidate_hours(reminder)
         
         if not candidate_hours:
             # Fallback to default
             return reminder.window.get("start_hour", 9)
         
         # Get arm stats for this habit
-        arm_stats = self._get_arm_stats(habit.id)
+        if arm_stats is None:
+            arm_stats = self._get_arm_stats(habit.id)
         
-        # ε-greedy selection
-        if random.random() < self.epsilon:
+        if self.strategy == "thompson":
+            chosen_hour = self._thompson_hour(arm_stats, candidate_hours)
+        elif self.strategy == "ucb":
+            chosen_hour = self._ucb_hour(arm_stats, candidate_hours)
+        elif random.random() < self.epsilon:
             # Explore: choose random hour
             chosen_hour = random.choice(candidate_hours)
-            logger.info(f"Exploring: chose hour {chosen_hour} for habit {habit.id}")
+            logger.debug(f"Exploring: chose hour {chosen_hour} for habit {habit.id}")
         else:
             # Exploit: choose best hour based on success rate
             best_hour = self._get_best_hour(arm_stats, candidate_hours)
             chosen_hour = best_hour if best_hour is not None else random.choice(candidate_hours)
-            logger.info(f"Exploiting: chose hour {chosen_hour} for habit {habit.id}")
+            logger.debug(f"Exploiting: chose hour {chosen_hour} for habit {habit.id}")
         
-        # Update arm stats
-        self._update_arm_stats(habit.id, chosen_hour, 0)  # 0 = pull, not reward yet
+        if record_pull:
+            self._update_arm_stats(habit.id, chosen_hour, 0)  # 0 = pull, not reward yet
         
         return chosen_hour
     
-    def update_reward(self, habit: Habit, hour: int, reward: int):
-        """Update reward for a specific hour."""
-        self._update_arm_stats(habit.id, hour, reward)
+    def choose_hours(self, pairs: List[Tuple[Habit, Reminder]], candidates: Optional[Dict] = None,
+                     record_pulls: bool = True) -> Dict:
+        """Choose hours for many habits, loading all arm stats in one pass.
+        
+        ``candidates`` optionally maps habit ids to the hours they may use.
+        """
+        stats_by_habit = self.get_arm_stats_bulk([habit.id for habit, _ in pairs])
+        candidates = candidates or {}
+        
+        chosen = {
+            habit.id: self.choose_hour(
+                habit, reminder, stats_by_habit.get(habit.id, {}), candidates.get(habit.id), record_pulls
+            )
+            for habit, reminder in pairs
+        }
+        if record_pulls:
+            self.flush()
+        return chosen
+    
+    def record_pull(self, habit_id, hour: int):
+        """Record that a reminder was sent at ``hour`` for a habit."""
+        self._update_arm_stats(habit_id, hour, 0)
+    
+    def flush(self) -> int:
+        """Flush buffered arm stat increments to the database."""
+        return self.buffer.flush(self.db)
+    
+    def refresh_best_hours(self, habit_ids: List) -> int:
+        """Point ``Reminder.best_hour`` at each habit's best-rewarded candidate hour.
         
-        # Update best_hour if this hour is now the best
-        arm_stats = self._get_arm_stats(habit.id)
-        best_hour = self._get_best_hour(arm_stats, list(range(24)))
+        Called as rewards are credited; the caller commits.
+        """
+        reminders = self.db.query(Reminder).filter(Reminder.habit_id.in_(list(habit_ids))).all()
+        stats_by_habit = self.get_arm_stats_bulk([reminder.habit_id for reminder in reminders])
         
-        if best_hour is not None:
-            reminder = self.db.query(Reminder).filter(Reminder.habit_id == habit.id).first()
-            if reminder:
+        updated = 0
+        for reminder in reminders:
+            best_hour = self._get_best_hour(
+                stats_by_habit.get(reminder.habit_id, {}), self.get_candidate_hours(reminder)
+            )
+            if best_hour is not None and best_hour != reminder.best_hour:
                 reminder.best_hour = best_hour
-                self.db.commit()
-                logger.info(f"Updated best_hour to {best_hour} for habit {habit.id}")
+                updated += 1
+        return updated
     
-    def _get_arm_stats(self, habit_id: str) -> Dict[int, Dict[str, int]]:
+    def _get_arm_stats(self, habit_id) -> ArmStats:
         """Get arm statistics for a habit."""
-        # In a real implementation, this would be stored in the database
-        # For now, we'll use a simple in-memory approach
-        # TODO: Implement proper arm stats storage
-        return {}
-    
-    def _update_arm_stats(self, habit_id: str, hour: int, reward: int):
-        """Update arm statistics for a habit and hour."""
-        # In a real implementation, this would update the database
-        # For now, we'll use a simple in-memory approach
-        # TODO: Implement proper arm stats storage
-        pass
+        return self.get_arm_stats_bulk([habit_id]).get(habit_id, {})
+    
+    def get_arm_stats_bulk(self, habit_ids: List, chunk_size: int = 1000) -> Dict:
+        """Get arm statistics for many habits, including buffered increments."""
+        stats_by_habit: Dict = defaultdict(dict)
+        
+        for i in range(0, len(habit_ids), chunk_size):
+            chunk = habit_ids[i:i + chunk_size]
+            rows = self.db.query(
+                BanditArm.habit_id, BanditArm.hour, BanditArm.pulls, BanditArm.successes
+            ).filter(BanditArm.habit_id.in_(chunk)).all()
+            
+            for habit_id, hour, pulls, successes in rows:
+                stats_by_habit[habit_id][hour] = {"pulls": pulls, "successes": successes}
+        
+        for (habit_id, hour), (pulls, successes) in self.buffer.pending_for(habit_ids).items():
+            stats = stats_by_habit[habit_id].setdefault(hour, {"pulls": 0, "successes": 0})
+            stats["pulls"] += pulls
+            stats["successes"] += successes
+        
+        return stats_by_habit
+    
+    def _update_arm_stats(self, habit_id, hour: int, reward: int):
+        """Update arm statistics for a habit and hour.
+        
+        A reward of 0 records a pull; a positive reward records successes.
+        Increments are buffered and written behind in batches.
+        """
+        if reward:
+            should_flush = self.buffer.add(habit_id, hour, successes=reward)
+        else:
+            should_flush = self.buffer.add(habit_id, hour, pulls=1)
+        
+        if should_flush:
+            self.flush()
+    
+    def _thompson_hour(self, arm_stats: ArmStats, candidate_hours: List[int]) -> int:
+        """Sample each arm's Beta posterior and pick the highest draw."""
+        def draw(hour):
+            stats = arm_stats.get(hour, {"pulls": 0, "successes": 0})
+            successes = stats.get("successes", 0)
+            failures = max(stats.get("pulls", 0) - successes, 0)
+            return random.betavariate(successes + 1, failures + 1)
+        
+        return max(candidate_hours, key=draw)
+    
+    def _ucb_hour(self, arm_stats: ArmStats, candidate_hours: List[int]) -> int:
+        """Pick the arm with the highest UCB1 bound, trying unpulled arms first."""
+        untried = [h for h in candidate_hours if arm_stats.get(h, {}).get("pulls", 0) == 0]
+        if untried:
+            return random.choice(untried)
+        
+        total_pulls = sum(arm_stats[h]["pulls"] for h in candidate_hours)
+        
+        def bound(hour):
+            stats = arm_stats[hour]
+            mean = stats["successes"] / stats["pulls"]
+            return mean + math.sqrt(2 * math.log(total_pulls) / stats["pulls"])
+        
+        return max(candidate_hours, key=bound)
     
     def _get_best_hour(self, arm_stats: Dict[int, Dict[str, int]], candidate_hours: List[int]) -> Optional[int]:
         """Get the best hour based on success rate."""
@@ -119,45 +291,25 @@ class BanditService:
         return best_hour
     
     def calculate_completion_rate(self, habit: Habit, days: int = 7) -> float:
-        """Calculate completion rate for the last N days."""
-        from datetime import timedelta
-        
-        end_date = datetime.utcnow().date()
+        """Share of the habit's due days in the last N local days that got a checkin."""
+        schedule = compile_schedule(habit.schedule_json)
+        end_date = local_today(habit.timezone)
         start_date = end_date - timedelta(days=days)
         
-        # Count total due days
-        total_due = 0
-        check_date = start_date
-        while check_date <= end_date:
-            if self._is_habit_due_on_date(habit, check_date):
-                total_due += 1
-            check_date += timedelta(days=1)
-        
+        total_due = schedule.due_count(start_date, end_date)
         if total_due == 0:
             return 0.0
         
-        # Count completed days
-        completed = self.db.query(Event).filter(
+        # Checkins on distinct local due days; the UTC bounds pad a day for offsets
+        checkins = self.db.query(Event.ts).filter(
             Event.habit_id == habit.id,
             Event.type == "checkin",
-            Event.ts >= start_date,
-            Event.ts <= end_date
-        ).count()
-        
-        return completed / total_due
-    
-    def _is_habit_due_on_date(self, habit: Habit, check_date) -> bool:
-        """Check if habit is due on a specific date."""
-        schedule = habit.schedule_json
-        
-        if schedule.get("type") == "daily":
-            return True
-        elif schedule.get("type") == "weekly":
-            days = schedule.get("days", [])
-            weekday = check_date.weekday() + 1  # Monday = 1, Sunday = 7
-            return weekday in days
-        elif schedule.get("type") == "times_per_week":
-            # For simplicity, assume every other day
-            return check_date.day % 2 == 0
-        
-        return False
+            Event.ts >= datetime.combine(start_date - timedelta(days=1), time.min),
+            Event.ts < datetime.combine(end_date + timedelta(days=2), time.min)
+        )
+        completed = {
+            day for day in (to_local(ts, habit.timezone).date() for (ts,) in checkins)
+            if start_date <= day <= end_date and schedule.due_on(day)
+        }
+        
+        return len(completed) / total_due
@@ -0,0 +1,327 @@
+"""Monthly event partitions, and archival of events past retention.
+
+On PostgreSQL ``events`` is range-partitioned by month (migration 0011), so
+``ensure_partitions`` keeps a few future months created ahead of time and
+dropping an archived month is a cheap DETACH + DROP. The partition is locked
+against writes while it is exported, so a late event cannot land between
+the export and the drop. Without a partition, only the exported rows are
+deleted.
+
+A month is only archived once every tailed projection has consumed it, so
+the rollups, streaks and bandit rewards already summarize the dropped rows.
+Rebuilding a projection afterwards replays retained events only; streaks of
+habits with archived history are not rebuilt (see StreakService).
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.event import Event, EventIdempotencyKey
+from app.models.event_archive import EventArchive
+from app.models.projection_offset import ProjectionOffset
+from app.services.projection_service import DEFAULT_PROJECTORS
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = ("id", "user_id", "habit_id", "type", "ts", "payload", "idempotency_key")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"events_y{month:%Y}m{month:%m}"
+
+
+def _bounds(month: date) -> Tuple[datetime, datetime]:
+    return datetime.combine(month, time()), datetime.combine(add_months(month, 1), time())
+
+
+def is_partitioned(db: Session) -> bool:
+    """Whether ``events`` is a partitioned PostgreSQL table."""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    relkind = db.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('events')")).scalar()
+    return relkind == "p"
+
+
+def ensure_partitions(db: Session, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """Create monthly partitions from this month through ``months_ahead`` months out.
+
+    Returns the partitions created. A month whose rows already sit in the
+    default partition cannot be attached; that is logged and skipped.
+    """
+    if not is_partitioned(db):
+        return []
+
+    created = []
+    month = month_start(today or datetime.utcnow().date())
+    for _ in range(months_ahead + 1):
+        name = partition_name(month)
+        if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            start, end = _bounds(month)
+            try:
+                db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF events "
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d} 00:00:00+00') TO ('{end:%Y-%m-%d} 00:00:00+00')"
+                ))
+                db.commit()
+                created.append(name)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Could not create partition {name}: {e}")
+        month = add_months(month, 1)
+    return created
+
+
+class EventArchiver:
+    """Export months of events older than the retention window, then drop them.
+
+    Each month is written to ``archive_dir`` as gzipped NDJSON (or Parquet
+    when configured and pyarrow is installed), recorded in
+    ``event_archives`` with its row counts and SHA-256, and removed from
+    ``events`` in the same transaction as the record.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        archive_dir: Optional[str] = None,
+        retention_months: Optional[int] = None,
+        archive_format: Optional[str] = None,
+        chunk_size: int = 5000
+    ):
+        self.db = db
+        self.archive_dir = archive_dir or settings.event_archive_dir
+        self.retention_months = settings.event_retention_months if retention_months is None else retention_months
+        self.archive_format = archive_format or settings.event_archive_format
+        self.chunk_size = chunk_size
+
+    def cutoff(self, today: Optional[date] = None) -> date:
+        """First month that is kept."""
+        return add_months(month_start(today or datetime.utcnow().date()), -self.retention_months)
+
+    def due_months(self, today: Optional[date] = None) -> List[date]:
+        """Months before the cutoff that still hold events, oldest first."""
+        if self.retention_months <= 0:
+            return []
+
+        cutoff = self.cutoff(today)
+        first = self.db.query(func.min(Event.ts)).filter(Event.ts < _bounds(cutoff)[0]).scalar()
+        if first is None:
+            return []
+
+        months, month = [], month_start(first.date())
+        while month < cutoff:
+            months.append(month)
+            month = add_months(month, 1)
+        return months
+
+    def run(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Archive every due month, then prune idempotency keys older than the cutoff."""
+        archived, rows = [], 0
+        for month in self.due_months(today):
+            if not self.projections_cover(month):
+                logger.info(f"Event archival stopped at {month:%Y-%m}: projections have not caught up")
+                break
+            record = self.archive_month(month)
+            if record is not None:
+                archived.append(f"{month:%Y-%m}")
+                rows += record.rows
+
+        pruned = 0
+        if self.retention_months > 0:
+            pruned = self.db.query(EventIdempotencyKey).filter(
+                EventIdempotencyKey.created_at < _bounds(self.cutoff(today))[0]
+            ).delete(synchronize_session=False)
+            self.db.commit()
+
+        return {"archived": archived, "rows": rows, "keys_pruned": pruned}
+
+    def projections_cover(self, month: date) -> bool:
+        """Whether every tailed projection has consumed all of ``month``'s events."""
+        start, end = _bounds(month)
+        for projector in DEFAULT_PROJECTORS:
+            if projector.live:
+                continue
+
+            query = self.db.query(Event.id).filter(
+                Event.type.in_(list(projector.event_types)),
+                Event.ts >= start,
+                Event.ts < end
+            )
+            offset = self.db.get(ProjectionOffset, projector.name)
+            if offset is not None and offset.last_ts is not None:
+                last_ts = offset.last_ts
+                if last_ts.tzinfo is not None:
+                    last_ts = last_ts.replace(tzinfo=None) - last_ts.utcoffset()
+                # Offsets are positions in recorded_at order
+                query = query.filter(or_(
+                    Event.recorded_at > last_ts,
+                    and_(Event.recorded_at == last_ts, Event.id > offset.last_event_id)
+                ))
+            if query.first() is not None:
+                return False
+        return True
+
+    def archive_month(self, month: date) -> Optional[EventArchive]:
+        """Export one month to a file and remove it from ``events``."""
+        archive_format = self._format()
+        suffix = "parquet" if archive_format == "parquet" else "ndjson.gz"
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(
+            self.archive_dir, f"events-{month:%Y-%m}-{datetime.utcnow():%Y%m%dT%H%M%S}.{suffix}"
+        )
+
+        tmp_path = f"{path}.tmp"
+        try:
+            partition = self._partition(month)
+            exported_ids = None
+            if partition is not None:
+                # Writers to the month wait until it is dropped, so what is exported is what is dropped
+                self.db.execute(text(f"LOCK TABLE {partition} IN SHARE MODE"))
+            else:
+                exported_ids = []
+
+            if archive_format == "parquet":
+                rows, counts = self._write_parquet(tmp_path, month, exported_ids)
+            else:
+                rows, counts = self._write_ndjson(tmp_path, month, exported_ids)
+            if not rows:
+                os.remove(tmp_path)
+                self.db.rollback()
+                return None
+            os.replace(tmp_path, path)
+
+            record = EventArchive(
+                month=month,
+                path=path,
+                format=archive_format,
+                rows=rows,
+                counts=dict(counts),
+                sha256=file_sha256(path),
+                archived_at=datetime.utcnow()
+            )
+            self.db.add(record)
+            self._drop_month(month, partition, exported_ids)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            for leftover in (tmp_path, path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+
+        logger.info(f"Archived {rows} events for {month:%Y-%m} to {path}")
+        return record
+
+    def _format(self) -> str:
+        if self.archive_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+                return "parquet"
+            except ImportError:
+                logger.warning("pyarrow not installed, archiving events as NDJSON")
+        return "ndjson"
+
+    def _rows(self, month: date, exported_ids: Optional[List] = None) -> Iterator[Dict[str, Any]]:
+        """The month's events as archive rows, collecting their ids into ``exported_ids`` if given."""
+        start, end = _bounds(month)
+        query = self.db.query(*(getattr(Event, column) for column in ARCHIVE_COLUMNS)).filter(
+            Event.ts >= start,
+            Event.ts < end
+        ).order_by(Event.ts, Event.id).execution_options(yield_per=self.chunk_size)
+
+        for event_id, user_id, habit_id, event_type, ts, payload, key in query:
+            if exported_ids is not None:
+                exported_ids.append(event_id)
+            yield {
+                "id": str(event_id),
+                "user_id": str(user_id),
+                "habit_id": str(habit_id),
+                "type": event_type,
+                "ts": ts.isoformat(),
+                "payload": payload,
+                "idempotency_key": key
+            }
+
+    def _write_ndjson(self, path: str, month: date, exported_ids: Optional[List] = None) -> Tuple[int, Counter]:
+        rows, counts = 0, Counter()
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for row in self._rows(month, exported_ids):
+                f.write(json.dumps(row, separators=(",", ":")) + "\n")
+                rows += 1
+                counts[row["type"]] += 1
+        return rows, counts
+
+    def _write_parquet(self, path: str, month: date, exported_ids: Optional[List] = None) -> Tuple[int, Counter]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(column, pa.string()) for column in ARCHIVE_COLUMNS])
+        rows, counts, batch = 0, Counter(), []
+
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            def flush():
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch.clear()
+
+            for row in self._rows(month, exported_ids):
+                row["payload"] = json.dumps(row["payload"], separators=(",", ":"))
+                batch.append(row)
+                rows += 1
+                counts[row["type"]] += 1
+                if len(batch) >= self.chunk_size:
+                    flush()
+            if batch or not rows:
+                flush()
+        return rows, counts
+
+    def _partition(self, month: date) -> Optional[str]:
+        """The month's partition, if ``events`` is partitioned and it exists."""
+        name = partition_name(month)
+        if is_partitioned(self.db) and self.db.execute(
+            text("SELECT to_regclass(:name)"), {"name": name}
+        ).scalar() is not None:
+            return name
+        return None
+
+    def _drop_month(self, month: date, partition: Optional[str], exported_ids: Optional[List]):
+        if partition is not None:
+            # A partition's range cannot also have rows in the default partition
+            self.db.execute(text(f"ALTER TABLE events DETACH PARTITION {partition}"))
+            self.db.execute(text(f"DROP TABLE {partition}"))
+            return
+
+        # Default partition or unpartitioned table: events that arrived after the export stay
+        start, end = _bounds(month)
+        for i in range(0, len(exported_ids), self.chunk_size):
+            self.db.query(Event).filter(
+                Event.ts >= start,
+                Event.ts < end,
+                Event.id.in_(exported_ids[i:i + self.chunk_size])
+            ).delete(synchronize_session=False)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
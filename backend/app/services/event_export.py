@@ -0,0 +1,107 @@
+"""Paginated and streaming reads of a habit's event history."""
+
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models.event import Event
+from app.utils.cursors import encode_cursor, decode_cursor
+
+EXPORT_COLUMNS = ("id", "type", "ts", "payload")
+
+
+def _filtered(query, habit_id: uuid.UUID, from_date: Optional[datetime], to_date: Optional[datetime]):
+    query = query.filter(Event.habit_id == habit_id)
+    if from_date:
+        query = query.filter(Event.ts >= from_date)
+    if to_date:
+        query = query.filter(Event.ts <= to_date)
+    return query
+
+
+def events_page(
+    db: Session,
+    habit_id: uuid.UUID,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None
+) -> Tuple[List[Event], Optional[str]]:
+    """Newest-first page of events after ``cursor``, plus the next cursor.
+
+    Pages are keyset-paginated on (ts, id), so deep pages cost the same as
+    the first one and concurrent inserts never shift page boundaries.
+    """
+    query = _filtered(db.query(Event), habit_id, from_date, to_date)
+
+    if cursor:
+        values = decode_cursor(cursor)
+        # Well-formed tokens can still hold the wrong number or types of values
+        if len(values) != 2 or not all(isinstance(value, str) for value in values):
+            raise ValueError("Invalid cursor")
+        ts, event_id = datetime.fromisoformat(values[0]), uuid.UUID(values[1])
+        query = query.filter(or_(
+            Event.ts < ts,
+            and_(Event.ts == ts, Event.id < event_id)
+        ))
+
+    events = query.order_by(Event.ts.desc(), Event.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].ts.isoformat(), events[-1].id)
+
+    return events, next_cursor
+
+
+def iter_event_rows(
+    db: Session,
+    habit_id: uuid.UUID,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    chunk_size: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    """Stream a habit's events oldest-first without materializing them.
+
+    Plain column rows are fetched ``chunk_size`` at a time through a
+    server-side cursor, so memory stays flat however long the history is.
+    """
+    query = _filtered(
+        db.query(Event.id, Event.type, Event.ts, Event.payload), habit_id, from_date, to_date
+    ).order_by(Event.ts, Event.id).execution_options(yield_per=chunk_size)
+
+    for event_id, event_type, ts, payload in query:
+        yield {"id": str(event_id), "type": event_type, "ts": ts.isoformat(), "payload": payload}
+
+
+def ndjson_lines(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """One JSON document per line."""
+    for row in rows:
+        yield json.dumps(row, separators=(",", ":")) + "\n"
+
+
+def csv_lines(rows: Iterator[Dict[str, Any]], chunk_rows: int = 500) -> Iterator[str]:
+    """CSV with a header row, payload serialized as JSON, yielded in chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    for i, row in enumerate(rows, 1):
+        payload = row["payload"]
+        writer.writerow([
+            row["id"], row["type"], row["ts"],
+            json.dumps(payload, separators=(",", ":")) if payload is not None else ""
+        ])
+        if i % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
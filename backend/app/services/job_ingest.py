@@ -0,0 +1,245 @@
+"""Bulk loading of scraped job postings into ``jobs``.
+
+Scrapers emit one JSON object per line (NDJSON). ``job_row`` maps the
+field names the scrapers use onto ``jobs`` columns, and ``JobIngestor``
+upserts them in batches keyed on (source, external_id), so re-crawls
+update postings in place.
+
+On PostgreSQL each batch is COPYed into a temporary staging table and
+merged with one INSERT ... SELECT ... ON CONFLICT DO UPDATE that also
+computes ``tsv``; rows whose content did not change are left untouched.
+Elsewhere batches go through the same upsert as one multi-row INSERT and
+``tsv`` is not computed.
+
+``posted_at`` falls back to the crawl time when the source has none, so it
+keeps the value from the first crawl: re-crawls would otherwise move it to
+"now" and rewrite every posting.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session
+
+from app.models.job import Job
+from app.utils.geo import normalize_location
+
+logger = logging.getLogger(__name__)
+
+STAGED_COLUMNS = (
+    "title", "company", "location", "description", "apply_url", "posted_at", "source", "external_id",
+    "loc_city", "loc_state", "loc_remote", "updated_at",
+)
+NOT_NULL_TEXT = ("title", "company", "location", "description", "source", "external_id")  # Empty, not NULL
+CONTENT_COLUMNS = ("title", "company", "location", "description", "apply_url")  # posted_at is kept on conflict
+STAGING_DDL = (
+    "CREATE TEMP TABLE IF NOT EXISTS jobs_staging (title text, company text, location text, "
+    "description text, apply_url text, posted_at timestamptz, source text, external_id text, "
+    "loc_city text, loc_state text, loc_remote boolean, updated_at timestamptz) ON COMMIT DELETE ROWS"
+)
+TSV_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(company, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+# Scraper field names for each column, first match wins
+FIELD_ALIASES = {
+    "title": ("title", "job_title"),
+    "company": ("company", "company_name"),
+    "location": ("location",),
+    "description": ("description", "summary"),
+    "apply_url": ("apply_url", "applyUrl", "source_url", "url"),
+    "posted_at": ("posted_at", "postedAt", "date_posted", "posted_date"),
+    "source": ("source",),
+    "external_id": ("external_id", "externalId", "job_id"),
+}
+
+
+@dataclass
+class IngestStats:
+    received: int = 0
+    invalid: int = 0
+    duplicates: int = 0  # Repeated (source, external_id) within a batch; the last one wins
+    written: int = 0  # Inserted or changed
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.received / self.seconds if self.seconds else 0.0
+
+
+def _field(record: Dict[str, Any], column: str) -> Any:
+    for name in FIELD_ALIASES[column]:
+        value = record.get(name)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _parse_posted_at(value: Any, now: datetime) -> datetime:
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    return now
+
+
+def job_row(record: Dict[str, Any], default_source: Optional[str] = None,
+            now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """``jobs`` columns for one scraped record, or None without a title and company."""
+    now = now or datetime.now(timezone.utc)
+    title, company = _field(record, "title"), _field(record, "company")
+    if not isinstance(title, str) or not isinstance(company, str):
+        return None
+
+    row = {
+        "title": title.strip(),
+        "company": company.strip(),
+        "location": str(_field(record, "location") or ""),
+        "description": str(_field(record, "description") or ""),
+        "apply_url": _field(record, "apply_url"),
+        "posted_at": _parse_posted_at(_field(record, "posted_at"), now),
+        "source": str(_field(record, "source") or default_source or "unknown"),
+        "updated_at": now,
+    }
+
+    external_id = _field(record, "external_id")
+    if external_id is None:
+        # Scrapers without stable IDs: the apply URL, else the posting's identity
+        key = row["apply_url"] or "\x1f".join((row["title"], row["company"], row["location"])).lower()
+        external_id = hashlib.sha1(key.encode()).hexdigest()
+    row["external_id"] = str(external_id)
+
+    location = normalize_location(row["location"])
+    row.update(loc_city=location.city, loc_state=location.state, loc_remote=location.remote)
+    return row
+
+
+def parse_jobs(lines: Iterable[str], stats: IngestStats) -> Iterator[Dict[str, Any]]:
+    """Decode NDJSON lines, skipping blank ones; lines that aren't JSON objects count as invalid."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        stats.received += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping line {number}: not JSON")
+            stats.invalid += 1
+            continue
+        if isinstance(record, dict):
+            yield record
+        else:
+            stats.invalid += 1
+
+
+class JobIngestor:
+    """Upsert scraped jobs in batches; see the module docstring."""
+
+    def __init__(self, db: Session, batch_size: int = 10000, default_source: Optional[str] = None):
+        self.db = db
+        self.batch_size = batch_size
+        self.default_source = default_source
+        self.is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    def ingest_lines(self, lines: Iterable[str]) -> IngestStats:
+        """Load an NDJSON stream, one batch in memory at a time."""
+        stats = IngestStats()
+        started = time.perf_counter()
+        batch: Dict[tuple, Dict[str, Any]] = {}
+
+        for record in parse_jobs(lines, stats):
+            row = job_row(record, self.default_source)
+            if row is None:
+                stats.invalid += 1
+                continue
+            key = (row["source"], row["external_id"])
+            if key in batch:
+                stats.duplicates += 1
+            batch[key] = row
+            if len(batch) >= self.batch_size:
+                stats.written += self._write(list(batch.values()))
+                batch.clear()
+
+        if batch:
+            stats.written += self._write(list(batch.values()))
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def _write(self, rows: List[Dict[str, Any]]) -> int:
+        written = self._merge(rows) if self.is_postgres else self._upsert(rows)
+        self.db.commit()
+        return written
+
+    def _upsert(self, rows: List[Dict[str, Any]], chunk_size: int = 1000) -> int:
+        written = 0
+        for i in range(0, len(rows), chunk_size):
+            stmt = sqlite.insert(Job).values(rows[i:i + chunk_size])
+            updates = {column: stmt.excluded[column] for column in STAGED_COLUMNS if column not in ("source", "external_id")}
+            updates["posted_at"] = func.coalesce(Job.posted_at, stmt.excluded.posted_at)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Job.source, Job.external_id],
+                set_=updates,
+                where=or_(*(getattr(Job, column).is_distinct_from(stmt.excluded[column]) for column in CONTENT_COLUMNS)),
+            )
+            written += self.db.execute(stmt).rowcount
+        return written
+
+    def _merge(self, rows: List[Dict[str, Any]]) -> int:
+        columns = ", ".join(STAGED_COLUMNS)
+        self.db.execute(text(STAGING_DDL))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(row[column]) for column in STAGED_COLUMNS])
+        buffer.seek(0)
+
+        copy_sql = (
+            f"COPY jobs_staging ({columns}) FROM STDIN WITH (FORMAT csv, "
+            f"FORCE_NOT_NULL ({', '.join(NOT_NULL_TEXT)}))"
+        )
+        cursor = self.db.connection().connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                cursor.copy_expert(copy_sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+        changed = " OR ".join(f"jobs.{column} IS DISTINCT FROM excluded.{column}" for column in CONTENT_COLUMNS)
+        updates = ", ".join(
+            "posted_at = COALESCE(jobs.posted_at, excluded.posted_at)" if column == "posted_at"
+            else f"{column} = excluded.{column}"
+            for column in (*STAGED_COLUMNS, "tsv") if column not in ("source", "external_id")
+        )
+        result = self.db.execute(text(
+            f"INSERT INTO jobs ({columns}, tsv) SELECT {columns}, {TSV_SQL} FROM jobs_staging "
+            f"ON CONFLICT (source, external_id) DO UPDATE SET {updates} WHERE {changed}"
+        ))
+        return result.rowcount
+
+
+def _copy_value(value: Any) -> Any:
+    """CSV cell for COPY: empty is NULL except in NOT_NULL_TEXT columns."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
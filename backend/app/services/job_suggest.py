@@ -0,0 +1,226 @@
+"""In-memory prefix index behind the job search typeahead.
+
+``SuggestIndex`` holds every distinct job title, company and location with
+the number of postings using it. Lowercase keys sit in one sorted array, so
+a lookup is a bisect plus a scan of the matching range, with no database
+round trip. Each phrase is also keyed from every later word, so "engineer"
+finds "Software Engineer". Prefixes of up to three characters match too
+much to scan per keystroke; their answers are kept ranked instead.
+
+``maybe_refresh`` builds the index on first use. After that it counts jobs
+whose ``id`` is above the highest one seen, on a background thread, so
+new postings show up within ``refresh_seconds``. A posting that a re-crawl
+changes in place keeps its old phrases until the index is rebuilt in full,
+every ``rebuild_seconds``; counting it again would count it twice.
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.job import Job
+from app.utils.geo import US_STATE_TO_ABBR
+
+logger = logging.getLogger(__name__)
+
+STATE_NAMES = {code: name.title() for name, code in reversed(US_STATE_TO_ABBR.items())}
+SHORT_PREFIX = 3  # Prefixes up to this long are answered from ranked lists
+TOP_SIZE = 20  # Length of those lists; the endpoint's largest limit
+
+Entry = Tuple[str, str]  # (kind, text)
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def location_labels(city: Optional[str], state: Optional[str], remote: Optional[bool]) -> List[str]:
+    """Display forms of a normalized location: "Austin, TX", "Texas", "Remote"."""
+    labels = []
+    if city:
+        labels.append(f"{city.title()}, {state}" if state else city.title())
+    elif state:
+        labels.append(STATE_NAMES.get(state, state))
+    if remote:
+        labels.append("Remote")
+    return labels
+
+
+def _keys(entry: Entry) -> List[Tuple[str, str, str]]:
+    words = normalize(entry[1]).split()
+    return [(" ".join(words[i:]), *entry) for i in range(len(words))]
+
+
+def _short_prefixes(entry: Entry) -> set:
+    return {key[:n] for key, _, _ in _keys(entry) for n in range(1, min(len(key), SHORT_PREFIX) + 1)}
+
+
+def _top_lists(keys: List[Tuple[str, str, str]], counts: Dict[Entry, int]) -> Dict[Tuple[str, Optional[str]], List[Entry]]:
+    """Best entries per (short prefix, kind), and per short prefix across kinds.
+
+    A prefix's best entries are among its one-character-longer extensions'
+    best entries, so the lists are ranked from the longest prefixes down.
+    """
+    def rank(entry: Entry):
+        return -counts[entry], entry[1]
+
+    candidates: Dict[str, Dict[str, set]] = defaultdict(lambda: defaultdict(set))
+    for key, kind, text in keys:
+        candidates[key[:SHORT_PREFIX]][kind].add((kind, text))
+
+    top = {}
+    for length in range(SHORT_PREFIX, 0, -1):
+        for prefix in [p for p in candidates if len(p) == length]:
+            best = []
+            for kind, entries in candidates[prefix].items():
+                top[(prefix, kind)] = heapq.nsmallest(TOP_SIZE, entries, key=rank)
+                best += top[(prefix, kind)]
+                if length > 1:
+                    candidates[prefix[:-1]][kind].update(top[(prefix, kind)])
+            top[(prefix, None)] = sorted(best, key=rank)[:TOP_SIZE]
+    return top
+
+
+class SuggestIndex:
+    """Phrase -> posting count, searchable by prefix; see the module docstring."""
+
+    def __init__(self, session_factory: Callable[[], Session], refresh_seconds: float = 30,
+                 rebuild_seconds: float = 3600, clock: Callable[[], float] = time.monotonic):
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()  # One refresher at a time, or jobs are counted twice
+        self._counts: Dict[Entry, int] = {}
+        self._keys: List[Tuple[str, str, str]] = []  # (key, kind, text), sorted
+        self._top: Dict[Tuple[str, Optional[str]], List[Entry]] = {}  # (short prefix, kind) -> best first
+        self._max_id: Optional[int] = None  # Highest job id indexed
+        self._built_at: Optional[float] = None
+        self._refreshed_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def maybe_refresh(self) -> Optional[threading.Thread]:
+        """Build the index on first use, then refresh it in the background once it is old enough.
+
+        Returns the refresh thread when one was started; lookups keep
+        answering from the current index meanwhile.
+        """
+        if self._built_at is None:
+            with self._refreshing:
+                if self._built_at is None:
+                    self._refresh()
+            return None
+
+        if self.clock() - self._refreshed_at < self.refresh_seconds or not self._refreshing.acquire(blocking=False):
+            return None
+        thread = threading.Thread(target=self._refresh_in_background, daemon=True)
+        thread.start()
+        return thread
+
+    def _refresh(self):
+        db = self.session_factory()
+        try:
+            if self._built_at is None or self.clock() - self._built_at >= self.rebuild_seconds:
+                self.rebuild(db)
+            else:
+                self.update(db)
+        finally:
+            db.close()
+
+    def _refresh_in_background(self):
+        try:
+            self._refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing job suggestions: {e}")
+        finally:
+            self._refreshing.release()
+
+    def rebuild(self, db: Session):
+        """Recount every phrase from ``jobs``."""
+        max_id = db.scalar(select(func.max(Job.id)))
+        counts: Counter = Counter()
+        for column in (Job.title, Job.company):
+            for text, n in db.execute(select(column, func.count()).group_by(column)):
+                if text:
+                    counts[(column.key, text.strip())] += n
+        location = (Job.loc_city, Job.loc_state, Job.loc_remote)
+        for city, state, remote, n in db.execute(select(*location, func.count()).group_by(*location)):
+            for label in location_labels(city, state, remote):
+                counts[("location", label)] += n
+
+        keys = sorted(key for entry in counts for key in _keys(entry))
+        top = _top_lists(keys, counts)
+
+        now = self.clock()
+        with self._lock:
+            self._counts, self._keys, self._top = dict(counts), keys, top
+            self._max_id = max_id
+            self._built_at = self._refreshed_at = now
+
+    def update(self, db: Session):
+        """Count jobs added since the last refresh."""
+        query = select(Job.title, Job.company, Job.loc_city, Job.loc_state, Job.loc_remote, Job.id)
+        if self._max_id is not None:
+            query = query.where(Job.id > self._max_id)
+
+        added: Counter = Counter()
+        max_id = self._max_id
+        for title, company, city, state, remote, job_id in db.execute(query):
+            for entry in (("title", title), ("company", company)):
+                if entry[1]:
+                    added[(entry[0], entry[1].strip())] += 1
+            for label in location_labels(city, state, remote):
+                added[("location", label)] += 1
+            if max_id is None or job_id > max_id:
+                max_id = job_id
+
+        with self._lock:
+            new_keys = [key for entry in added if entry not in self._counts for key in _keys(entry)]
+            for entry, n in added.items():
+                self._counts[entry] = self._counts.get(entry, 0) + n
+            if new_keys:
+                # Two sorted runs: timsort merges them in linear time
+                self._keys = self._keys + sorted(new_keys)
+                self._keys.sort()
+            # Counts only grow between rebuilds, so re-ranking the entries that
+            # grew keeps every list exact
+            for entry in added:
+                for prefix in _short_prefixes(entry):
+                    for kind in (None, entry[0]):
+                        ranked = [e for e in self._top.get((prefix, kind), ()) if e != entry] + [entry]
+                        ranked.sort(key=lambda e: (-self._counts[e], e[1]))
+                        self._top[(prefix, kind)] = ranked[:TOP_SIZE]
+            self._max_id = max_id
+            self._refreshed_at = self.clock()
+
+    def suggest(self, prefix: str, kind: Optional[str] = None, limit: int = 8) -> List[Tuple[str, str, int]]:
+        """Most-posted phrases starting with ``prefix`` (or with a word in them that does)."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            if len(prefix) <= SHORT_PREFIX:
+                return [(*entry, self._counts[entry]) for entry in self._top.get((prefix, kind), ())[:limit]]
+
+            matches, seen = [], set()
+            for i in range(bisect.bisect_left(self._keys, (prefix,)), len(self._keys)):
+                key, entry_kind, text = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                entry = (entry_kind, text)
+                if (kind is None or entry_kind == kind) and entry not in seen:
+                    seen.add(entry)
+                    matches.append((entry_kind, text, self._counts[entry]))
+
+            return heapq.nsmallest(limit, matches, key=lambda m: (-m[2], m[1]))
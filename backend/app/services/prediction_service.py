@@ -1,82 +1,119 @@
 """Prediction service for habit success forecasting."""
 
 import logging
-from datetime import datetime, timedelta
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 from collections import defaultdict
 
+import numpy as np
+
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.models.success_score import HabitSuccessScore
+from app.services.completion_features import (
+    CompletionFeatures, CompletionTimeline, extract_features, to_datetime64
+)
+from app.services.success_model import SuccessModel, current_model, load_timelines
+
 logger = logging.getLogger(__name__)
 
 
+def parse_completed_at(completion: Dict[str, Any]) -> Optional[datetime]:
+    """Parse a completion's ISO timestamp to naive UTC; None if missing or invalid."""
+    try:
+        value = completion['completed_at']
+        if value.endswith('Z'):
+            # Already UTC; skip the offset round trip
+            return datetime.fromisoformat(value[:-1])
+        return to_naive_utc(datetime.fromisoformat(value))
+    except (ValueError, KeyError, AttributeError, TypeError):
+        return None
+
+
+def to_naive_utc(ts: datetime) -> datetime:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
 def get_recent_completions(completions: List[Dict[str, Any]], days: int = 30) -> List[Dict[str, Any]]:
     """Get completions from the last N days."""
-    cutoff_date = datetime.now() - timedelta(days=days)
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
     recent = []
     
     for completion in completions:
-        try:
-            completion_time = datetime.fromisoformat(completion['completed_at'].replace('Z', '+00:00'))
-            if completion_time >= cutoff_date:
-                recent.append(completion)
-        except (ValueError, KeyError):
-            continue
+        completion_time = parse_completed_at(completion)
+        if completion_time is not None and completion_time >= cutoff_date:
+            recent.append(completion)
     
     return recent
 
 
 def calculate_current_streak(completions: List[Dict[str, Any]]) -> int:
     """Calculate the current streak length."""
-    if not completions:
-        return 0
-    
-    # Sort completions by date (most recent first)
-    sorted_completions = sorted(
-        completions, 
-        key=lambda x: datetime.fromisoformat(x['completed_at'].replace('Z', '+00:00')),
-        reverse=True
-    )
-    
-    streak = 0
-    current_date = datetime.now().date()
-    
-    for completion in sorted_completions:
-        try:
-            completion_date = datetime.fromisoformat(
-                completion['completed_at'].replace('Z', '+00:00')
-            ).date()
-            
-            # Check if this completion is consecutive
-            if completion_date == current_date - timedelta(days=streak):
-                streak += 1
-            else:
-                break
-        except (ValueError, KeyError):
-            continue
-    
-    return streak
+    return extract_features(_parse_all(completions)).current_streak
 
 
 def calculate_consistency(completions: List[Dict[str, Any]], days: int = 30) -> float:
     """Calculate completion consistency over the last N days."""
-    if not completions:
-        return 0.0
+    timeline = CompletionTimeline(to_datetime64(_parse_all(completions)))
+    return timeline.consistency(days, np.datetime64(datetime.utcnow(), "us"))
+
+
+def _parse_all(completions: List[Dict[str, Any]]) -> List[datetime]:
+    """Parse every timestamp exactly once, dropping invalid ones."""
+    times = (parse_completed_at(completion) for completion in completions)
+    return [ts for ts in times if ts is not None]
+
+
+def rule_based_probability(features: CompletionFeatures) -> float:
+    """Hand-tuned point score for the features, normalized to 0-1."""
+    score = 0.0
+    
+    # Streak bonus (up to 40 points)
+    if features.current_streak >= 7:
+        score += 40
+    elif features.current_streak >= 3:
+        score += 25
+    elif features.current_streak >= 1:
+        score += 10
     
-    recent_completions = get_recent_completions(completions, days)
+    # Consistency bonus (up to 30 points)
+    if features.consistency_30 >= 0.8:
+        score += 30
+    elif features.consistency_30 >= 0.6:
+        score += 20
+    elif features.consistency_30 >= 0.4:
+        score += 10
     
-    # Count unique days with completions
-    completion_dates = set()
-    for completion in recent_completions:
-        try:
-            completion_date = datetime.fromisoformat(
-                completion['completed_at'].replace('Z', '+00:00')
-            ).date()
-            completion_dates.add(completion_date)
-        except (ValueError, KeyError):
-            continue
+    # Completion volume bonus (up to 20 points)
+    if features.total >= 50:
+        score += 20
+    elif features.total >= 20:
+        score += 15
+    elif features.total >= 10:
+        score += 10
+    elif features.total >= 5:
+        score += 5
     
-    # Calculate consistency as percentage of days with completions
-    consistency = len(completion_dates) / days if days > 0 else 0.0
-    return round(consistency, 3)
+    # Recent activity bonus (up to 10 points)
+    if features.recent_7 >= 5:
+        score += 10
+    elif features.recent_7 >= 3:
+        score += 7
+    elif features.recent_7 >= 1:
+        score += 3
+    
+    return min(score, 100) / 100
+
+
+def prediction_category(probability: float) -> str:
+    if probability >= 0.7:
+        return "high"
+    if probability >= 0.4:
+        return "medium"
+    return "low"
 
 
 def generate_recommendation(prediction: str, habit: Dict[str, Any]) -> str:
@@ -104,95 +141,103 @@ def generate_recommendation(prediction: str, habit: Dict[str, Any]) -> str:
     return random.choice(recommendations.get(prediction, recommendations["medium"]))
 
 
+def build_prediction(habit_id: str, features: CompletionFeatures, probability: float, **extra) -> Dict[str, Any]:
+    """Response body for a success probability and the features behind it."""
+    prediction = prediction_category(probability)
+    
+    # Calculate confidence based on data quality
+    confidence = min(features.total / 20, 1.0)  # More data = higher confidence
+    
+    # Generate recommendations
+    recommendations = [generate_recommendation(prediction, {"id": habit_id})]
+    
+    return {
+        "prediction": prediction,
+        "probability": round(probability, 3),
+        "confidence": round(confidence, 3),
+        "current_streak": features.current_streak,
+        "consistency": features.consistency_30,
+        "total_completions": features.total,
+        "recent_completions": features.recent_7,
+        "recommendations": recommendations,
+        "analysis": (
+            f"Based on {features.total} completions, {features.current_streak} day streak, "
+            f"and {features.consistency_30*100:.1f}% consistency"
+        ),
+        **extra
+    }
+
+
+def stored_prediction(score: Optional[HabitSuccessScore], version: int) -> Optional[Dict[str, Any]]:
+    """Response from a nightly score, if it was taken today and no data changed since."""
+    if score is None or score.data_version != version:
+        return None
+    scored_at = to_naive_utc(score.scored_at)
+    if scored_at.date() != datetime.utcnow().date():
+        return None
+    
+    features = CompletionFeatures(**score.features)
+    if not features.total:
+        return no_data_prediction()
+    return build_prediction(
+        str(score.habit_id), features, score.probability,
+        model_version=score.model_version, scored_at=scored_at.isoformat()
+    )
+
+
+def no_data_prediction() -> Dict[str, Any]:
+    return {
+        "prediction": "low",
+        "probability": 0.2,
+        "confidence": 0.0,
+        "current_streak": 0,
+        "consistency": 0.0,
+        "recommendations": ["Start building your habit with small, achievable goals."]
+    }
+
+
 class PredictionService:
     """Service for predicting habit success using statistical analysis."""
     
-    def __init__(self):
+    def __init__(self, db=None, cache=None):
+        self.db = db
+        self.cache = cache or result_cache
         self.prediction_history = defaultdict(list)
     
+    def predict_habit_success(self, habit_id: uuid.UUID, version: Optional[int] = None) -> Dict[str, Any]:
+        """Predict from the habit's checkin events, cached per data version and day.
+        
+        Uses the newest trained model when one has been saved, and the
+        rule-based score otherwise.
+        """
+        model = current_model(settings.success_model_dir)
+        
+        def compute():
+            # Same sources as the nightly scoring job, so both see the same features
+            times = load_timelines(self.db, [habit_id]).get(habit_id, np.array([], dtype="datetime64[us]"))
+            return self._predict(str(habit_id), times, model)
+        
+        if version is None:
+            return compute()
+        
+        # Streak and recency windows move with the date even without new data
+        model_version = model.version if model else "rules"
+        key = f"prediction:{habit_id}:{version}:{datetime.utcnow().date()}:{model_version}"
+        return self.cache.get_or_compute(key, compute)
+    
     def predict_success(self, habit_id: str, completions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Predict the likelihood of maintaining the habit streak.
         Uses rule-based logic with statistical analysis.
         """
-        if not completions:
-            return {
-                "prediction": "low",
-                "probability": 0.2,
-                "confidence": 0.0,
-                "current_streak": 0,
-                "consistency": 0.0,
-                "recommendations": ["Start building your habit with small, achievable goals."]
-            }
-        
-        # Calculate key metrics
-        current_streak = calculate_current_streak(completions)
-        consistency = calculate_consistency(completions, 30)
-        total_completions = len(completions)
-        
-        # Rule-based prediction logic
-        score = 0.0
-        
-        # Streak bonus (up to 40 points)
-        if current_streak >= 7:
-            score += 40
-        elif current_streak >= 3:
-            score += 25
-        elif current_streak >= 1:
-            score += 10
-        
-        # Consistency bonus (up to 30 points)
-        if consistency >= 0.8:
-            score += 30
-        elif consistency >= 0.6:
-            score += 20
-        elif consistency >= 0.4:
-            score += 10
-        
-        # Completion volume bonus (up to 20 points)
-        if total_completions >= 50:
-            score += 20
-        elif total_completions >= 20:
-            score += 15
-        elif total_completions >= 10:
-            score += 10
-        elif total_completions >= 5:
-            score += 5
-        
-        # Recent activity bonus (up to 10 points)
-        recent_completions = get_recent_completions(completions, 7)
-        if len(recent_completions) >= 5:
-            score += 10
-        elif len(recent_completions) >= 3:
-            score += 7
-        elif len(recent_completions) >= 1:
-            score += 3
-        
-        # Normalize score to 0-100
-        probability = min(score, 100) / 100
-        
-        # Determine prediction category
-        if probability >= 0.7:
-            prediction = "high"
-        elif probability >= 0.4:
-            prediction = "medium"
-        else:
-            prediction = "low"
-        
-        # Calculate confidence based on data quality
-        confidence = min(len(completions) / 20, 1.0)  # More data = higher confidence
-        
-        # Generate recommendations
-        recommendations = [generate_recommendation(prediction, {"id": habit_id})]
+        return self._predict(habit_id, to_datetime64(_parse_all(completions)))
+    
+    def _predict(self, habit_id: str, times: np.ndarray, model: Optional[SuccessModel] = None) -> Dict[str, Any]:
+        """Prediction from already-parsed completion times (naive UTC datetime64)."""
+        if not len(times):
+            return no_data_prediction()
         
-        return {
-            "prediction": prediction,
-            "probability": round(probability, 3),
-            "confidence": round(confidence, 3),
-            "current_streak": current_streak,
-            "consistency": consistency,
-            "total_completions": total_completions,
-            "recent_completions": len(get_recent_completions(completions, 7)),
-            "recommendations": recommendations,
-            "analysis": f"Based on {total_completions} completions, {current_streak} day streak, and {consistency*100:.1f}% consistency"
-        }
+        features = extract_features(times)
+        if model is None:
+            return build_prediction(habit_id, features, rule_based_probability(features))
+        return build_prediction(habit_id, features, model.score(features), model_version=model.version)
@@ -0,0 +1,350 @@
+"""Event-sourced projections over the events table."""
+
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.upsert import increment_counters
+from app.models.user import User
+from app.models.habit import Habit
+from app.models.event import Event
+from app.models.bandit_arm import BanditArm
+from app.models.rollup import HabitWeeklyTotal
+from app.models.projection_offset import ProjectionOffset
+from app.services.bandit_service import BanditService
+from app.services.rollup_service import RollupService
+from app.services.streak_service import StreakService, STREAK_EVENT_TYPES
+from app.utils.timezones import to_local
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectionConflict(Exception):
+    """Another runner advanced a projection offset concurrently."""
+
+
+class Projector:
+    """A projection fed batches of events in the order they were recorded.
+
+    ``apply`` must only write through the given session; the runner commits
+    projector writes and the advanced offset together.
+    """
+
+    name = ""
+    event_types: Tuple[str, ...] = ()
+    live = False  # Also applied inline by request handlers for read-your-writes
+
+    def apply(self, db: Session, events: List[Event], habits: Dict[Any, Habit]):
+        raise NotImplementedError
+
+    def reset(self, db: Session):
+        raise NotImplementedError
+
+
+class StreakProjector(Projector):
+    """Materialized streaks (see StreakService)."""
+
+    name = "streaks"
+    event_types = STREAK_EVENT_TYPES
+    live = True
+
+    def apply(self, db, events, habits):
+        StreakService(db).apply_batch(
+            {event.habit_id: habits[event.habit_id] for event in events},
+            [(event.habit_id, event.type, event.ts) for event in events]
+        )
+
+    def reset(self, db):
+        StreakService(db).reset_all()
+
+
+class HourHistogramProjector(Projector):
+    """Daily and hour-of-week checkin rollups (see RollupService)."""
+
+    name = "hour_histograms"
+    event_types = ("checkin",)
+    live = True
+
+    def apply(self, db, events, habits):
+        RollupService(db).record_checkins(habits, [(event.habit_id, event.ts) for event in events])
+
+    def reset(self, db):
+        RollupService(db).reset()
+
+
+class WeeklyTotalsProjector(Projector):
+    """Checkin, miss and reminder totals per habit and local week."""
+
+    name = "weekly_totals"
+    event_types = ("checkin", "miss", "reminder_sent")
+    columns = {"checkin": "checkins", "miss": "misses", "reminder_sent": "reminders_sent"}
+
+    def apply(self, db, events, habits):
+        totals: Dict[Tuple, Counter] = {}
+        for event in events:
+            local_date = to_local(event.ts, habits[event.habit_id].timezone).date()
+            key = (event.habit_id, local_date - timedelta(days=local_date.weekday()))
+            totals.setdefault(key, Counter())[self.columns[event.type]] += 1
+
+        counters = tuple(self.columns.values())
+        increment_counters(db, HabitWeeklyTotal, ("habit_id", "week_start"), counters, [
+            {"habit_id": habit_id, "week_start": week_start, **{c: counts[c] for c in counters}}
+            for (habit_id, week_start), counts in totals.items()
+        ])
+
+    def reset(self, db):
+        db.query(HabitWeeklyTotal).delete(synchronize_session=False)
+
+
+class BanditRewardProjector(Projector):
+    """Credit reminder hours whose reminder was followed by a checkin.
+
+    A checkin rewards the most recent ``reminder_sent`` for its habit within
+    ``reward_window`` if no other checkin came in between, so the result does
+    not depend on how events are split into batches. Rewarded habits then
+    have ``Reminder.best_hour`` moved to their best-rewarded hour.
+    """
+
+    name = "bandit_rewards"
+    event_types = ("checkin",)
+    reward_window = timedelta(hours=24)
+
+    def apply(self, db, events, habits):
+        batch_ids = {event.id for event in events}
+        history = db.query(
+            Event.id, Event.habit_id, Event.type, Event.ts, Event.payload
+        ).filter(
+            Event.habit_id.in_(list({event.habit_id for event in events})),
+            Event.type.in_(("checkin", "reminder_sent")),
+            Event.ts >= min(event.ts for event in events) - self.reward_window,
+            Event.ts <= max(event.ts for event in events)
+        ).order_by(Event.ts, Event.id).all()
+
+        rewards = Counter()
+        open_reminders = {}
+        for event_id, habit_id, event_type, ts, payload in history:
+            if event_type == "reminder_sent":
+                hour = (payload or {}).get("hour")
+                if hour is not None:
+                    open_reminders[habit_id] = (ts, hour)
+                continue
+
+            reminder = open_reminders.pop(habit_id, None)
+            if reminder and event_id in batch_ids and ts - reminder[0] <= self.reward_window:
+                rewards[(habit_id, reminder[1])] += 1
+
+        now = datetime.utcnow()
+        increment_counters(db, BanditArm, ("habit_id", "hour"), ("pulls", "successes"), [
+            {"habit_id": habit_id, "hour": hour, "pulls": 0, "successes": count, "updated_at": now}
+            for (habit_id, hour), count in rewards.items()
+        ])
+        if rewards:
+            BanditService(db).refresh_best_hours({habit_id for habit_id, _ in rewards})
+
+    def reset(self, db):
+        # Pulls are recorded by the scheduler, only rewards come from events
+        db.query(BanditArm).update({"successes": 0}, synchronize_session=False)
+
+
+DEFAULT_PROJECTORS = (
+    StreakProjector(),
+    HourHistogramProjector(),
+    WeeklyTotalsProjector(),
+    BanditRewardProjector(),
+)
+
+
+class ProjectionRunner:
+    """Feed registered projectors from the events table.
+
+    Each projector keeps its own (recorded_at, id) offset in
+    ``projection_offsets``. ``run`` tails events after the lowest offset with
+    one read per batch and hands every projector the events it has not seen
+    yet. Offsets are advanced with compare-and-set in the same transaction as
+    the projector writes, so concurrent runners cannot apply a batch twice.
+
+    Tailing follows the database-set ``recorded_at``, not the client's
+    ``ts``, so events synced with a past ``ts`` are still seen. Only events
+    recorded ``settle_seconds`` ago are read, which lets transactions that
+    started earlier commit before the offset passes them.
+
+    Live projectors are kept current by request handlers via ``apply_live``
+    and are not tailed.
+    """
+
+    def __init__(self, db: Session, projectors: Optional[Iterable[Projector]] = None, session_factory=SessionLocal,
+                 settle_seconds: Optional[int] = None):
+        self.db = db
+        self.projectors = list(projectors or DEFAULT_PROJECTORS)
+        self.session_factory = session_factory
+        self.settle_seconds = settings.projection_settle_seconds if settle_seconds is None else settle_seconds
+
+    def apply_live(self, events: List[Event], habits: Optional[Dict[Any, Habit]] = None):
+        """Apply just-written events to live projectors; caller commits."""
+        habits = habits or self._load_habits(self.db, {event.habit_id for event in events})
+        for projector in self.projectors:
+            if not projector.live:
+                continue
+            matching = [event for event in events if event.type in projector.event_types]
+            if matching:
+                projector.apply(self.db, matching, habits)
+
+    def run(self, batch_size: int = 1000, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Tail the events table for all non-live projectors."""
+        projectors = [projector for projector in self.projectors if not projector.live]
+        if not projectors:
+            return {}
+
+        event_types = {event_type for projector in projectors for event_type in projector.event_types}
+        offsets = {projector.name: self._load_offset(projector.name) for projector in projectors}
+        settled = Event.recorded_at <= datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        processed = Counter()
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            cursor = min(offsets.values(), key=self._cursor_key)
+            events = self._read_after(self.db, cursor, event_types, batch_size, settled)
+            if not events:
+                break
+
+            habits = self._load_habits(self.db, {event.habit_id for event in events})
+            last = events[-1]
+
+            for projector in projectors:
+                offset = offsets[projector.name]
+                matching = [
+                    event for event in events
+                    if event.type in projector.event_types and self._is_after(event, offset)
+                ]
+                if matching:
+                    projector.apply(self.db, matching, habits)
+                    processed[projector.name] += len(matching)
+                offsets[projector.name] = self._advance(projector.name, offset, last.recorded_at, last.id)
+
+            self.db.commit()
+            batches += 1
+
+        return dict(processed)
+
+    def rebuild(self, name: str, partitions: int = 4, batch_size: int = 1000) -> int:
+        """Rebuild one projection from scratch, replaying users in parallel partitions."""
+        projector = next(projector for projector in self.projectors if projector.name == name)
+
+        # Replay everything recorded up to the current head; later events are tailed
+        head = self.db.query(Event.recorded_at, Event.id).filter(
+            Event.type.in_(projector.event_types)
+        ).order_by(Event.recorded_at.desc(), Event.id.desc()).first()
+
+        offset = self._load_offset(name)
+        projector.reset(self.db)
+        self.db.commit()
+
+        if head is None:
+            return 0
+
+        user_ids = [user_id for (user_id,) in self.db.query(User.id).order_by(User.id)]
+        parts = [user_ids[i::partitions] for i in range(partitions)]
+
+        with ThreadPoolExecutor(max_workers=partitions) as pool:
+            counts = list(pool.map(
+                lambda part: self._replay_partition(projector, part, head, batch_size), parts
+            ))
+
+        self._advance(name, offset, head.recorded_at, head.id)
+        self.db.commit()
+        logger.info(f"Rebuilt projection {name}: {sum(counts)} events in {partitions} partitions")
+        return sum(counts)
+
+    def _replay_partition(self, projector: Projector, user_ids: List, head, batch_size: int) -> int:
+        db = self.session_factory()
+        count = 0
+        try:
+            for i in range(0, len(user_ids), 500):
+                chunk = user_ids[i:i + 500]
+                cursor = {"ts": None, "id": None}
+                while True:
+                    # Replays go in ts order, the order live projectors see
+                    events = self._read_after(
+                        db, cursor, projector.event_types, batch_size,
+                        Event.user_id.in_(chunk),
+                        or_(
+                            Event.recorded_at < head.recorded_at,
+                            and_(Event.recorded_at == head.recorded_at, Event.id <= head.id)
+                        ),
+                        column=Event.ts
+                    )
+                    if not events:
+                        break
+
+                    projector.apply(db, events, self._load_habits(db, {event.habit_id for event in events}))
+                    cursor = {"ts": events[-1].ts, "id": events[-1].id}
+                    count += len(events)
+                    db.commit()
+            return count
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _read_after(self, db: Session, cursor: Dict, event_types, limit: int, *criteria,
+                    column=Event.recorded_at) -> List[Event]:
+        """Events after ``cursor`` in (``column``, id) order."""
+        query = db.query(Event).filter(Event.type.in_(list(event_types)), *criteria)
+        if cursor["ts"] is not None:
+            query = query.filter(or_(
+                column > cursor["ts"],
+                and_(column == cursor["ts"], Event.id > cursor["id"])
+            ))
+        return query.order_by(column, Event.id).limit(limit).all()
+
+    def _load_habits(self, db: Session, habit_ids) -> Dict[Any, Habit]:
+        return {habit.id: habit for habit in db.query(Habit).filter(Habit.id.in_(list(habit_ids)))}
+
+    def _load_offset(self, name: str) -> Dict[str, Any]:
+        offset = self.db.get(ProjectionOffset, name)
+        if offset is None:
+            offset = ProjectionOffset(name=name, version=0, updated_at=datetime.utcnow())
+            self.db.add(offset)
+            self.db.commit()
+        return {"ts": offset.last_ts, "id": offset.last_event_id, "version": offset.version}
+
+    def _advance(self, name: str, offset: Dict[str, Any], ts, event_id) -> Dict[str, Any]:
+        if not self._is_after_cursor(ts, event_id, offset):
+            return offset
+
+        updated = self.db.query(ProjectionOffset).filter(
+            ProjectionOffset.name == name,
+            ProjectionOffset.version == offset["version"]
+        ).update({
+            "last_ts": ts,
+            "last_event_id": event_id,
+            "version": offset["version"] + 1,
+            "updated_at": datetime.utcnow()
+        }, synchronize_session=False)
+
+        if updated != 1:
+            self.db.rollback()
+            raise ProjectionConflict(f"Offset for projection {name} moved concurrently")
+
+        return {"ts": ts, "id": event_id, "version": offset["version"] + 1}
+
+    def _is_after(self, event: Event, offset: Dict[str, Any]) -> bool:
+        return self._is_after_cursor(event.recorded_at, event.id, offset)
+
+    @staticmethod
+    def _is_after_cursor(ts, event_id, offset: Dict[str, Any]) -> bool:
+        if offset["ts"] is None:
+            return True
+        return (ts, event_id) > (offset["ts"], offset["id"])
+
+    @staticmethod
+    def _cursor_key(offset: Dict[str, Any]):
+        return (offset["ts"] is not None, offset["ts"] or datetime.min, offset["id"].int if offset["id"] else 0)
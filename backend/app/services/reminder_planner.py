@@ -0,0 +1,284 @@
+"""Batch reminder planner for the scheduler tick."""
+
+import logging
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import tuple_, update
+from sqlalchemy.orm import Session
+
+from app.db.upsert import insert_ignoring_conflicts
+from app.models.user import User
+from app.models.habit import Habit
+from app.models.reminder import Reminder
+from app.models.reminder_send import ReminderSend
+from app.models.streak import Streak
+from app.services.bandit_service import BanditService
+from app.services.schedule_engine import ALL_DAYS, compile_schedule, days_mask
+from app.utils.timezones import get_zone
+
+logger = logging.getLogger(__name__)
+
+
+def hours_mask(start_hour: int, end_hour: int) -> int:
+    """Bitmask of hours from start to end inclusive, wrapping past midnight."""
+    if start_hour <= end_hour:
+        return ((1 << (end_hour - start_hour + 1)) - 1) << start_hour
+    return hours_mask(start_hour, 23) | hours_mask(0, end_hour)
+
+
+def compile_reminder(window: Dict[str, Any], quiet_hours: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    """Compile a reminder window and quiet hours into (hour mask, day mask)."""
+    window = window or {}
+    allowed = hours_mask(window.get("start_hour", 6), window.get("end_hour", 21))
+
+    if quiet_hours:
+        allowed &= ~hours_mask(quiet_hours.get("start_hour", 22), quiet_hours.get("end_hour", 6))
+
+    days = window.get("days")
+    return allowed, days_mask(days) if days else ALL_DAYS
+
+
+def allowed_hours(allowed: int, from_hour: int = 0) -> List[int]:
+    """Hours set in an hour mask, from ``from_hour`` on."""
+    return [hour for hour in range(from_hour, 24) if allowed >> hour & 1]
+
+
+class ReminderPlanner:
+    """Compute which reminders are due in a scheduler tick.
+
+    All active reminders are loaded in one streamed query and compiled into
+    flat NumPy arrays (hour/day bitmasks, timezone indexes, last checkin).
+    Which reminders can still fire today is then a handful of vectorized
+    array operations instead of per-row ORM work.
+
+    Each habit's hour for the day is chosen by the bandit, among the allowed
+    hours still ahead, the first tick it is open, and stored in
+    ``reminder_sends``. A tick sends the unsent reminders whose stored hour
+    has come, after claiming their rows, so a retried tick or a second worker
+    never sends a reminder twice. Sends that fail are released and picked up
+    by a later tick while the window is open.
+    """
+
+    def __init__(self, db: Session, interval_minutes: int, batch_size: int = 5000,
+                 bandit: Optional[BanditService] = None):
+        self.db = db
+        self.interval_minutes = interval_minutes
+        self.batch_size = batch_size
+        self.bandit = bandit or BanditService(db)
+
+    def load(self) -> Dict[str, Any]:
+        """Load and compile all active reminders into columnar arrays."""
+        rows = self.db.query(
+            Reminder.habit_id,
+            Habit.user_id,
+            Habit.title,
+            Habit.schedule_json,
+            Habit.timezone,
+            Reminder.window,
+            Reminder.quiet_hours,
+            Reminder.timezone,
+            Streak.last_checkin_date,
+            User.email
+        ).join(
+            Habit, Habit.id == Reminder.habit_id
+        ).join(
+            User, User.id == Habit.user_id
+        ).outerjoin(
+            Streak, Streak.habit_id == Reminder.habit_id
+        ).filter(
+            User.is_active.isnot(False)
+        ).execution_options(yield_per=self.batch_size)
+
+        compiled_reminders: Dict[Tuple, Tuple[int, int]] = {}
+        compiled_schedules: Dict[str, int] = {}
+        tz_codes: Dict[str, int] = {}
+
+        columns = {key: [] for key in (
+            "habit_id", "user_id", "title", "email", "window",
+            "allowed", "day_mask", "tz", "habit_tz", "last_checkin"
+        )}
+
+        for (habit_id, user_id, title, schedule, habit_tz_name, window, quiet_hours,
+             tz_name, last_checkin, email) in rows:
+            # Windows and schedules repeat heavily across users; compile once
+            reminder_key = (repr(window), repr(quiet_hours))
+            if reminder_key not in compiled_reminders:
+                compiled_reminders[reminder_key] = compile_reminder(window, quiet_hours)
+            allowed, window_days = compiled_reminders[reminder_key]
+
+            schedule_key = repr(schedule)
+            if schedule_key not in compiled_schedules:
+                compiled_schedules[schedule_key] = compile_schedule(schedule).mask
+            schedule_days = compiled_schedules[schedule_key]
+
+            columns["habit_id"].append(habit_id)
+            columns["user_id"].append(user_id)
+            columns["title"].append(title)
+            columns["email"].append(email)
+            columns["window"].append(window)
+            columns["allowed"].append(allowed)
+            columns["day_mask"].append(window_days & schedule_days)
+            columns["tz"].append(tz_codes.setdefault(tz_name or "UTC", len(tz_codes)))
+            # Streak dates are local to the habit, which may differ from the reminder's zone
+            columns["habit_tz"].append(tz_codes.setdefault(habit_tz_name or "UTC", len(tz_codes)))
+            columns["last_checkin"].append(last_checkin.toordinal() if last_checkin else 0)
+
+        return {
+            "habit_id": columns["habit_id"],
+            "user_id": columns["user_id"],
+            "title": columns["title"],
+            "email": columns["email"],
+            "window": columns["window"],
+            "allowed": np.array(columns["allowed"], dtype=np.int32),
+            "day_mask": np.array(columns["day_mask"], dtype=np.uint8),
+            "tz": np.array(columns["tz"], dtype=np.int32),
+            "habit_tz": np.array(columns["habit_tz"], dtype=np.int32),
+            "last_checkin": np.array(columns["last_checkin"], dtype=np.int32),
+            "timezones": list(tz_codes),
+        }
+
+    def local_clock(self, compiled: Dict[str, Any], now: datetime) -> Dict[str, np.ndarray]:
+        """Per-reminder local minute of day, weekday and date ordinal at ``now``.
+
+        ``from_hour`` is the first hour a reminder chosen now can still be
+        sent in; ``checkin_ordinal`` is today in the habit's own timezone.
+        """
+        # Local clock for each distinct timezone, computed once per zone
+        local_minute, local_weekday, local_ordinal = [], [], []
+        for tz_name in compiled["timezones"]:
+            local = now.astimezone(get_zone(tz_name))
+            local_minute.append(local.hour * 60 + local.minute)
+            local_weekday.append(local.weekday())
+            local_ordinal.append(local.date().toordinal())
+
+        minute = np.array(local_minute, dtype=np.int32)
+        ordinal = np.array(local_ordinal, dtype=np.int32)
+        tz = compiled["tz"]
+        return {
+            "minute": minute[tz],
+            "weekday": np.array(local_weekday, dtype=np.uint8)[tz],
+            "ordinal": ordinal[tz],
+            "from_hour": (minute // 60 + (minute % 60 >= self.interval_minutes))[tz],
+            "checkin_ordinal": ordinal[compiled["habit_tz"]],
+        }
+
+    def due_mask(self, compiled: Dict[str, Any], clock: Dict[str, np.ndarray]) -> np.ndarray:
+        """Vectorized check of which reminders can still fire today.
+
+        A reminder is open on a due weekday, before the habit is checked in
+        today, while an allowed hour is left.
+        """
+        return (
+            ((compiled["allowed"] >> clock["from_hour"]) != 0)
+            & ((compiled["day_mask"] >> clock["weekday"]) & 1).astype(bool)
+            & (compiled["last_checkin"] != clock["checkin_ordinal"])
+        )
+
+    def plan(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Build the send plan for the tick starting at ``now``, claiming every reminder in it."""
+        now = now or datetime.now(timezone.utc)
+        compiled = self.load()
+
+        if not compiled["habit_id"]:
+            return []
+
+        clock = self.local_clock(compiled, now)
+        due = np.flatnonzero(self.due_mask(compiled, clock))
+        if not len(due):
+            return []
+
+        keys = {int(i): (compiled["habit_id"][i], date.fromordinal(int(clock["ordinal"][i]))) for i in due}
+        hours, sent = self._day_hours(compiled, clock, keys)
+
+        firing = [
+            i for i, key in keys.items()
+            if key not in sent and clock["minute"][i] >= hours[key] * 60
+        ]
+        claimed = self._claim([keys[i] for i in firing], now)
+
+        return [
+            {
+                "habit_id": compiled["habit_id"][i],
+                "user_id": compiled["user_id"][i],
+                "email": compiled["email"][i],
+                "habit_title": compiled["title"][i],
+                "hour": hours[keys[i]],
+                "local_date": keys[i][1],
+            }
+            for i in firing if keys[i] in claimed
+        ]
+
+    def _day_hours(self, compiled: Dict[str, Any], clock: Dict[str, np.ndarray],
+                   keys: Dict[int, Tuple]) -> Tuple[Dict[Tuple, int], Set[Tuple]]:
+        """Today's hour for each open reminder, choosing and storing it where there is none yet,
+        and the reminders already sent."""
+        dates = {local_date for _, local_date in keys.values()}
+
+        def stored():
+            hours, sent = {}, set()
+            for habit_id, local_date, hour, sent_at in self.db.query(
+                ReminderSend.habit_id, ReminderSend.local_date, ReminderSend.hour, ReminderSend.sent_at
+            ).filter(ReminderSend.local_date.in_(dates)):
+                hours[(habit_id, local_date)] = hour
+                if sent_at is not None:
+                    sent.add((habit_id, local_date))
+            return hours, sent
+
+        hours, sent = stored()
+        unplanned = [i for i, key in keys.items() if key not in hours]
+        if not unplanned:
+            return hours, sent
+
+        # Pulls are recorded by the scheduler once a reminder is actually sent
+        chosen = self.bandit.choose_hours(
+            [
+                (Habit(id=compiled["habit_id"][i]), Reminder(habit_id=compiled["habit_id"][i], window=compiled["window"][i]))
+                for i in unplanned
+            ],
+            {
+                compiled["habit_id"][i]: allowed_hours(int(compiled["allowed"][i]), int(clock["from_hour"][i]))
+                for i in unplanned
+            },
+            record_pulls=False
+        )
+        inserted = insert_ignoring_conflicts(self.db, ReminderSend, ("habit_id", "local_date"), [
+            {"habit_id": keys[i][0], "local_date": keys[i][1], "hour": chosen[keys[i][0]], "created_at": datetime.utcnow()}
+            for i in unplanned
+        ], returning=("habit_id",))
+        self.db.commit()
+
+        if len(inserted) == len(unplanned):
+            hours.update({keys[i]: chosen[keys[i][0]] for i in unplanned})
+            return hours, sent
+        # Another worker planned some of these first; use its hours
+        return stored()
+
+    def _claim(self, keys: List[Tuple], now: datetime) -> Set[Tuple]:
+        """Mark the given (habit_id, local_date) sends as sent; returns those this call claimed."""
+        if not keys:
+            return set()
+
+        claimed = set()
+        for i in range(0, len(keys), 1000):
+            result = self.db.execute(
+                update(ReminderSend).where(
+                    tuple_(ReminderSend.habit_id, ReminderSend.local_date).in_(keys[i:i + 1000]),
+                    ReminderSend.sent_at.is_(None)
+                ).values(sent_at=now).returning(
+                    ReminderSend.habit_id, ReminderSend.local_date
+                ).execution_options(synchronize_session=False)
+            )
+            claimed.update((habit_id, local_date) for habit_id, local_date in result)
+        self.db.commit()
+        return claimed
+
+    def release(self, keys: List[Tuple]):
+        """Unclaim (habit_id, local_date) sends that failed, so a later tick retries them; the caller commits."""
+        for i in range(0, len(keys), 1000):
+            self.db.execute(
+                update(ReminderSend).where(
+                    tuple_(ReminderSend.habit_id, ReminderSend.local_date).in_(keys[i:i + 1000])
+                ).values(sent_at=None).execution_options(synchronize_session=False)
+            )
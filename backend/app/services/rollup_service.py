@@ -0,0 +1,102 @@
+"""Rollup service maintaining pre-aggregated completion counts."""
+
+import logging
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.upsert import increment_counters
+from app.models.habit import Habit
+from app.models.event import Event
+from app.models.rollup import HabitDailyRollup, HabitHourRollup
+from app.services.streak_service import archived_history_start, has_full_history
+from app.utils.timezones import to_local
+
+logger = logging.getLogger(__name__)
+
+
+class RollupService:
+    """Maintain daily and hour-of-week checkin rollups per habit.
+
+    Rollups are incremented as checkins arrive, so insights read a bounded
+    number of cells no matter how much history a habit has.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_checkin(self, habit: Habit, ts: datetime):
+        """Count one checkin; committed with the caller's transaction."""
+        self.record_checkins({habit.id: habit}, [(habit.id, ts)])
+
+    def record_checkins(self, habits_by_id: Dict, checkins: Iterable[Tuple]):
+        """Count (habit_id, ts) checkins with one upsert per rollup table."""
+        daily, weekly = Counter(), Counter()
+        for habit_id, ts in checkins:
+            local = to_local(ts, habits_by_id[habit_id].timezone)
+            daily[(habit_id, local.date(), local.hour)] += 1
+            weekly[(habit_id, local.weekday() * 24 + local.hour)] += 1
+
+        increment_counters(self.db, HabitDailyRollup, ("habit_id", "day", "hour"), ("checkins",), [
+            {"habit_id": habit_id, "day": day, "hour": hour, "checkins": count}
+            for (habit_id, day, hour), count in daily.items()
+        ])
+        increment_counters(self.db, HabitHourRollup, ("habit_id", "hour_of_week"), ("checkins",), [
+            {"habit_id": habit_id, "hour_of_week": hour_of_week, "checkins": count}
+            for (habit_id, hour_of_week), count in weekly.items()
+        ])
+
+    def reset(self, habit_ids: Optional[List] = None):
+        """Delete rollups for the given habits, or for all habits."""
+        for model in (HabitDailyRollup, HabitHourRollup):
+            query = self.db.query(model)
+            if habit_ids is not None:
+                query = query.filter(model.habit_id.in_(habit_ids))
+            query.delete(synchronize_session=False)
+
+    def rebuild_all(self, habits: Iterable[Habit], batch_size: int = 1000) -> int:
+        """Recompute rollups for many habits from a single event scan.
+
+        Habits with archived history are skipped: replaying ``events`` would
+        drop the archived months from their rollups.
+        """
+        habits = list(habits)
+        history_start = archived_history_start(self.db)
+        habits_by_id = {habit.id: habit for habit in habits if has_full_history(habit, history_start)}
+        if len(habits_by_id) < len(habits):
+            logger.warning(f"Not rebuilding {len(habits) - len(habits_by_id)} rollups: their history is archived")
+        if not habits_by_id:
+            return 0
+
+        habit_ids = list(habits_by_id)
+        self.reset(habit_ids)
+
+        events = self.db.query(Event.habit_id, Event.ts).filter(
+            Event.habit_id.in_(habit_ids),
+            Event.type == "checkin"
+        ).yield_per(batch_size)
+
+        self.record_checkins(habits_by_id, events)
+        self.db.commit()
+        return len(habits_by_id)
+
+    def hour_counts_since(self, habit_id, since: date) -> Dict[int, int]:
+        """Checkins per local hour on or after ``since``, from daily rollups."""
+        rows = self.db.query(
+            HabitDailyRollup.hour, func.sum(HabitDailyRollup.checkins)
+        ).filter(
+            HabitDailyRollup.habit_id == habit_id,
+            HabitDailyRollup.day >= since
+        ).group_by(HabitDailyRollup.hour).all()
+
+        return {hour: int(count) for hour, count in rows}
+
+    def hour_of_week_counts(self, habit_id) -> Dict[int, int]:
+        """All-time checkins per local hour of week."""
+        rows = self.db.query(
+            HabitHourRollup.hour_of_week, HabitHourRollup.checkins
+        ).filter(HabitHourRollup.habit_id == habit_id).all()
+
+        return {hour_of_week: checkins for hour_of_week, checkins in rows}
@@ -0,0 +1,115 @@
+"""Compiled habit schedules with constant-time due-date queries.
+
+Every supported ``schedule_json`` repeats weekly, so it compiles to a 7-bit
+mask of due weekdays (bit 0 = Monday ... bit 6 = Sunday, as in the reminder
+planner). Dates passed to a compiled schedule are local dates in the habit's
+timezone; ``local_today`` gives the current one. Compiled schedules are
+cached by their canonical JSON, since the same few schedules repeat across
+most habits.
+
+Supported schedules:
+
+- ``{"type": "daily"}`` (also the fallback for unknown types)
+- ``{"type": "weekly", "days": [1, 3, 5]}`` with ISO weekdays, Monday = 1
+- ``{"type": "times_per_week", "count": 3}``, due on ``count`` days spread
+  evenly over the week
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.utils.timezones import get_zone
+
+ALL_DAYS = (1 << 7) - 1
+DEFAULT_TIMES_PER_WEEK = 3  # The habit form's default count
+
+
+def days_mask(days) -> int:
+    """Bitmask of ISO weekdays (Monday = 1, Sunday = 7)."""
+    mask = 0
+    for day in days:
+        if isinstance(day, int) and 1 <= day <= 7:
+            mask |= 1 << (day - 1)
+    return mask
+
+
+def spread_mask(count: int) -> int:
+    """``count`` weekdays spaced as evenly as possible, centred in the week."""
+    if count >= 7:
+        return ALL_DAYS
+    mask = 0
+    for i in range(max(count, 0)):
+        mask |= 1 << ((2 * i + 1) * 7 // (2 * count))
+    return mask
+
+
+@dataclass(frozen=True)
+class CompiledSchedule:
+    """A weekly due-day bitmap."""
+    mask: int
+
+    @property
+    def per_week(self) -> int:
+        return self.mask.bit_count()
+
+    def due_on(self, day: date) -> bool:
+        return bool(self.mask >> day.weekday() & 1)
+
+    def due_count(self, start: date, end: date) -> int:
+        """Due days from ``start`` to ``end``, both inclusive."""
+        if end < start:
+            return 0
+        return self._due_before(end + timedelta(days=1)) - self._due_before(start)
+
+    def next_due(self, day: date, inclusive: bool = True) -> Optional[date]:
+        """First due date on or after ``day`` (after it, when not ``inclusive``)."""
+        if not self.mask:
+            return None
+        if not inclusive:
+            day += timedelta(days=1)
+        weekday = day.weekday()
+        # Rotate so bit 0 is ``day``; the lowest set bit is the offset
+        rotated = (self.mask >> weekday | self.mask << (7 - weekday)) & ALL_DAYS
+        return day + timedelta(days=(rotated & -rotated).bit_length() - 1)
+
+    def _due_before(self, day: date) -> int:
+        """Due days from the epoch Monday up to, not including, ``day``."""
+        weeks, weekday = divmod(day.toordinal() - 1, 7)  # date(1, 1, 1) is a Monday
+        return weeks * self.per_week + (self.mask & ((1 << weekday) - 1)).bit_count()
+
+
+@lru_cache(maxsize=1024)
+def _compile(key: str) -> CompiledSchedule:
+    schedule: Dict[str, Any] = json.loads(key) or {}
+    schedule_type = schedule.get("type")
+
+    if schedule_type == "weekly":
+        return CompiledSchedule(days_mask(schedule.get("days") or []))
+    if schedule_type == "times_per_week":
+        count = schedule.get("count")
+        return CompiledSchedule(spread_mask(count if isinstance(count, int) else DEFAULT_TIMES_PER_WEEK))
+    return CompiledSchedule(ALL_DAYS)
+
+
+def compile_schedule(schedule: Optional[Dict[str, Any]]) -> CompiledSchedule:
+    """Compiled form of a habit's ``schedule_json``, cached per distinct schedule."""
+    return _compile(json.dumps(schedule or {}, sort_keys=True, default=str))
+
+
+def local_today(tz_name: Optional[str], now: Optional[datetime] = None) -> date:
+    """Today's date in ``tz_name``."""
+    zone = get_zone(tz_name)
+    return now.astimezone(zone).date() if now is not None else datetime.now(zone).date()
+
+
+def iter_weeks(start: date, end: date) -> Iterator[Tuple[date, date, date]]:
+    """(week start, first day, last day) for each Monday-based week overlapping ``start``..``end``."""
+    day = start
+    while day <= end:
+        week_start = day - timedelta(days=day.weekday())
+        last = min(end, week_start + timedelta(days=6))
+        yield week_start, day, last
+        day = last + timedelta(days=1)
@@ -1,9 +1,21 @@
 """Scheduler service for habit reminders."""
 
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from collections import defaultdict
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.email import email_service
+from app.models.user import User
+from app.models.event import Event
+from app.models.digest_run import DigestRun
+from app.services.bandit_service import BanditService
+from app.services.reminder_planner import ReminderPlanner
 
 logger = logging.getLogger(__name__)
 
@@ -11,13 +23,212 @@ logger = logging.getLogger(__name__)
 class SchedulerService:
     """Service for scheduling habit reminders."""
     
-    def __init__(self):
-        self.scheduler_interval_minutes = 15
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+        self.scheduler_interval_minutes = settings.scheduler_interval_minutes
     
     def should_send_reminder(self, habit: Dict[str, Any]) -> bool:
         """Check if a reminder should be sent for a habit."""
         # Simple logic: send reminder if habit is due today and not completed
         return habit.get('is_due_today', False) and not habit.get('completed_today', False)
+    
+    def run_reminders(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Plan and send all reminders due in this tick."""
+        started = time.perf_counter()
+        bandit_service = BanditService(self.db)
+        planner = ReminderPlanner(self.db, self.scheduler_interval_minutes, bandit=bandit_service)
+        plan = planner.plan(now)
+        planned_at = time.perf_counter()
+        
+        if not plan:
+            return {"due": 0, "sent": 0, "plan_ms": round((planned_at - started) * 1000, 1)}
+        
+        results = asyncio.run(self._send_reminders(plan))
+        sent = [item for item, ok in zip(plan, results) if ok]
+        
+        # Failed sends are unclaimed for a later tick; only delivered ones count
+        # as reminder_sent events and bandit pulls
+        planner.release([(item["habit_id"], item["local_date"]) for item, ok in zip(plan, results) if not ok])
+        now = now or datetime.utcnow()
+        self.db.add_all([
+            Event(
+                user_id=item["user_id"],
+                habit_id=item["habit_id"],
+                type="reminder_sent",
+                ts=now,
+                payload={"hour": item["hour"]}
+            )
+            for item in sent
+        ])
+        self.db.commit()
+        
+        for item in sent:
+            bandit_service.record_pull(item["habit_id"], item["hour"])
+        bandit_service.flush()
+        
+        return {
+            "due": len(plan),
+            "sent": len(sent),
+            "plan_ms": round((planned_at - started) * 1000, 1),
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "email": email_service.dispatcher.tick_metrics(),
+        }
+    
+    def run_weekly_digest(self, now: Optional[datetime] = None, chunk_size: Optional[int] = None,
+                          period_start: Optional[datetime] = None) -> Dict[str, Any]:
+        """Send weekly digests, streaming users in keyset-ordered chunks.
+        
+        Progress is checkpointed in ``digest_runs`` after every chunk, so a
+        run that crashed part-way resumes after the last processed user. A
+        period whose run completed is not sent again.
+        """
+        now = now or datetime.utcnow()
+        chunk_size = chunk_size or settings.digest_chunk_size
+        period_start = period_start or datetime.combine(now.date() - timedelta(days=now.weekday()), datetime.min.time())
+        period_end = period_start + timedelta(days=7)
+        
+        run = self._get_or_start_digest_run(period_start)
+        if run is None:
+            logger.info(f"Weekly digest for {period_start.date()} already sent")
+            return {"run_id": None, "skipped": True, "count_sent": 0, "chunks": []}
+        resumed_from = run.cursor_user_id
+        timings = []
+        
+        while True:
+            chunk_started = time.perf_counter()
+            query = self.db.query(User.id, User.email).filter(User.is_active.isnot(False))
+            if run.cursor_user_id is not None:
+                query = query.filter(User.id > run.cursor_user_id)
+            users = query.order_by(User.id).limit(chunk_size).all()
+            if not users:
+                break
+            
+            insights = self._weekly_insights([user_id for user_id, _ in users], period_start, period_end)
+            queried_at = time.perf_counter()
+            
+            sent = asyncio.run(self._send_digests([
+                (email, insights[user_id]) for user_id, email in users if user_id in insights
+            ]))
+            sent_at = time.perf_counter()
+            
+            run.cursor_user_id = users[-1][0]
+            run.count_sent += sent
+            run.chunks_done += 1
+            self.db.commit()
+            
+            timings.append({
+                "chunk": run.chunks_done,
+                "users": len(users),
+                "sent": sent,
+                "query_ms": round((queried_at - chunk_started) * 1000, 1),
+                "send_ms": round((sent_at - queried_at) * 1000, 1),
+            })
+            logger.info(f"Digest chunk {run.chunks_done}: {timings[-1]}")
+        
+        run.status = "completed"
+        run.finished_at = datetime.utcnow()
+        self.db.commit()
+        
+        return {
+            "run_id": str(run.id),
+            "resumed": resumed_from is not None,
+            "count_sent": run.count_sent,
+            "chunks": timings,
+        }
+    
+    def resume_weekly_digest(self, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Finish an unfinished run of the current or previous period, e.g. after a restart."""
+        now = now or datetime.utcnow()
+        since = datetime.combine(now.date() - timedelta(days=now.weekday() + 7), datetime.min.time())
+        run = self.db.query(DigestRun).filter(
+            DigestRun.status == "running",
+            DigestRun.period_start >= since
+        ).order_by(DigestRun.period_start.desc()).first()
+        
+        if run is None:
+            return None
+        return self.run_weekly_digest(now, period_start=run.period_start)
+    
+    def _get_or_start_digest_run(self, period_start: datetime) -> Optional[DigestRun]:
+        """Resume this period's unfinished run, or start a new one.
+        
+        Returns None when the period's digest has already been sent.
+        """
+        runs = self.db.query(DigestRun).filter(
+            DigestRun.period_start == period_start,
+            DigestRun.status.in_(("running", "completed"))
+        ).order_by(DigestRun.ran_at.desc()).all()
+        
+        if any(run.status == "completed" for run in runs):
+            return None
+        
+        if runs:
+            run = runs[0]
+            logger.info(f"Resuming digest run {run.id} after user {run.cursor_user_id}")
+            return run
+        
+        # Runs left over from earlier periods will never be resumed
+        self.db.query(DigestRun).filter(
+            DigestRun.status == "running",
+            DigestRun.period_start != period_start
+        ).update({"status": "abandoned"}, synchronize_session=False)
+        
+        run = DigestRun(period_start=period_start, status="running", count_sent=0, chunks_done=0)
+        self.db.add(run)
+        self.db.commit()
+        return run
+    
+    def _weekly_insights(self, user_ids: List, since: datetime, until: datetime) -> Dict[Any, Dict[str, Any]]:
+        """Aggregate a chunk of users' weekly checkins/misses in one grouped query."""
+        rows = self.db.query(
+            Event.user_id,
+            Event.habit_id,
+            func.sum(case((Event.type == "checkin", 1), else_=0)),
+            func.sum(case((Event.type == "miss", 1), else_=0))
+        ).filter(
+            Event.user_id.in_(user_ids),
+            Event.type.in_(("checkin", "miss")),
+            Event.ts >= since,
+            Event.ts < until
+        ).group_by(Event.user_id, Event.habit_id).all()
+        
+        per_user = defaultdict(list)
+        for user_id, _, checkins, misses in rows:
+            per_user[user_id].append((checkins or 0, misses or 0))
+        
+        insights = {}
+        for user_id, habits in per_user.items():
+            checkins = sum(c for c, _ in habits)
+            total = sum(c + m for c, m in habits)
+            habit_rates = [c / (c + m) for c, m in habits if c + m]
+            insights[user_id] = {
+                "completion_rate": checkins / total if total else 0.0,
+                "streak_health_score": round(100 * sum(habit_rates) / len(habit_rates)) if habit_rates else 0,
+            }
+        
+        return insights
+    
+    async def _send_digests(self, digests: List) -> int:
+        results = await asyncio.gather(*[
+            email_service.send_weekly_digest(email, insights)
+            for email, insights in digests
+        ])
+        return sum(1 for ok in results if ok)
+    
+    async def _send_reminders(self, plan: List[Dict[str, Any]]) -> List[bool]:
+        """Whether each planned reminder was sent; a send that raises counts as failed."""
+        results = await asyncio.gather(*[
+            email_service.send_reminder(
+                item["email"],
+                item["habit_title"],
+                f"{settings.app_base_url}/checkin?habit_id={item['habit_id']}"
+            )
+            for item in plan
+        ], return_exceptions=True)
+        for item, result in zip(plan, results):
+            if isinstance(result, Exception):
+                logger.error(f"Reminder for habit {item['habit_id']} failed: {result}")
+        return [bool(result) and not isinstance(result, Exception) for result in results]
 
 
 class SmartReminderService:
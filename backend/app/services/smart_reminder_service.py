@@ -1,81 +1,95 @@
 """Smart reminder service for analyzing optimal reminder times."""
 
-import pandas as pd
+import uuid
 from datetime import datetime, timedelta
 from collections import defaultdict
 from typing import Optional, Dict, Any
 
-from app.models.habit_completion import HabitCompletion
+from app.core.cache import result_cache
+from app.services.rollup_service import RollupService
+from app.utils.timezones import get_zone
 
 
 class SmartReminderService:
-    """Service for analyzing user behavior and suggesting optimal reminder times."""
-    
-    def __init__(self, db):
+    """Service for analyzing user behavior and suggesting optimal reminder times.
+
+    Answers come from the habit's checkin rollups rather than raw completions.
+    """
+
+    def __init__(self, db, cache=None):
         self.db = db
-    
-    def analyze_optimal_reminder_time(self, user_id: str, habit_id: str) -> Optional[Dict[str, Any]]:
-        """Analyze when user typically completes habits to suggest best reminder time."""
-        
-        # Get completion data (pure software engineering)
-        completions = self.db.query(HabitCompletion).filter(
-            HabitCompletion.user_id == user_id,
-            HabitCompletion.habit_id == habit_id,
-            HabitCompletion.completed_at.isnot(None)
-        ).all()
-        
-        if len(completions) < 3:
-            return None  # Not enough data
-        
-        # Simple pattern analysis (no external APIs)
-        completion_hours = [c.completed_at.hour for c in completions]
+        self.rollups = RollupService(db)
+        self.cache = cache or result_cache
+
+    def analyze_optimal_reminder_time(
+        self,
+        user_id: uuid.UUID,
+        habit_id: uuid.UUID,
+        version: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Analyze when user typically completes habits to suggest best reminder time.
+
+        With the user's data ``version``, the result is cached until it changes.
+        """
+        if version is None:
+            return self._analyze_optimal_reminder_time(habit_id)
+
+        return self.cache.get_or_compute(
+            f"optimal_reminder:{habit_id}:{version}",
+            lambda: self._analyze_optimal_reminder_time(habit_id)
+        )
+
+    def _analyze_optimal_reminder_time(self, habit_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        # Fold the hour-of-week rollup (at most 168 cells) into hours of day
         success_by_hour = defaultdict(int)
-        
-        for hour in completion_hours:
-            success_by_hour[hour] += 1
-        
+        for hour_of_week, count in self.rollups.hour_of_week_counts(habit_id).items():
+            success_by_hour[hour_of_week % 24] += count
+
+        total_completions = sum(success_by_hour.values())
+        if total_completions < 3:
+            return None  # Not enough data
+
         # Find peak completion time
         best_hour = max(success_by_hour.items(), key=lambda x: x[1])[0]
-        
+
         return {
             "suggested_reminder_hour": max(6, best_hour - 1),  # Remind 1 hour before peak
-            "confidence": len(completions),
+            "confidence": total_completions,
             "pattern": dict(success_by_hour)
         }
-    
-    def get_completion_stats(self, user_id: str, habit_id: str, days: int = 30) -> Dict[str, Any]:
+
+    def get_completion_stats(
+        self,
+        user_id: uuid.UUID,
+        habit_id: uuid.UUID,
+        days: int = 30,
+        tz_name: str = "UTC"
+    ) -> Dict[str, Any]:
         """Get completion statistics for a habit."""
-        
-        since_date = datetime.utcnow() - timedelta(days=days)
-        completions = self.db.query(HabitCompletion).filter(
-            HabitCompletion.user_id == user_id,
-            HabitCompletion.habit_id == habit_id,
-            HabitCompletion.completed_at >= since_date
-        ).all()
-        
-        if not completions:
+
+        # The last ``days`` local days, today included
+        since_date = datetime.now(get_zone(tz_name)).date() - timedelta(days=days - 1)
+        hour_counts = self.rollups.hour_counts_since(habit_id, since_date)
+
+        if not hour_counts:
             return {
                 "total_completions": 0,
                 "completion_rate": 0.0,
                 "average_daily": 0.0,
                 "best_hour": None
             }
-        
+
         # Calculate statistics
-        total_completions = len(completions)
+        total_completions = sum(hour_counts.values())
         completion_rate = total_completions / days
-        
+
         # Find most common completion hour
-        hour_counts = defaultdict(int)
-        for completion in completions:
-            hour_counts[completion.completed_at.hour] += 1
-        
-        best_hour = max(hour_counts.items(), key=lambda x: x[1])[0] if hour_counts else None
-        
+        best_hour = max(hour_counts.items(), key=lambda x: x[1])[0]
+
         return {
             "total_completions": total_completions,
             "completion_rate": round(completion_rate, 2),
             "average_daily": round(total_completions / days, 2),
             "best_hour": best_hour,
-            "hour_distribution": dict(hour_counts)
+            "hour_distribution": hour_counts
         }
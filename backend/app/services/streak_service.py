@@ -1,80 +1,308 @@
 """Streak service for calculating habit streaks."""
 
-from typing import Dict, Any
-from datetime import datetime, timedelta
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.models.habit import Habit
-from app.models.habit_completion import HabitCompletion
+from app.models.event import Event
+from app.models.event_archive import EventArchive
+from app.models.streak import Streak
+from app.services.schedule_engine import compile_schedule, iter_weeks, local_today
+from app.utils.timezones import to_local
+
+logger = logging.getLogger(__name__)
+
+STREAK_EVENT_TYPES = ("checkin", "miss")
+
+
+def archived_history_start(db: Session) -> Optional[date]:
+    """First month whose events are all still in ``events``; None if nothing was archived."""
+    last = db.query(func.max(EventArchive.month)).scalar()
+    return (last.replace(day=28) + timedelta(days=4)).replace(day=1) if last else None
+
+
+def has_full_history(habit: Habit, history_start: Optional[date]) -> bool:
+    """Whether every event of the habit is still in ``events`` to replay."""
+    if history_start is None:
+        return True
+    return habit.created_at is not None and habit.created_at.date() >= history_start
 
 
 class StreakService:
-    """Service for calculating and managing habit streaks."""
-    
+    """Service for calculating and managing habit streaks.
+
+    Streaks are materialized in the ``streaks`` table and advanced one event
+    at a time, so reads never have to rescan completion history.
+
+    Once old months of events are archived, a habit created before them can
+    no longer be replayed in full. Its streak is not rebuilt; late events are
+    applied to the materialized streak instead.
+    """
+
     def __init__(self, db: Session):
         self.db = db
-    
-    def get_streak_summary(self, habit: Habit) -> Dict[str, Any]:
-        """Get streak summary for a habit."""
-        
-        # Get recent completions
-        since_date = datetime.utcnow() - timedelta(days=30)
-        completions = self.db.query(HabitCompletion).filter(
-            HabitCompletion.habit_id == habit.id,
-            HabitCompletion.completed_at >= since_date
-        ).all()
-        
-        # Calculate current streak
-        current_streak = self.calculate_current_streak(completions)
-        
-        # Check if due today
-        is_due_today = self.is_due_today(habit, completions)
-        
+        self._history_start: Optional[date] = None
+        self._history_checked = False
+
+    def get_streak_summary(self, habit: Habit, streak: Optional[Streak] = None) -> Dict[str, Any]:
+        """Get streak summary for a habit from its materialized streak row."""
+        if streak is None:
+            streak = self.db.query(Streak).filter(Streak.habit_id == habit.id).first()
+
+        return self.summarize(habit, streak)
+
+    def summarize(self, habit: Habit, streak: Optional[Streak]) -> Dict[str, Any]:
+        """Build a streak summary from an already-loaded streak row (may be None)."""
+        today = self.local_today(habit)
+
         return {
-            "current_streak_length": current_streak,
-            "is_due_today": is_due_today
+            "current_streak_length": self.current_length(habit, streak, today),
+            "is_due_today": self.is_due_today(habit, streak, today)
         }
-    
-    def calculate_current_streak(self, completions) -> int:
-        """Calculate current streak length."""
-        if not completions:
+
+    def current_length(self, habit: Habit, streak: Optional[Streak], today: date) -> int:
+        """Return the streak length as of ``today`` without mutating state.
+
+        Due days that passed since the last event are charged against the
+        remaining weekly grace; if they exhaust it the streak has lapsed.
+        """
+        if streak is None or not streak.length_days or streak.last_event_date is None:
             return 0
-        
-        # Sort by completion date (most recent first)
-        sorted_completions = sorted(completions, key=lambda x: x.completed_at, reverse=True)
-        
-        streak = 0
-        current_date = datetime.utcnow().date()
-        
-        for completion in sorted_completions:
-            completion_date = completion.completed_at.date()
-            days_diff = (current_date - completion_date).days
-            
-            if days_diff == streak:
-                streak += 1
-                current_date = completion_date
-            elif days_diff == streak + 1:
-                # Allow for one day gap
-                streak += 1
-                current_date = completion_date
+
+        schedule = compile_schedule(habit.schedule_json)
+        grace_week_start = streak.grace_week_start
+        grace_used = streak.grace_used or 0
+
+        gap = iter_weeks(streak.last_event_date + timedelta(days=1), today - timedelta(days=1))
+        for week_start, first, last in gap:
+            missed = schedule.due_count(first, last)
+            if not missed:
+                continue
+            if week_start != grace_week_start:
+                grace_week_start = week_start
+                grace_used = 0
+            if grace_used + missed > habit.grace_per_week:
+                return 0
+            grace_used += missed
+
+        return streak.length_days
+
+    def is_due_today(self, habit: Habit, streak: Optional[Streak], today: date) -> bool:
+        """Check if habit is due today and not yet checked in."""
+        if streak is not None and streak.last_checkin_date == today:
+            return False
+
+        return self.is_due_on_date(habit, today)
+
+    def is_due_on_date(self, habit: Habit, check_date: date) -> bool:
+        """Check if habit is due on a specific local date."""
+        return compile_schedule(habit.schedule_json).due_on(check_date)
+
+    def local_today(self, habit: Habit) -> date:
+        """Today's date in the habit's timezone."""
+        return local_today(habit.timezone)
+
+    def local_date(self, habit: Habit, ts: datetime) -> date:
+        """Convert an event timestamp to a date in the habit's timezone."""
+        return to_local(ts, habit.timezone).date()
+
+    def update_streak(self, habit: Habit, event: Optional[Event] = None) -> Streak:
+        """Update streak for a habit.
+
+        With an event, the stored streak is advanced incrementally. Without
+        one, the streak is rebuilt by replaying the habit's events.
+        """
+        if event is None:
+            streak = self.rebuild_streak(habit)
+        else:
+            streak = self._get_or_create(habit)
+            self.apply_event(habit, streak, event.type, self.local_date(habit, event.ts))
+
+        self.db.commit()
+        return streak
+
+    def apply_event(self, habit: Habit, streak: Streak, event_type: str, event_date: date):
+        """Advance streak state by a single checkin or miss on ``event_date``."""
+        if event_type not in STREAK_EVENT_TYPES:
+            return
+
+        last = streak.last_event_date
+        if last is not None and event_date <= last:
+            # Duplicate or out-of-order event; a rebuild will reconcile it
+            if event_type == "checkin" and event_date == last and streak.last_checkin_date != last:
+                streak.last_checkin_date = event_date
+            return
+
+        lapsed = streak.length_days == 0 or last is None
+        if not lapsed:
+            schedule = compile_schedule(habit.schedule_json)
+            gap = iter_weeks(last + timedelta(days=1), event_date - timedelta(days=1))
+            for week_start, first, last_day in gap:
+                missed = schedule.due_count(first, last_day)
+                if missed and not self._use_grace(habit, streak, week_start, missed):
+                    lapsed = True
+                    break
+
+        if event_type == "checkin":
+            if lapsed:
+                streak.start_date = event_date
+                streak.length_days = 1
             else:
-                break
-        
+                streak.length_days += 1
+            streak.last_checkin_date = event_date
+        elif lapsed or not self._use_grace(habit, streak, event_date):
+            streak.start_date = event_date
+            streak.length_days = 0
+
+        streak.last_event_date = event_date
+        streak.updated_at = datetime.utcnow()
+
+    def history_start(self) -> Optional[date]:
+        """First month whose events are all still in ``events``; None if nothing was archived."""
+        if not self._history_checked:
+            self._history_start = archived_history_start(self.db)
+            self._history_checked = True
+        return self._history_start
+
+    def can_rebuild(self, habit: Habit) -> bool:
+        """Whether every event of the habit is still in ``events`` to replay."""
+        return has_full_history(habit, self.history_start())
+
+    def rebuild_streak(self, habit: Habit) -> Streak:
+        """Recompute a habit's streak from scratch by replaying its events.
+
+        A habit with archived history keeps its materialized streak.
+        """
+        if not self.can_rebuild(habit):
+            logger.warning(f"Not rebuilding streak of habit {habit.id}: events before {self.history_start()} are archived")
+            return self._get_or_create(habit)
+
+        events = self.db.query(Event.type, Event.ts).filter(
+            Event.habit_id == habit.id,
+            Event.type.in_(STREAK_EVENT_TYPES)
+        ).order_by(Event.ts).all()
+
+        streak = self._get_or_create(habit)
+        self._reset(streak)
+        for event_type, ts in events:
+            self.apply_event(habit, streak, event_type, self.local_date(habit, ts))
         return streak
-    
-    def is_due_today(self, habit: Habit, completions) -> bool:
-        """Check if habit is due today."""
-        today = datetime.utcnow().date()
-        
-        # Check if already completed today
-        for completion in completions:
-            if completion.completed_at.date() == today:
-                return False
-        
+
+    def rebuild_all(self, habits: Iterable[Habit], batch_size: int = 1000) -> int:
+        """Rebuild streaks for many habits from a single ordered event scan.
+
+        Habits with archived history are skipped.
+        """
+        habits = list(habits)
+        habits_by_id = {habit.id: habit for habit in habits if self.can_rebuild(habit)}
+        if len(habits_by_id) < len(habits):
+            logger.warning(f"Not rebuilding {len(habits) - len(habits_by_id)} streaks: their history is archived")
+        if not habits_by_id:
+            return 0
+
+        streaks = self._load_streaks(list(habits_by_id))
+        for streak in streaks.values():
+            self._reset(streak)
+
+        events = self.db.query(Event.habit_id, Event.type, Event.ts).filter(
+            Event.habit_id.in_(list(habits_by_id)),
+            Event.type.in_(STREAK_EVENT_TYPES)
+        ).order_by(Event.habit_id, Event.ts).yield_per(batch_size)
+
+        self.apply_events(habits_by_id, events, streaks)
+        self.db.commit()
+        return len(habits_by_id)
+
+    def apply_events(self, habits_by_id: Dict, events: Iterable[Tuple], streaks: Optional[Dict] = None):
+        """Apply (habit_id, type, ts) events, in timestamp order per habit.
+
+        Streak rows for all affected habits are loaded in one query; changes
+        are committed with the caller's transaction.
+        """
+        if streaks is None:
+            streaks = self._load_streaks(list(habits_by_id))
+        for habit_id, event_type, ts in events:
+            habit = habits_by_id[habit_id]
+            self.apply_event(habit, streaks[habit_id], event_type, self.local_date(habit, ts))
+
+    def apply_batch(self, habits_by_id: Dict, events: List[Tuple]):
+        """Apply a batch of (habit_id, type, ts) events that may arrive late.
+
+        Habits whose batch reaches back before their last applied event (e.g.
+        an offline sync) are rebuilt from their events once; the rest are
+        advanced incrementally. Late habits with archived history cannot be
+        replayed and are advanced incrementally too.
+        """
+        streaks = self._load_streaks(list(habits_by_id))
+        late = {
+            habit_id for habit_id, _, ts in events
+            if streaks[habit_id].last_event_date is not None
+            and self.local_date(habits_by_id[habit_id], ts) < streaks[habit_id].last_event_date
+        }
+        archived = {habit_id for habit_id in late if not self.can_rebuild(habits_by_id[habit_id])}
+        if archived:
+            logger.warning(f"Applying late events to {len(archived)} streaks incrementally: their history is archived")
+        late -= archived
+
+        for habit_id in late:
+            self.rebuild_streak(habits_by_id[habit_id])
+
+        self.apply_events(
+            habits_by_id,
+            sorted((event for event in events if event[0] not in late), key=lambda event: event[2]),
+            streaks
+        )
+
+    def reset_all(self):
+        """Delete every materialized streak."""
+        self.db.query(Streak).delete(synchronize_session=False)
+
+    def _load_streaks(self, habit_ids: List) -> Dict:
+        """Load streak rows for the given habits, creating missing ones."""
+        streaks = {
+            streak.habit_id: streak
+            for streak in self.db.query(Streak).filter(Streak.habit_id.in_(habit_ids))
+        }
+        for habit_id in habit_ids:
+            if habit_id not in streaks:
+                streaks[habit_id] = Streak(habit_id=habit_id)
+                self._reset(streaks[habit_id])
+                self.db.add(streaks[habit_id])
+        return streaks
+
+    def _use_grace(self, habit: Habit, streak: Streak, day: date, days: int = 1) -> bool:
+        """Spend ``days`` grace days from the week containing ``day`` if enough remain.
+
+        When they don't, the week's grace is used up and the streak lapses.
+        """
+        week_start = day - timedelta(days=day.weekday())
+        if streak.grace_week_start != week_start:
+            streak.grace_week_start = week_start
+            streak.grace_used = 0
+
+        if streak.grace_used + days > habit.grace_per_week:
+            streak.grace_used = max(streak.grace_used, habit.grace_per_week)
+            return False
+
+        streak.grace_used += days
         return True
-    
-    def update_streak(self, habit: Habit):
-        """Update streak for a habit."""
-        # This would typically update a streak record
-        # For now, we'll just log the update
-        pass
\ No newline at end of file
+
+    def _get_or_create(self, habit: Habit) -> Streak:
+        streak = self.db.query(Streak).filter(Streak.habit_id == habit.id).first()
+        if streak is None:
+            streak = Streak(habit_id=habit.id)
+            self._reset(streak)
+            self.db.add(streak)
+        return streak
+
+    def _reset(self, streak: Streak):
+        streak.start_date = datetime.utcnow().date()
+        streak.length_days = 0
+        streak.grace_used = 0
+        streak.grace_week_start = None
+        streak.last_event_date = None
+        streak.last_checkin_date = None
+        streak.updated_at = datetime.utcnow()
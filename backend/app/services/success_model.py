@@ -0,0 +1,335 @@
+"""Trained habit success model: features, training, persistence and batch scoring.
+
+The model is an L2-regularized logistic regression over the completion
+features from ``completion_features``, fitted with Newton's method in NumPy
+so training and scoring stay on CPU without extra dependencies. A training
+example is a habit's history as of a cutoff day; its label is whether the
+habit was completed on at least ``TARGET_DAYS`` of the following
+``HORIZON_DAYS`` days.
+
+Models are saved as versioned JSON files; the nightly scoring job writes one
+probability per habit to ``habit_success_scores`` so reads don't need to
+touch the event history.
+"""
+
+import json
+import logging
+import os
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.db.upsert import upsert_rows
+from app.models.event import Event
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.success_score import HabitSuccessScore
+from app.models.user import User
+from app.services.completion_features import (
+    CompletionFeatures, EPOCH, ONE_MICROSECOND, extract_features
+)
+
+logger = logging.getLogger(__name__)
+
+FEATURE_NAMES = (
+    "current_streak", "consistency_7", "consistency_30", "log_total", "recent_7", "days_since_last"
+)
+HORIZON_DAYS = 7
+TARGET_DAYS = 5
+MAX_GAP_DAYS = 365.0  # days_since_last for habits never completed, and its cap
+MODEL_PREFIX = "success_model-"
+
+
+def feature_row(features: CompletionFeatures) -> List[float]:
+    """Model inputs for one feature set, in ``FEATURE_NAMES`` order."""
+    gap = MAX_GAP_DAYS if features.days_since_last is None else min(features.days_since_last, MAX_GAP_DAYS)
+    return [
+        float(features.current_streak),
+        features.consistency_7,
+        features.consistency_30,
+        float(np.log1p(features.total)),
+        float(features.recent_7),
+        gap,
+    ]
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+
+
+@dataclass
+class SuccessModel:
+    """Standardized logistic regression weights plus training metadata."""
+    version: str
+    coef: List[float]
+    intercept: float
+    mean: List[float]
+    scale: List[float]
+    feature_names: Sequence[str] = FEATURE_NAMES
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = (np.asarray(X, dtype=float) - np.asarray(self.mean)) / np.asarray(self.scale)
+        return _sigmoid(X @ np.asarray(self.coef) + self.intercept)
+
+    def score(self, features: CompletionFeatures) -> float:
+        return float(self.predict_proba(np.array([feature_row(features)]))[0])
+
+    def save(self, model_dir: str) -> str:
+        """Write ``success_model-<version>.json`` and return its path."""
+        os.makedirs(model_dir, exist_ok=True)
+        path = os.path.join(model_dir, f"{MODEL_PREFIX}{self.version}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({**asdict(self), "feature_names": list(self.feature_names)}, f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "SuccessModel":
+        with open(path) as f:
+            data = json.load(f)
+        if tuple(data["feature_names"]) != FEATURE_NAMES:
+            raise ValueError(f"Model {path} was trained on different features: {data['feature_names']}")
+        return cls(**data)
+
+
+def fit_logistic(X: np.ndarray, y: np.ndarray, version: str, l2: float = 1.0,
+                 iterations: int = 50, tol: float = 1e-8) -> SuccessModel:
+    """Fit an L2-regularized logistic regression by Newton's method."""
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+
+    A = np.hstack([np.ones((len(X), 1)), (X - mean) / scale])
+    penalty = np.full(A.shape[1], l2)
+    penalty[0] = 1e-9  # Don't shrink the intercept
+    w = np.zeros(A.shape[1])
+
+    for _ in range(iterations):
+        p = _sigmoid(A @ w)
+        gradient = A.T @ (p - y) + penalty * w
+        hessian = (A * (p * (1 - p))[:, None]).T @ A + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.max(np.abs(step)) < tol:
+            break
+
+    return SuccessModel(
+        version=version, coef=w[1:].tolist(), intercept=float(w[0]),
+        mean=mean.tolist(), scale=scale.tolist()
+    )
+
+
+def roc_auc(scores: np.ndarray, y: np.ndarray) -> Optional[float]:
+    """Area under the ROC curve via the rank-sum statistic, with tied ranks averaged."""
+    y = np.asarray(y, dtype=bool)
+    positives, negatives = int(y.sum()), int((~y).sum())
+    if not positives or not negatives:
+        return None
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    # Average 1-based rank of each distinct score
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    return float((ranks[y].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def evaluate(probabilities: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+    """AUC, log loss and Brier score of probabilities against labels."""
+    p = np.clip(np.asarray(probabilities, dtype=float), 1e-6, 1 - 1e-6)
+    y = np.asarray(y, dtype=float)
+    auc = roc_auc(p, y)
+    return {
+        "examples": len(y),
+        "positive_rate": round(float(y.mean()), 4) if len(y) else None,
+        "auc": round(auc, 4) if auc is not None else None,
+        "log_loss": round(float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))), 4) if len(y) else None,
+        "brier": round(float(np.mean((p - y) ** 2)), 4) if len(y) else None,
+    }
+
+
+def load_timelines(db: Session, habit_ids: Optional[Sequence] = None,
+                   chunk_size: int = 10000) -> Dict[Any, np.ndarray]:
+    """Sorted checkin times per habit from ``events`` and ``habit_completions``.
+
+    Identical timestamps recorded in both tables are counted once.
+    ``habit_completions`` is skipped on databases that don't have it (no
+    migration creates it).
+    """
+    offsets = defaultdict(list)
+    sources = [(Event.habit_id, Event.ts, Event.type == "checkin")]
+    if _has_completions_table(db):
+        sources.append((HabitCompletion.habit_id, HabitCompletion.completed_at, None))
+    for habit_column, ts_column, condition in sources:
+        query = db.query(habit_column, ts_column)
+        if condition is not None:
+            query = query.filter(condition)
+        if habit_ids is not None:
+            query = query.filter(habit_column.in_(habit_ids))
+        for habit_id, ts in query.yield_per(chunk_size):
+            if ts.tzinfo is not None:
+                ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+            offsets[habit_id].append((ts - EPOCH) // ONE_MICROSECOND)
+
+    return {
+        habit_id: np.unique(np.array(values, dtype=np.int64)).view("datetime64[us]")
+        for habit_id, values in offsets.items()
+    }
+
+
+_completions_table: Dict[Any, bool] = {}
+
+
+def _has_completions_table(db: Session) -> bool:
+    bind = db.get_bind()
+    if bind.url not in _completions_table:
+        _completions_table[bind.url] = inspect(bind).has_table(HabitCompletion.__tablename__)
+    return _completions_table[bind.url]
+
+
+class Examples(NamedTuple):
+    features: List[CompletionFeatures]
+    X: np.ndarray
+    y: np.ndarray
+    cutoffs: np.ndarray
+
+
+def build_examples(timelines: Dict[Any, np.ndarray], until: datetime, step_days: int = 7) -> Examples:
+    """One example per habit and cutoff day with a full label horizon before ``until``.
+
+    Cutoffs start the day after a habit's first completion and advance by
+    ``step_days``; features only see completions before the cutoff.
+    """
+    horizon = np.timedelta64(HORIZON_DAYS, "D")
+    last_cutoff = np.datetime64(until, "D") - horizon
+    features, labels, cutoffs = [], [], []
+
+    for times in timelines.values():
+        if not len(times):
+            continue
+        first_day = times[0].astype("datetime64[D]") + np.timedelta64(1, "D")
+        for cutoff in np.arange(first_day, last_cutoff + np.timedelta64(1, "D"), np.timedelta64(step_days, "D")):
+            start = cutoff.astype("datetime64[us]")
+            before = int(np.searchsorted(times, start, side="left"))
+            after = int(np.searchsorted(times, start + horizon, side="left"))
+            features.append(extract_features(times[:before], start.astype(datetime)))
+            labels.append(len(np.unique(times[before:after].astype("datetime64[D]"))) >= TARGET_DAYS)
+            cutoffs.append(cutoff)
+
+    X = np.array([feature_row(f) for f in features], dtype=float).reshape(len(features), len(FEATURE_NAMES))
+    return Examples(features, X, np.array(labels, dtype=float), np.array(cutoffs, dtype="datetime64[D]"))
+
+
+def time_split(cutoffs: np.ndarray, test_fraction: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Boolean train/test masks holding out the latest ``test_fraction`` of cutoff days."""
+    days = np.unique(cutoffs)
+    if len(days) < 2 or test_fraction <= 0:
+        return np.ones(len(cutoffs), dtype=bool), np.zeros(len(cutoffs), dtype=bool)
+    boundary = days[max(1, int(len(days) * (1 - test_fraction)))]
+    return cutoffs < boundary, cutoffs >= boundary
+
+
+def train(db: Session, now: Optional[datetime] = None, step_days: int = 7, test_fraction: float = 0.2,
+          l2: float = 1.0, baseline: Optional[Callable[[CompletionFeatures], float]] = None) -> SuccessModel:
+    """Fit a model on every habit's history and record held-out metrics.
+
+    The latest ``test_fraction`` of cutoff days is held out for evaluation
+    (alongside ``baseline``, when given), then the saved model is refitted
+    on all examples.
+    """
+    now = now or datetime.utcnow()
+    examples = build_examples(load_timelines(db), now, step_days)
+    if len(np.unique(examples.y)) < 2:
+        raise ValueError(f"Need examples with both outcomes to train, got {len(examples.y)} examples")
+
+    train_mask, test_mask = time_split(examples.cutoffs, test_fraction)
+    version = now.strftime("%Y%m%dT%H%M%S")
+    metrics = {"trained_at": now.isoformat(), "horizon_days": HORIZON_DAYS, "target_days": TARGET_DAYS}
+
+    if test_mask.any() and len(np.unique(examples.y[train_mask])) == 2:
+        held_out = fit_logistic(examples.X[train_mask], examples.y[train_mask], version, l2)
+        metrics["train_examples"] = int(train_mask.sum())
+        metrics["test"] = evaluate(held_out.predict_proba(examples.X[test_mask]), examples.y[test_mask])
+        if baseline is not None:
+            rule_scores = [baseline(f) for f, held in zip(examples.features, test_mask) if held]
+            metrics["baseline_test"] = evaluate(np.array(rule_scores), examples.y[test_mask])
+
+    model = fit_logistic(examples.X, examples.y, version, l2)
+    model.metrics = {**metrics, "examples": len(examples.y)}
+    return model
+
+
+def latest_model_path(model_dir: str) -> Optional[str]:
+    """Path of the newest saved model; versions sort chronologically."""
+    try:
+        names = [
+            name for name in os.listdir(model_dir)
+            if name.startswith(MODEL_PREFIX) and name.endswith(".json")
+        ]
+    except FileNotFoundError:
+        return None
+    return os.path.join(model_dir, max(names)) if names else None
+
+
+_loaded: Dict[str, Tuple[str, float, SuccessModel]] = {}
+
+
+def current_model(model_dir: str) -> Optional[SuccessModel]:
+    """Newest model in ``model_dir``, loaded once per process and file version."""
+    path = latest_model_path(model_dir)
+    if path is None:
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _loaded.get(model_dir)
+    if cached is None or cached[:2] != (path, mtime):
+        try:
+            _loaded[model_dir] = (path, mtime, SuccessModel.load(path))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not load success model {path}: {e}")
+            return None
+    return _loaded[model_dir][2]
+
+
+def score_habits(db: Session, model: SuccessModel, now: Optional[datetime] = None,
+                 chunk_size: int = 500) -> int:
+    """Precompute success probabilities for every habit, keyset-chunked by habit id."""
+    now = now or datetime.utcnow()
+    scored = 0
+    last_id = None
+
+    while True:
+        query = db.query(Habit.id, User.data_version).join(User, User.id == Habit.user_id)
+        if last_id is not None:
+            query = query.filter(Habit.id > last_id)
+        habits = query.order_by(Habit.id).limit(chunk_size).all()
+        if not habits:
+            break
+
+        timelines = load_timelines(db, [habit_id for habit_id, _ in habits])
+        empty = np.array([], dtype="datetime64[us]")
+        features = [extract_features(timelines.get(habit_id, empty), now) for habit_id, _ in habits]
+        probabilities = model.predict_proba(np.array([feature_row(f) for f in features]))
+
+        upsert_rows(db, HabitSuccessScore, ["habit_id"], [
+            {
+                "habit_id": habit_id,
+                "probability": float(probability),
+                "model_version": model.version,
+                "features": asdict(habit_features),
+                "data_version": data_version or 0,
+                "scored_at": now,
+            }
+            for (habit_id, data_version), habit_features, probability in zip(habits, features, probabilities)
+        ])
+        db.commit()
+
+        scored += len(habits)
+        last_id = habits[-1][0]
+
+    return scored
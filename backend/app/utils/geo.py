@@ -1,3 +1,6 @@
+import re
+from dataclasses import dataclass
+
 US_STATE_TO_ABBR = {
  "alabama":"AL","alaska":"AK","arizona":"AZ","arkansas":"AR","california":"CA","colorado":"CO","connecticut":"CT","delaware":"DE",
  "florida":"FL","georgia":"GA","hawaii":"HI","idaho":"ID","illinois":"IL","indiana":"IN","iowa":"IA","kansas":"KS","kentucky":"KY",
@@ -20,3 +23,48 @@ def expand_location_terms(raw: str) -> list[str]:
         if abbr:
             pats.append(f"%{abbr}%")
     return pats
+
+STATE_CODES = frozenset(US_STATE_TO_ABBR.values())
+COUNTRY_TERMS = frozenset({"us", "usa", "u.s.", "u.s.a.", "united states", "united states of america"})
+REMOTE_RE = re.compile(r"\b(remote|anywhere|work from home|wfh)\b", re.I)
+WORK_MODE_RE = re.compile(r"\b(hybrid|on-?site|in[- ]office)\b", re.I)
+
+@dataclass(frozen=True)
+class Location:
+    """Normalized job location: lowercase city, two-letter state code, remote flag."""
+    city: str | None = None
+    state: str | None = None
+    remote: bool = False
+
+def clean_place(part: str) -> str:
+    """Lowercase, punctuation-free, single-spaced form used for city matching."""
+    return " ".join(re.sub(r"[^\w\s.'-]", " ", part).lower().split())
+
+def state_code(term: str) -> str | None:
+    """State code for a state name or code (any case), else None."""
+    t = clean_place(term)
+    if t.upper() in STATE_CODES and len(t) == 2:
+        return t.upper()
+    return US_STATE_TO_ABBR.get(t)
+
+def normalize_location(raw: str | None) -> Location:
+    """Parse free-text locations like "Austin, TX", "New York, New York (Hybrid)" or "Remote - US".
+
+    The first segment naming a place wins ("Austin, TX; Remote" is Austin,
+    remote). Countries are dropped; a lone state name is a state, not a city.
+    """
+    if not raw:
+        return Location()
+    remote = bool(REMOTE_RE.search(raw))
+    text = re.sub(r"\([^)]*\)", " ", WORK_MODE_RE.sub(" ", REMOTE_RE.sub(" ", raw)))
+
+    for segment in re.split(r"[;|/]| - ", text):
+        parts = [p for p in (clean_place(p) for p in segment.split(",")) if p and p not in COUNTRY_TERMS]
+        if not parts:
+            continue
+        state = state_code(parts[-1])
+        if state:
+            city = parts[-2] if len(parts) > 1 else None
+            return Location(city=city, state=state, remote=remote)
+        return Location(city=parts[0], remote=remote)
+    return Location(remote=remote)
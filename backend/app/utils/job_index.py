@@ -0,0 +1,180 @@
+"""In-memory inverted index over job listings held in Python lists.
+
+The Flask job APIs (``enhanced_app.py``, ``simple-job-api.py``) serve
+listings from module-level lists. ``JobIndex`` tokenizes and lowercases them
+once at load, instead of re-lowercasing every field of every job per request.
+
+- Each field maps term -> {job: BM25 weight}. The weight is computed at
+  load, so scoring a query only adds numbers. A query term also matches
+  the longer terms it prefixes ("engineer" finds "engineering"), found by
+  bisecting the field's sorted vocabulary. Terms shorter than MIN_PREFIX
+  ("c" from "c++") only match themselves, or they would match most jobs.
+- ``mode="and"`` intersects the jobs matching each query term, rarest term
+  first; ``"or"`` unions them. Any other mode raises ValueError.
+- Matches are ranked by BM25, summed over fields weighted by FIELD_WEIGHTS.
+- Locations are indexed by comma-separated part and by word, and queried
+  with ``location_terms``, so a state name also matches its code.
+"""
+
+import bisect
+import heapq
+import math
+import operator
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.utils.geo import expand_location_terms
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+FIELD_WEIGHTS = {"title": 3.0, "company": 2.0, "category": 1.5, "description": 1.0}
+K1, B = 1.2, 0.75  # BM25 term-frequency saturation and length normalization
+MIN_PREFIX = 2  # Shortest query term that also matches longer terms
+MODES = ("and", "or")
+
+
+def tokenize(text: Any) -> List[str]:
+    return TOKEN_RE.findall(str(text or "").lower())
+
+
+def location_terms(raw: Optional[str]) -> List[str]:
+    """Lowercase location terms, each state name followed by its code."""
+    return [pattern.strip("%").lower() for pattern in expand_location_terms(raw or "")]
+
+
+class FieldIndex:
+    """Postings and sorted vocabulary for one field; ``weight`` scales its BM25 scores."""
+
+    def __init__(self, values: Iterable[Any], weight: float = 1.0):
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        lengths: List[int] = []
+        for job, value in enumerate(values):
+            tokens = tokenize(value)
+            lengths.append(len(tokens))
+            for token in tokens:
+                frequencies = self.postings[token]
+                frequencies[job] = frequencies.get(job, 0) + 1
+        self.vocabulary = sorted(self.postings)
+
+        # Replace each term frequency with the job's weighted BM25 score for the term
+        avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        for postings in self.postings.values():
+            idf = math.log(1 + (len(lengths) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for job, tf in postings.items():
+                norm = 1 - B + B * lengths[job] / avg_length
+                postings[job] = weight * idf * tf * (K1 + 1) / (tf + K1 * norm)
+
+    def expand(self, term: str) -> List[str]:
+        """Indexed terms starting with ``term``, or just ``term`` below MIN_PREFIX characters."""
+        if len(term) < MIN_PREFIX:
+            return [term] if term in self.postings else []
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + "\uffff", start)
+        return self.vocabulary[start:end]
+
+    def jobs(self, term: str) -> Set[int]:
+        matched: Set[int] = set()
+        for indexed in self.expand(term):
+            matched.update(self.postings[indexed])
+        return matched
+
+
+class JobIndex:
+    """Searchable view of a list of job dicts; see the module docstring."""
+
+    def __init__(self, jobs: Sequence[Dict[str, Any]], weights: Dict[str, float] = FIELD_WEIGHTS,
+                 filter_fields: Sequence[str] = ("type",), location_field: str = "location"):
+        self.jobs = list(jobs)
+        self.weights = dict(weights)
+        self.fields = {
+            field: FieldIndex((job.get(field) for job in self.jobs), self.weights.get(field, 0.0))
+            for field in (*self.weights, *filter_fields)
+        }
+        self.locations: Dict[str, Set[int]] = defaultdict(set)
+        for job, record in enumerate(self.jobs):
+            for part in str(record.get(location_field) or "").split(","):
+                tokens = tokenize(part)
+                for key in {" ".join(tokens), *tokens} - {""}:
+                    self.locations[key].add(job)
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def term_scores(self, term: str, fields: Iterable[str]) -> Dict[int, float]:
+        """Score of every job with ``term`` (or a longer term it prefixes) in one of ``fields``."""
+        scores: Dict[int, float] = {}
+        for field in fields:
+            index = self.fields[field]
+            for indexed in index.expand(term):
+                postings = index.postings[indexed]
+                if not scores:
+                    scores = dict(postings)
+                    continue
+                for job, score in postings.items():
+                    scores[job] = scores.get(job, 0.0) + score
+        return scores
+
+    def matching(self, query: str, mode: str = "and", fields: Optional[Sequence[str]] = None) -> Optional[Dict[int, float]]:
+        """BM25 score of each job with every (or, with ``mode="or"``, any) query term.
+
+        ``fields`` defaults to the scored ones. An empty query returns None, meaning all jobs.
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return None
+        per_term = sorted((self.term_scores(term, fields or self.weights) for term in terms), key=len)
+
+        if mode == "or":
+            matched = dict(per_term.pop())
+            for scores in per_term:
+                for job, score in scores.items():
+                    matched[job] = matched.get(job, 0.0) + score
+            return matched
+
+        # Intersect starting from the rarest term, so every step shrinks the smallest set
+        matched = per_term[0]
+        for scores in per_term[1:]:
+            if not matched:
+                break
+            matched = {job: score + scores[job] for job, score in matched.items() if job in scores}
+        return matched
+
+    def in_locations(self, terms: Iterable[str]) -> Set[int]:
+        """Jobs whose location has any of ``terms`` as a part ("new york") or word ("york")."""
+        matched: Set[int] = set()
+        for term in terms:
+            matched.update(self.locations.get(" ".join(tokenize(term)), ()))
+        return matched
+
+    def search(self, query: str = "", locations: Iterable[str] = (), mode: str = "and",
+               filters: Optional[Dict[str, str]] = None, limit: Optional[int] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        """How many jobs match ``query`` in any of ``locations``, and the best ``limit`` of them.
+
+        ``filters`` maps a field to text whose every term the field must
+        contain, e.g. ``{"type": "summer"}``. Without a query, jobs keep
+        their list order.
+        """
+        allowed: Optional[Set[int]] = None
+        locations = list(locations)
+        if locations:
+            allowed = self.in_locations(locations)
+        for field, text in (filters or {}).items():
+            in_field = self.matching(text, fields=(field,))
+            if in_field is not None:
+                allowed = set(in_field) if allowed is None else allowed.intersection(in_field)
+
+        scores = self.matching(query, mode)
+        if scores is None:
+            if allowed is None:
+                return len(self.jobs), self.jobs[:limit]
+            ranked = sorted(allowed) if limit is None else heapq.nsmallest(limit, allowed)
+            return len(allowed), [self.jobs[job] for job in ranked]
+
+        if allowed is not None:
+            scores = {job: score for job, score in scores.items() if job in allowed}
+        # (score, -job) tuples rank best first, ties in list order, without a key function
+        pairs = zip(scores.values(), map(operator.neg, scores))
+        ranked = sorted(pairs, reverse=True) if limit is None else heapq.nlargest(limit, pairs)
+        return len(scores), [self.jobs[-job] for _, job in ranked]
@@ -0,0 +1,25 @@
+"""Timezone helpers shared by streak, rollup and reminder code."""
+
+import logging
+from datetime import datetime, timezone, tzinfo
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=512)
+def get_zone(tz_name: str) -> tzinfo:
+    """Resolve an IANA timezone name, falling back to UTC for unknown names."""
+    try:
+        return ZoneInfo(tz_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown timezone {tz_name!r}, using UTC")
+        return timezone.utc
+
+
+def to_local(ts: datetime, tz_name: str) -> datetime:
+    """Convert a timestamp (naive values are UTC) to local time in ``tz_name``."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(get_zone(tz_name))
@@ -5,38 +5,11 @@ import random
 from datetime import datetime
 import re
 
+from app.utils.job_index import MODES, JobIndex, location_terms as expand_location_terms
+
 app = Flask(__name__)
 CORS(app)
 
-# Enhanced location matching
-US_STATE_TO_ABBR = {
-    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA", "colorado": "CO",
-    "connecticut": "CT", "delaware": "DE", "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID",
-    "illinois": "IL", "indiana": "IN", "iowa": "IA", "kansas": "KS", "kentucky": "KY", "louisiana": "LA",
-    "maine": "ME", "maryland": "MD", "massachusetts": "MA", "michigan": "MI", "minnesota": "MN", "mississippi": "MS",
-    "missouri": "MO", "montana": "MT", "nebraska": "NE", "nevada": "NV", "new hampshire": "NH", "new jersey": "NJ",
-    "new mexico": "NM", "new york": "NY", "north carolina": "NC", "north dakota": "ND", "ohio": "OH",
-    "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC",
-    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT", "virginia": "VA",
-    "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY", "district of columbia": "DC",
-    "washington dc": "DC", "dc": "DC"
-}
-
-def expand_location_terms(raw):
-    """Expand location terms with state abbreviations"""
-    if not raw:
-        return []
-    terms = []
-    for chunk in raw.replace("|", ",").split(","):
-        term = chunk.strip().lower()
-        if term:
-            terms.append(term)
-            # Add state abbreviation if it's a state name
-            abbr = US_STATE_TO_ABBR.get(term)
-            if abbr:
-                terms.append(abbr.lower())
-    return terms
-
 # Enhanced internship data with more companies and locations
 ENHANCED_INTERNSHIPS = [
     {
@@ -301,6 +274,19 @@ ENHANCED_INTERNSHIPS = [
     }
 ]
 
+# Tokenized once at startup; searches read postings instead of scanning the list
+INTERNSHIP_INDEX = JobIndex(ENHANCED_INTERNSHIPS)
+
+def find_internships(keyword, location, job_type, mode='and'):
+    """Internships matching the search form, best match first"""
+    location_terms = expand_location_terms(location)
+    if location in ('united states', ''):
+        location_terms = []
+    # "internship" is every listing's type
+    filters = {'type': job_type} if job_type not in ('', 'internship') else None
+    _, jobs = INTERNSHIP_INDEX.search(keyword, location_terms, mode, filters)
+    return jobs, location_terms
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -321,44 +307,13 @@ def search_jobs():
         keyword = data.get('keyword', 'software engineer').lower()
         location = data.get('location', 'United States').lower()
         job_type = data.get('jobType', 'internship').lower()
+        mode = data.get('mode', 'and')  # and: every keyword term, or: any
+        if mode not in MODES:
+            return jsonify({'success': False, 'error': f'mode must be one of: {", ".join(MODES)}', 'jobs': []}), 400
         
         print(f"🔍 Enhanced search: {keyword} in {location}")
         
-        # Enhanced location matching
-        location_terms = expand_location_terms(location)
-        
-        # Filter internships with enhanced matching
-        filtered_jobs = []
-        
-        for job in ENHANCED_INTERNSHIPS:
-            # Check keyword match
-            keyword_match = (
-                keyword in job['title'].lower() or
-                keyword in job['description'].lower() or
-                keyword in job['category'].lower() or
-                keyword in job['company'].lower()
-            )
-            
-            # Enhanced location matching
-            location_match = False
-            if not location_terms or location == 'united states' or location == '':
-                location_match = True
-            else:
-                job_location = job['location'].lower()
-                for term in location_terms:
-                    if term in job_location:
-                        location_match = True
-                        break
-            
-            # Check job type match
-            type_match = (
-                job_type in job['type'].lower() or
-                job_type == '' or
-                job_type == 'internship'
-            )
-            
-            if keyword_match and location_match and type_match:
-                filtered_jobs.append(job)
+        filtered_jobs, location_terms = find_internships(keyword, location, job_type, mode)
         
         # If no exact matches, return some relevant results
         if not filtered_jobs:
@@ -372,6 +327,7 @@ def search_jobs():
                 'keyword': keyword,
                 'location': location,
                 'jobType': job_type,
+                'mode': mode,
                 'location_terms': location_terms
             },
             'message': f'Found {len(filtered_jobs)} internships with enhanced location matching'
@@ -390,44 +346,13 @@ def search_jobs_get():
         keyword = request.args.get('keyword', 'software engineer').lower()
         location = request.args.get('location', 'United States').lower()
         job_type = request.args.get('jobType', 'internship').lower()
+        mode = request.args.get('mode', 'and')
+        if mode not in MODES:
+            return jsonify({'success': False, 'error': f'mode must be one of: {", ".join(MODES)}', 'jobs': []}), 400
         
         print(f"🔍 Enhanced GET search: {keyword} in {location}")
         
-        # Enhanced location matching
-        location_terms = expand_location_terms(location)
-        
-        # Filter internships with enhanced matching
-        filtered_jobs = []
-        
-        for job in ENHANCED_INTERNSHIPS:
-            # Check keyword match
-            keyword_match = (
-                keyword in job['title'].lower() or
-                keyword in job['description'].lower() or
-                keyword in job['category'].lower() or
-                keyword in job['company'].lower()
-            )
-            
-            # Enhanced location matching
-            location_match = False
-            if not location_terms or location == 'united states' or location == '':
-                location_match = True
-            else:
-                job_location = job['location'].lower()
-                for term in location_terms:
-                    if term in job_location:
-                        location_match = True
-                        break
-            
-            # Check job type match
-            type_match = (
-                job_type in job['type'].lower() or
-                job_type == '' or
-                job_type == 'internship'
-            )
-            
-            if keyword_match and location_match and type_match:
-                filtered_jobs.append(job)
+        filtered_jobs, location_terms = find_internships(keyword, location, job_type, mode)
         
         # If no exact matches, return some relevant results
         if not filtered_jobs:
@@ -441,6 +366,7 @@ def search_jobs_get():
                 'keyword': keyword,
                 'location': location,
                 'jobType': job_type,
+                'mode': mode,
                 'location_terms': location_terms
             },
             'message': f'Found {len(filtered_jobs)} internships with enhanced location matching'
@@ -462,38 +388,18 @@ def jobs_search():
         loc = request.args.get('loc', '')
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
+        mode = request.args.get('mode', 'and')
+        if mode not in MODES:
+            return jsonify({'error': f'mode must be one of: {", ".join(MODES)}', 'total': 0, 'page': 1, 'per_page': 20, 'items': []}), 400
         
-        # Use the enhanced search logic
-        location_terms = expand_location_terms(loc) if loc else []
-        
-        filtered_jobs = []
-        for job in ENHANCED_INTERNSHIPS:
-            # Keyword matching
-            keyword_match = True
-            if query:
-                keyword_match = (
-                    query.lower() in job['title'].lower() or
-                    query.lower() in job['description'].lower() or
-                    query.lower() in job['category'].lower() or
-                    query.lower() in job['company'].lower()
-                )
-            
-            # Location matching
-            location_match = True
-            if location_terms:
-                job_location = job['location'].lower()
-                location_match = any(term in job_location for term in location_terms)
-            
-            if keyword_match and location_match:
-                filtered_jobs.append(job)
-        
-        # Pagination
+        # Only the listings up to the end of this page are ranked
         start_idx = (page - 1) * per_page
         end_idx = start_idx + per_page
-        paginated_jobs = filtered_jobs[start_idx:end_idx]
+        total, ranked_jobs = INTERNSHIP_INDEX.search(query, expand_location_terms(loc), mode, limit=end_idx)
+        paginated_jobs = ranked_jobs[start_idx:end_idx]
         
         return jsonify({
-            'total': len(filtered_jobs),
+            'total': total,
             'page': page,
             'per_page': per_page,
             'items': paginated_jobs
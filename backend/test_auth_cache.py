@@ -0,0 +1,86 @@
+"""Tests for cached token authentication."""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models import *
+from app.core.security import create_access_token, create_magic_link_token, user_cache
+from app.routers.auth import get_current_user, logout
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_auth_cache.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="cached@example.com", name="Before")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def authenticate(db, token):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        return get_current_user(bearer(token), db), len(statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_repeat_requests_skip_the_users_table(db, user):
+    token = create_access_token({"sub": str(user.id)})
+
+    snapshot, queries = authenticate(db, token)
+    assert snapshot.id == user.id
+    assert queries == 1
+
+    snapshot, queries = authenticate(db, token)
+    assert snapshot.name == "Before"
+    assert queries == 0
+
+
+def test_user_update_invalidates_cached_snapshot(db, user):
+    token = create_access_token({"sub": str(user.id)})
+    authenticate(db, token)
+
+    user.name = "After"
+    db.commit()
+
+    snapshot, queries = authenticate(db, token)
+    assert snapshot.name == "After"
+    assert queries == 1
+
+
+def test_revoked_and_invalid_tokens_are_rejected(db, user):
+    token = create_access_token({"sub": str(user.id)})
+    current_user, _ = authenticate(db, token)
+    logout(bearer(token), current_user, db)
+
+    for bad in (token, "not-a-jwt", create_magic_link_token(user.email)):
+        with pytest.raises(HTTPException) as error:
+            get_current_user(bearer(bad), db)
+        assert error.value.status_code == 401
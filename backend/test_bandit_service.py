@@ -0,0 +1,119 @@
+"""Tests for bandit arm selection and reward updates."""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models import *
+from app.services.bandit_service import ArmStatsBuffer, BanditService
+from app.services.projection_service import ProjectionRunner, BanditRewardProjector
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_bandit.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def seed(db):
+    user = User(email="bandit@example.com")
+    db.add(user)
+    db.flush()
+    habit = Habit(
+        user_id=user.id, title="Read", schedule_json={"type": "daily"},
+        goal_type="check", timezone="UTC"
+    )
+    db.add(habit)
+    db.flush()
+    reminder = Reminder(
+        habit_id=habit.id, channel="email", timezone="UTC",
+        window={"start_hour": 8, "end_hour": 11}
+    )
+    db.add(reminder)
+    db.commit()
+    return habit, reminder
+
+
+def service(db, strategy):
+    return BanditService(db, strategy=strategy, buffer=ArmStatsBuffer(flush_size=1000))
+
+
+@pytest.mark.parametrize("strategy", ["epsilon_greedy", "thompson", "ucb"])
+def test_choices_stay_within_candidate_hours(db, strategy):
+    habit, reminder = seed(db)
+    bandit = service(db, strategy)
+    random.seed(0)
+
+    chosen = {bandit.choose_hour(habit, reminder) for _ in range(50)}
+    assert chosen <= {8, 9, 10, 11}
+    assert bandit.choose_hours([(habit, reminder)], {habit.id: [10]}) == {habit.id: 10}
+
+
+def test_exploits_best_rate_and_ucb_tries_every_arm_first(db):
+    habit, reminder = seed(db)
+    stats = {8: {"pulls": 10, "successes": 1}, 9: {"pulls": 10, "successes": 7}, 10: {"pulls": 4, "successes": 1}}
+
+    greedy = service(db, "epsilon_greedy")
+    greedy.epsilon = 0
+    assert greedy.choose_hour(habit, reminder, stats) == 9
+
+    assert service(db, "ucb").choose_hour(habit, reminder, stats) == 11
+
+
+def test_pulls_are_buffered_then_flushed(db):
+    habit, reminder = seed(db)
+    bandit = service(db, "thompson")
+
+    bandit.record_pull(habit.id, 9)
+    bandit.record_pull(habit.id, 9)
+    assert db.query(BanditArm).count() == 0
+    assert bandit.get_arm_stats_bulk([habit.id])[habit.id] == {9: {"pulls": 2, "successes": 0}}
+
+    assert bandit.flush() == 1
+    assert db.get(BanditArm, (habit.id, 9)).pulls == 2
+
+
+def test_flush_leaves_the_callers_transaction_alone(db):
+    habit, reminder = seed(db)
+    bandit = service(db, "thompson")
+    reminder.best_hour = 10
+
+    # Choosing without recording pulls writes nothing
+    bandit.choose_hours([(habit, reminder)], record_pulls=False)
+    bandit.record_pull(habit.id, 9)
+    bandit.flush()
+    db.rollback()
+
+    assert db.get(Reminder, reminder.id).best_hour is None
+    assert db.get(BanditArm, (habit.id, 9)).pulls == 1
+
+
+def test_rewards_move_best_hour(db):
+    habit, reminder = seed(db)
+    bandit = service(db, "epsilon_greedy")
+    start = datetime(2024, 1, 1)
+    for day, hour in enumerate([8, 8, 10, 10]):
+        sent = start + timedelta(days=day, hours=hour)
+        bandit.record_pull(habit.id, hour)
+        db.add(Event(user_id=habit.user_id, habit_id=habit.id, type="reminder_sent", ts=sent, payload={"hour": hour}))
+        if hour == 10:
+            db.add(Event(user_id=habit.user_id, habit_id=habit.id, type="checkin", ts=sent + timedelta(minutes=5)))
+    bandit.flush()
+    db.commit()
+
+    ProjectionRunner(db, [BanditRewardProjector()], session_factory=TestingSessionLocal, settle_seconds=0).run()
+
+    db.refresh(reminder)
+    assert db.get(BanditArm, (habit.id, 10)).successes == 2
+    assert reminder.best_hour == 10
@@ -0,0 +1,59 @@
+"""Tests for vectorized completion feature extraction."""
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.completion_features import extract_features, to_datetime64
+
+NOW = datetime(2024, 6, 15, 14, 30)
+
+
+def reference(times, now):
+    """Straightforward per-metric passes, as predict_success used to compute them."""
+    dates = {ts.date() for ts in times}
+    streak = 0
+    while now.date() - timedelta(days=streak) in dates:
+        streak += 1
+
+    def consistency(days):
+        cutoff = now - timedelta(days=days)
+        return round(len({ts.date() for ts in times if ts >= cutoff}) / days, 3) if times else 0.0
+
+    return (
+        len(times),
+        streak,
+        consistency(7),
+        consistency(30),
+        sum(1 for ts in times if ts >= now - timedelta(days=7)),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_features_match_reference(seed):
+    rng = random.Random(seed)
+    # Unsorted, with same-day duplicates, gaps and a few future times
+    times = [NOW - timedelta(minutes=rng.randint(-600, 60 * 24 * 45)) for _ in range(rng.randint(1, 400))]
+    times += [NOW.replace(hour=0, minute=0) - timedelta(days=day) for day in range(rng.randint(0, 12))]
+    rng.shuffle(times)
+
+    features = extract_features(times, NOW)
+
+    assert (
+        features.total, features.current_streak, features.consistency_7,
+        features.consistency_30, features.recent_7
+    ) == reference(times, NOW)
+    assert features.days_since_last == round((max(times) - NOW) / timedelta(days=-1), 3)
+
+
+def test_empty_history():
+    features = extract_features(np.array([], dtype="datetime64[us]"), NOW)
+    assert (features.total, features.current_streak, features.consistency_30) == (0, 0, 0.0)
+    assert features.days_since_last is None
+
+
+def test_datetime64_conversion_keeps_microseconds():
+    times = [datetime(2024, 1, 1, 0, 0, 0, 1), datetime(1969, 12, 31, 23, 59, 59)]
+    assert to_datetime64(times).tolist() == times
@@ -0,0 +1,54 @@
+"""Tests for the outbound email queue."""
+
+import asyncio
+import json
+
+from app.core.email_queue import EmailDispatcher, FileSinkTransport, build_message
+
+
+class FlakyTransport:
+    """Fails every other message on the first attempt."""
+
+    def __init__(self):
+        self.batches = []
+
+    def send_batch(self, messages):
+        self.batches.append(len(messages))
+        first_attempt = len(self.batches) == 1
+        return [not (first_attempt and i % 2) for i in range(len(messages))]
+
+
+def test_dispatcher_batches_and_retries():
+    transport = FlakyTransport()
+    dispatcher = EmailDispatcher(transport, workers=1, batch_size=50, backoff_seconds=0)
+
+    async def run():
+        await dispatcher.start()
+        results = await asyncio.gather(*[
+            dispatcher.submit(build_message("reminder", f"user{i}@example.com", "Hi", "<p>-n-</p>", {"n": i}))
+            for i in range(100)
+        ])
+        await dispatcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    metrics = dispatcher.tick_metrics()
+
+    assert all(results)
+    assert max(transport.batches) == 50
+    assert metrics["sent"] == 100
+    assert metrics["retries"] == 25
+
+
+def test_file_sink_renders_substitutions(tmp_path):
+    sink = tmp_path / "outbox.ndjson"
+    dispatcher = EmailDispatcher(FileSinkTransport(str(sink)))
+
+    ok = asyncio.run(dispatcher.submit(
+        build_message("reminder", "a@example.com", "Reminder: Run", "<p>-habit_title-</p>", {"habit_title": "Run"})
+    ))
+
+    assert ok
+    line = json.loads(sink.read_text())
+    assert line["to"] == "a@example.com"
+    assert line["html"] == "<p>Run</p>"
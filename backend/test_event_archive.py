@@ -0,0 +1,167 @@
+"""Tests for archiving events past the retention window."""
+
+import gzip
+import json
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models import *
+from app.services.event_archive import EventArchiver, add_months, file_sha256
+from app.services.projection_service import ProjectionRunner
+from app.services.rollup_service import RollupService
+from app.services.streak_service import StreakService
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_event_archive.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+TODAY = date(2024, 6, 15)
+
+
+@pytest.fixture
+def db():
+    """A habit with one checkin a day from January to mid-June, plus old idempotency keys."""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    user = User(email="archive@example.com")
+    db.add(user)
+    db.flush()
+    habit = Habit(
+        user_id=user.id, title="Read", schedule_json={"type": "daily"},
+        goal_type="check", timezone="UTC"
+    )
+    db.add(habit)
+    db.flush()
+
+    start = datetime(2024, 1, 1, 8)
+    db.execute(insert(Event), [
+        {
+            "user_id": user.id, "habit_id": habit.id, "type": "checkin" if day % 5 else "miss",
+            "ts": start + timedelta(days=day), "payload": {"day": day}
+        }
+        for day in range((datetime(2024, 6, 15) - start).days)
+    ])
+    db.add_all([
+        EventIdempotencyKey(user_id=user.id, idempotency_key="old", event_id=user.id,
+                            created_at=datetime(2024, 1, 20)),
+        EventIdempotencyKey(user_id=user.id, idempotency_key="new", event_id=user.id,
+                            created_at=datetime(2024, 5, 20)),
+    ])
+    db.commit()
+
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_waits_for_projections(db, tmp_path):
+    archiver = EventArchiver(db, archive_dir=str(tmp_path), retention_months=3)
+
+    assert archiver.due_months(TODAY) == [date(2024, 1, 1), date(2024, 2, 1)]
+    assert archiver.run(TODAY)["archived"] == []
+    assert db.query(Event).count() == 165
+
+
+def test_archives_months_before_cutoff(db, tmp_path):
+    ProjectionRunner(db, session_factory=TestingSessionLocal, settle_seconds=0).run()
+    archiver = EventArchiver(db, archive_dir=str(tmp_path), retention_months=3)
+
+    stats = archiver.run(TODAY)
+
+    assert stats == {"archived": ["2024-01", "2024-02"], "rows": 31 + 29, "keys_pruned": 1}
+    assert db.query(Event).filter(Event.ts < datetime(2024, 3, 1)).count() == 0
+    assert db.query(Event).count() == 165 - 60
+    assert [key.idempotency_key for key in db.query(EventIdempotencyKey)] == ["new"]
+
+    records = db.query(EventArchive).order_by(EventArchive.month).all()
+    assert [record.month for record in records] == [date(2024, 1, 1), date(2024, 2, 1)]
+
+    january = records[0]
+    assert january.sha256 == file_sha256(january.path)
+    with gzip.open(january.path, "rt") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == january.rows == 31
+    assert january.counts == {"checkin": 24, "miss": 7}
+    assert rows[0]["ts"] == "2024-01-01T08:00:00" and rows[0]["payload"] == {"day": 0}
+    assert [row["ts"] for row in rows] == sorted(row["ts"] for row in rows)
+
+    # Nothing left to do until the cutoff moves
+    assert archiver.run(TODAY) == {"archived": [], "rows": 0, "keys_pruned": 0}
+    assert archiver.run(add_months(TODAY, 1))["archived"] == ["2024-03"]
+
+
+def test_zero_retention_keeps_everything(db, tmp_path):
+    ProjectionRunner(db, session_factory=TestingSessionLocal, settle_seconds=0).run()
+
+    stats = EventArchiver(db, archive_dir=str(tmp_path), retention_months=0).run(TODAY)
+
+    assert stats == {"archived": [], "rows": 0, "keys_pruned": 0}
+    assert db.query(Event).count() == 165
+    assert not list(tmp_path.iterdir())
+
+
+def test_events_written_during_export_are_kept(db, tmp_path, monkeypatch):
+    ProjectionRunner(db, session_factory=TestingSessionLocal, settle_seconds=0).run()
+    archiver = EventArchiver(db, archive_dir=str(tmp_path), retention_months=3)
+    habit = db.query(Habit).one()
+    write = archiver._write_ndjson
+
+    def write_then_sync(path, month, exported_ids=None):
+        # An offline sync commits into the month after its export was read
+        result = write(path, month, exported_ids)
+        other = TestingSessionLocal()
+        other.add(Event(user_id=habit.user_id, habit_id=habit.id, type="checkin",
+                        ts=datetime.combine(month, time(12)), payload={"late": True}))
+        other.commit()
+        other.close()
+        return result
+
+    monkeypatch.setattr(archiver, "_write_ndjson", write_then_sync)
+    assert archiver.run(TODAY)["rows"] == 31 + 29
+
+    kept = db.query(Event).filter(Event.ts < datetime(2024, 3, 1)).order_by(Event.ts).all()
+    assert [(event.ts.date(), event.payload) for event in kept] == [
+        (date(2024, 1, 1), {"late": True}), (date(2024, 2, 1), {"late": True})
+    ]
+
+
+def test_late_events_leave_archived_streaks_alone(db, tmp_path):
+    habit = db.query(Habit).one()
+    habit.created_at = datetime(2024, 1, 1)
+    habit.grace_per_week = 2  # Enough to cover the fixture's misses, so one streak spans every month
+    StreakService(db).rebuild_all([habit])
+    ProjectionRunner(db, session_factory=TestingSessionLocal, settle_seconds=0).run()
+    EventArchiver(db, archive_dir=str(tmp_path), retention_months=3).run(TODAY)
+
+    def state():
+        streak = db.query(Streak).one()
+        return streak.start_date, streak.length_days, streak.last_checkin_date
+
+    before = state()
+    assert before[0] < date(2024, 3, 1)
+
+    # Replaying only March onwards would restart the streak there
+    service = StreakService(db)
+    assert not service.can_rebuild(habit)
+    service.apply_batch({habit.id: habit}, [(habit.id, "checkin", datetime(2024, 3, 6, 8))])
+    service.rebuild_streak(habit)
+    db.commit()
+    assert state() == before
+
+
+def test_rollups_of_archived_habits_are_not_rebuilt(db, tmp_path):
+    habit = db.query(Habit).one()
+    habit.created_at = datetime(2024, 1, 1)
+    ProjectionRunner(db, session_factory=TestingSessionLocal, settle_seconds=0).run()
+    EventArchiver(db, archive_dir=str(tmp_path), retention_months=3).run(TODAY)
+
+    def counts():
+        return RollupService(db).hour_counts_since(habit.id, date(2024, 1, 1))
+
+    before = counts()
+    assert RollupService(db).rebuild_all([habit]) == 0
+    assert counts() == before
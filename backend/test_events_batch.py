@@ -0,0 +1,156 @@
+"""Tests for batch event ingestion."""
+
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.db.session import get_db, get_async_db, async_database_url, Base
+from app.models import *
+from app.routers.auth import get_current_user
+from app.services.projection_service import ProjectionRunner, WeeklyTotalsProjector
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_events_batch.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="module")
+def client():
+    """Client authenticated as a user owning two habits."""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    user = User(email="offline@example.com")
+    db.add(user)
+    db.flush()
+    habits = [
+        Habit(
+            user_id=user.id,
+            title=f"Habit {i}",
+            schedule_json={"type": "daily"},
+            goal_type="check",
+            grace_per_week=0,
+            timezone="UTC"
+        )
+        for i in range(2)
+    ]
+    db.add_all(habits)
+    db.commit()
+    habit_ids = [habit.id for habit in habits]
+    db.refresh(user)
+    db.close()
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), habit_ids
+
+    app.dependency_overrides = overrides
+    Base.metadata.drop_all(bind=engine)
+
+
+def checkins(habit_id, days, prefix):
+    start = datetime(2024, 3, 1, 7)
+    return [
+        {
+            "habit_id": str(habit_id),
+            "type": "checkin",
+            "ts": (start + timedelta(days=day)).isoformat(),
+            "idempotency_key": f"{prefix}-{day}"
+        }
+        for day in days
+    ]
+
+
+def streak_for(habit_id):
+    db = TestingSessionLocal()
+    try:
+        return db.query(Streak).filter(Streak.habit_id == habit_id).one()
+    finally:
+        db.close()
+
+
+def test_batch_is_idempotent_and_updates_streaks(client):
+    test_client, (first, second) = client
+
+    events = checkins(first, range(5), "a") + checkins(second, range(3), "b")
+    response = test_client.post("/habits/events:batch", json={"events": events + events[:2]})
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 8
+    assert response.json()["duplicates"] == 2
+
+    # Retrying the same sync inserts nothing
+    response = test_client.post("/habits/events:batch", json={"events": events})
+    assert response.json()["inserted"] == 0
+
+    assert streak_for(first).length_days == 5
+    assert streak_for(second).length_days == 3
+
+
+def test_late_events_rebuild_streak(client):
+    test_client, (first, second) = client
+
+    # Days 3..4 are missing for the second habit; a later sync fills them in
+    test_client.post("/habits/events:batch", json={"events": checkins(second, [5], "late")})
+    assert streak_for(second).length_days == 1
+
+    test_client.post("/habits/events:batch", json={"events": checkins(second, [3, 4], "late")})
+    streak = streak_for(second)
+    assert streak.length_days == 6
+    assert streak.start_date == date(2024, 3, 1)
+
+
+def test_backdated_events_reach_tailed_projections(client):
+    test_client, (first, _) = client
+
+    def weekly_checkins():
+        db = TestingSessionLocal()
+        try:
+            ProjectionRunner(db, [WeeklyTotalsProjector()], session_factory=TestingSessionLocal, settle_seconds=0).run()
+            return {
+                row.week_start: row.checkins
+                for row in db.query(HabitWeeklyTotal).filter(HabitWeeklyTotal.habit_id == first)
+            }
+        finally:
+            db.close()
+
+    before = weekly_checkins()
+    # Synced after the tailer has moved past everything, with a ts weeks older
+    test_client.post("/habits/events:batch", json={"events": checkins(first, [-14], "backdated")})
+    after = weekly_checkins()
+    assert after.pop(date(2024, 2, 12)) == 1
+    assert after == before
+
+
+def test_batch_rejects_foreign_habits(client):
+    test_client, (first, _) = client
+
+    events = checkins(first, [9], "x") + checkins(uuid.uuid4(), [9], "y")
+    response = test_client.post("/habits/events:batch", json={"events": events})
+    assert response.status_code == 404
+
+    db = TestingSessionLocal()
+    assert db.query(Event).filter(Event.idempotency_key == "x-9").count() == 0
+    db.close()
@@ -0,0 +1,124 @@
+"""Tests for paginated and streamed habit event reads."""
+
+import base64
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.db.session import get_db, get_async_db, async_database_url, Base
+from app.models import *
+from app.routers.auth import get_current_user
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_habit_events.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="module")
+def client():
+    """Client for a user with one habit and 250 events, some sharing a timestamp."""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    user = User(email="history@example.com")
+    db.add(user)
+    db.flush()
+    habit = Habit(
+        user_id=user.id, title="Journal", schedule_json={"type": "daily"},
+        goal_type="check", timezone="UTC"
+    )
+    db.add(habit)
+    db.flush()
+
+    start = datetime(2024, 1, 1, 9)
+    for i in range(250):
+        db.add(Event(
+            user_id=user.id, habit_id=habit.id, type="checkin",
+            ts=start + timedelta(hours=i // 2), payload={"n": i}
+        ))
+    db.commit()
+    habit_id = habit.id
+    db.refresh(user)
+    db.close()
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), habit_id
+
+    app.dependency_overrides = overrides
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_cursor_pagination_walks_every_event_once(client):
+    test_client, habit_id = client
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 100, **({"cursor": cursor} if cursor else {})}
+        body = test_client.get(f"/habits/{habit_id}/events", params=params).json()
+        seen.extend(body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len({item["id"] for item in seen}) == 250
+    keys = [(item["ts"], item["id"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_invalid_cursor_is_rejected(client):
+    test_client, habit_id = client
+    response = test_client.get(f"/habits/{habit_id}/events", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("values", [[1, 2], [None, None], ["2024-01-01T00:00:00", str(uuid.uuid4()), "extra"]])
+def test_wrongly_typed_cursor_is_rejected(client, values):
+    test_client, habit_id = client
+    cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+    response = test_client.get(f"/habits/{habit_id}/events", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_export_streams_ndjson_and_csv(client):
+    test_client, habit_id = client
+
+    response = test_client.get(f"/habits/{habit_id}/events/export")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 250
+    assert sorted(row["payload"]["n"] for row in rows) == list(range(250))
+    assert [row["ts"] for row in rows] == sorted(row["ts"] for row in rows)
+
+    response = test_client.get(f"/habits/{habit_id}/events/export", params={"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 250
+    assert json.loads(rows[-1]["payload"])["n"] in (248, 249)
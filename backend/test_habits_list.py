@@ -0,0 +1,131 @@
+"""Query-count regression tests for the habit list endpoint."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.db.session import get_db, get_async_db, async_database_url, Base
+from app.models import *
+from app.routers.auth import get_current_user
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_habits_list.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="module")
+def client():
+    """Client authenticated as a user with no habits yet."""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    user = User(email="power@example.com")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.close()
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), user
+
+    app.dependency_overrides = overrides
+    Base.metadata.drop_all(bind=engine)
+
+
+def add_habits(user, count):
+    db = TestingSessionLocal()
+    for i in range(count):
+        habit = Habit(
+            user_id=user.id,
+            title=f"Habit {i}",
+            schedule_json={"type": "daily"},
+            goal_type="check",
+            grace_per_week=1,
+            timezone="UTC"
+        )
+        db.add(habit)
+        db.flush()
+        db.add(Reminder(
+            habit_id=habit.id,
+            channel="email",
+            window={"start_hour": 6, "end_hour": 21},
+            best_hour=9,
+            timezone="UTC"
+        ))
+    db.commit()
+    db.close()
+
+
+def count_queries(func):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = func()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return result, len(statements)
+
+
+def test_list_habits_query_count_is_constant(client):
+    """Listing habits must not issue per-habit queries."""
+    test_client, user = client
+
+    add_habits(user, 2)
+    response, few_queries = count_queries(lambda: test_client.get("/habits/"))
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    add_habits(user, 60)
+    response, many_queries = count_queries(lambda: test_client.get("/habits/"))
+    assert response.status_code == 200
+    assert len(response.json()) == 62
+    assert all(h["best_hour"] == 9 for h in response.json())
+
+    assert many_queries == few_queries
+    assert many_queries <= 2
+
+
+def test_list_habits_honors_if_none_match(client):
+    """Idle polling gets a 304 until a checkin bumps the user's version."""
+    test_client, user = client
+
+    response = test_client.get("/habits/")
+    etag = response.headers["etag"]
+    habit_id = response.json()[0]["id"]
+
+    response, queries = count_queries(
+        lambda: test_client.get("/habits/", headers={"If-None-Match": etag})
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert queries == 1
+
+    assert test_client.post(f"/habits/{habit_id}/checkin", json={}).status_code == 200
+    response = test_client.get("/habits/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,132 @@
+"""Tests for checkin rollups and the insights endpoints built on them."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.core.etag import bump_user_version
+from app.db.session import get_db, get_async_db, async_database_url, Base
+from app.models import *
+from app.routers.auth import get_current_user
+from app.services.rollup_service import RollupService
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_insights.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def client(db):
+    user = User(email="insights@example.com")
+    db.add(user)
+    db.commit()
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app), user
+    app.dependency_overrides = overrides
+
+
+def add_habit(db, user_id, tz="UTC"):
+    habit = Habit(user_id=user_id, title="Read", schedule_json={"type": "daily"}, goal_type="check", timezone=tz)
+    db.add(habit)
+    db.commit()
+    return habit
+
+
+def test_rollups_count_in_each_habit_timezone(db):
+    user = User(email="rollups@example.com")
+    db.add(user)
+    db.flush()
+    tokyo, los_angeles = add_habit(db, user.id, "Asia/Tokyo"), add_habit(db, user.id, "America/Los_Angeles")
+
+    # 23:30 UTC on Monday is 08:30 Tuesday in Tokyo and 15:30 Monday in Los Angeles
+    ts = datetime(2024, 1, 1, 23, 30)
+    habits = {tokyo.id: tokyo, los_angeles.id: los_angeles}
+    rollups = RollupService(db)
+    rollups.record_checkins(habits, [(tokyo.id, ts), (los_angeles.id, ts)])
+    rollups.record_checkins(habits, [(tokyo.id, ts)])
+    db.commit()
+
+    assert {(r.day, r.hour, r.checkins) for r in db.query(HabitDailyRollup).filter_by(habit_id=tokyo.id)} == {
+        (date(2024, 1, 2), 8, 2)
+    }
+    assert {(r.day, r.hour, r.checkins) for r in db.query(HabitDailyRollup).filter_by(habit_id=los_angeles.id)} == {
+        (date(2024, 1, 1), 15, 1)
+    }
+    assert rollups.hour_of_week_counts(tokyo.id) == {24 + 8: 2}
+    assert rollups.hour_of_week_counts(los_angeles.id) == {15: 1}
+
+
+def test_optimal_reminder_cache_follows_data_version(db, client):
+    client, user = client
+    habit = add_habit(db, user.id)
+    url = f"/insights/habits/{habit.id}/optimal-reminder"
+
+    def checkins(hour, count):
+        RollupService(db).record_checkins({habit.id: habit}, [(habit.id, datetime(2024, 1, day, hour)) for day in range(1, count + 1)])
+        db.commit()
+
+    checkins(9, 3)
+    assert client.get(url).json()["suggested_reminder_hour"] == 8
+
+    # Cached under optimal_reminder:{habit_id}:{version} until the version moves
+    checkins(14, 4)
+    assert client.get(url).json()["suggested_reminder_hour"] == 8
+
+    db.execute(bump_user_version(user.id))
+    db.commit()
+    assert client.get(url).json()["suggested_reminder_hour"] == 13
+
+
+def test_completion_stats_rejects_empty_window(db, client):
+    client, user = client
+    habit = add_habit(db, user.id)
+    url = f"/insights/habits/{habit.id}/completion-stats"
+
+    assert client.get(url, params={"days": 0}).status_code == 422
+    assert client.get(url, params={"days": 10 ** 6}).status_code == 422
+    assert client.get(url, params={"days": 1}).json()["total_completions"] == 0
+
+
+def test_completion_rate_of_a_daily_habit_is_one(db, client):
+    client, user = client
+    habit = add_habit(db, user.id)
+    today = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0)
+    RollupService(db).record_checkins({habit.id: habit}, [(habit.id, today - timedelta(days=n)) for n in range(40)])
+    db.commit()
+
+    stats = client.get(f"/insights/habits/{habit.id}/completion-stats", params={"days": 30}).json()
+    assert (stats["total_completions"], stats["completion_rate"]) == (30, 1.0)
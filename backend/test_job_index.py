@@ -0,0 +1,63 @@
+"""Tests for the in-memory job search index used by the Flask job APIs."""
+
+import pytest
+
+from app.utils.job_index import JobIndex, location_terms
+
+JOBS = [
+    {"id": 1, "title": "Software Engineering Intern", "company": "Google", "location": "Mountain View, CA",
+     "type": "Summer 2024", "category": "software-engineering",
+     "description": "Work with experienced engineers on real projects."},
+    {"id": 2, "title": "Backend Engineering Intern", "company": "Microsoft", "location": "Seattle, WA",
+     "type": "Fall 2024", "category": "backend", "description": "Build scalable backend systems on Azure."},
+    {"id": 3, "title": "Data Science Intern", "company": "Netflix", "location": "Los Gatos, CA",
+     "type": "Summer 2024", "category": "data-science", "description": "Analyze data for software recommendations."},
+    {"id": 4, "title": "Machine Learning Intern", "company": "Spotify", "location": "New York, NY",
+     "type": "Summer 2024", "category": "machine-learning", "description": "Train models on listening data."},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return JobIndex(JOBS)
+
+
+def ids(result):
+    total, jobs = result
+    assert total >= len(jobs)
+    return [job["id"] for job in jobs]
+
+
+def test_and_or_queries(index):
+    # Terms may match in different fields, and prefix longer words
+    assert ids(index.search("software engineer")) == [1]
+    assert ids(index.search("data")) == [3, 4]
+    assert ids(index.search("backend data", mode="or")) == [2, 3, 4]
+    assert ids(index.search("backend data")) == []
+    assert ids(index.search("")) == [1, 2, 3, 4]
+
+
+def test_short_terms_match_exactly(index):
+    # "c" from "c++" would otherwise prefix-match nearly every job
+    assert ids(index.search("c++")) == []
+    assert ids(index.search("c++ data", mode="or")) == [3, 4]
+    assert ids(index.search("", filters={"type": "f"})) == []
+    assert ids(index.search("da")) == [3, 4]
+
+
+def test_rejects_unknown_modes(index):
+    with pytest.raises(ValueError):
+        index.search("data", mode="xor")
+
+
+def test_ranks_by_bm25(index):
+    # A title match outweighs a description match
+    assert ids(index.search("software", mode="or")) == [1, 3]
+    assert index.search("data", limit=1) == (2, [JOBS[2]])
+
+
+def test_location_and_filters(index):
+    assert location_terms("California|new york") == ["california", "ca", "new york", "ny"]
+    assert ids(index.search("", location_terms("California"))) == [1, 3]
+    assert ids(index.search("", location_terms("york"))) == [4]
+    assert ids(index.search("intern", location_terms("CA, WA"), filters={"type": "summer"})) == [1, 3]
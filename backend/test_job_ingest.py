@@ -0,0 +1,90 @@
+"""Tests for bulk job ingestion.
+
+The COPY/merge path needs PostgreSQL; on SQLite these cover record mapping,
+in-batch deduplication and re-crawls updating postings in place.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.job import Job
+from app.services.job_ingest import JobIngestor, job_row
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_job_ingest.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    Job.__table__.create(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Job.__table__.drop(bind=engine)
+
+
+def ndjson(*records):
+    return [json.dumps(r) if isinstance(r, dict) else r for r in records]
+
+
+def test_job_row_maps_scraper_fields():
+    row = job_row({
+        "job_title": " Data Engineer ", "company_name": "Acme", "location": "Remote (US) / Denver, CO",
+        "applyUrl": "https://example.com/1", "postedAt": "2024-03-01T09:00:00Z",
+    }, default_source="indeed")
+
+    assert row["title"] == "Data Engineer" and row["company"] == "Acme" and row["source"] == "indeed"
+    assert row["posted_at"].isoformat() == "2024-03-01T09:00:00+00:00"
+    assert (row["loc_city"], row["loc_state"], row["loc_remote"]) == ("denver", "CO", True)
+    # No external ID: derived from the apply URL, so re-crawls hit the same row
+    assert row["external_id"] == job_row({"title": "x", "company": "y", "url": "https://example.com/1"})["external_id"]
+
+    assert job_row({"title": "No company"}) is None
+
+
+def test_ingest_dedupes_and_updates_in_place(db):
+    ingestor = JobIngestor(db, batch_size=3, default_source="test")
+    stats = ingestor.ingest_lines(ndjson(
+        {"title": "Backend Engineer", "company": "Acme", "location": "Austin, TX", "external_id": "1"},
+        {"title": "Frontend Engineer", "company": "Acme", "location": "Remote", "external_id": "2"},
+        {"title": "Frontend Engineer II", "company": "Acme", "location": "Remote", "external_id": "2"},
+        "not json",
+        "",
+        {"title": "Missing company"},
+        {"title": "Designer", "company": "Globex", "location": "New York, NY", "external_id": "3"},
+    ))
+
+    assert (stats.received, stats.invalid, stats.duplicates) == (6, 2, 1)
+    assert db.scalar(select(func.count()).select_from(Job)) == 3
+
+    # A re-crawl updates postings instead of adding them
+    stats = ingestor.ingest_lines(ndjson(
+        {"title": "Senior Backend Engineer", "company": "Acme", "location": "Austin, TX", "external_id": "1"},
+        {"title": "Data Analyst", "company": "Acme", "location": "Houston, Texas", "source": "other", "external_id": "1"},
+    ))
+    assert stats.written == 2
+    jobs = {(job.source, job.external_id): job for job in db.scalars(select(Job))}
+    assert len(jobs) == 4
+    assert jobs[("test", "1")].title == "Senior Backend Engineer"
+    assert jobs[("test", "2")].loc_remote is True
+    assert (jobs[("other", "1")].loc_city, jobs[("other", "1")].loc_state) == ("houston", "TX")
+
+
+def test_unchanged_recrawl_writes_nothing(db):
+    ingestor = JobIngestor(db, default_source="test")
+    lines = ndjson(
+        {"title": "Backend Engineer", "company": "Acme", "location": "Austin, TX", "external_id": "1"},
+        {"title": "Designer", "company": "Globex", "postedAt": "2024-03-01T09:00:00Z", "external_id": "2"},
+    )
+    assert ingestor.ingest_lines(lines).written == 2
+    before = {job.external_id: (job.posted_at, job.updated_at) for job in db.scalars(select(Job))}
+
+    # Without a posted date the first crawl's time is kept, so nothing counts as changed
+    db.expire_all()
+    assert ingestor.ingest_lines(lines).written == 0
+    assert {job.external_id: (job.posted_at, job.updated_at) for job in db.scalars(select(Job))} == before
+
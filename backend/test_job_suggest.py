@@ -0,0 +1,102 @@
+"""Tests for the job search typeahead index."""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.job import Job
+from app.routers import jobs as jobs_router
+from app.services.job_ingest import JobIngestor
+from app.services.job_suggest import SuggestIndex
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_job_suggest.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    Job.__table__.create(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Job.__table__.drop(bind=engine)
+
+
+@pytest.fixture
+def clock():
+    return [0.0]
+
+
+@pytest.fixture
+def index(clock):
+    return SuggestIndex(TestingSessionLocal, refresh_seconds=30, rebuild_seconds=3600, clock=lambda: clock[0])
+
+
+def ingest(db, *records):
+    JobIngestor(db, default_source="test").ingest_lines([json.dumps(r) for r in records])
+
+
+def seed(db):
+    ingest(
+        db,
+        *({"title": "Software Engineer", "company": "Acme", "location": "Austin, TX", "external_id": str(i)} for i in range(3)),
+        {"title": "Sales Manager", "company": "Soylent", "location": "Remote", "external_id": "3"},
+    )
+
+
+def test_suggest_refreshes_after_ingest(db, index, clock, monkeypatch):
+    seed(db)
+    monkeypatch.setattr(jobs_router, "suggest_index", index)
+    app = FastAPI()
+    app.include_router(jobs_router.router)
+    client = TestClient(app)
+    body = client.get("/jobs/suggest", params={"q": "s"}).json()
+    assert [(s["kind"], s["text"], s["count"]) for s in body] == [
+        ("title", "Software Engineer", 3), ("title", "Sales Manager", 1), ("company", "Soylent", 1),
+    ]
+    # Later words match too, and kinds can be picked
+    assert [s["text"] for s in client.get("/jobs/suggest", params={"q": "ENG "}).json()] == ["Software Engineer"]
+    assert client.get("/jobs/suggest", params={"q": "a", "kind": "location"}).json() == [
+        {"kind": "location", "text": "Austin, TX", "count": 3}
+    ]
+
+    ingest(db, {"title": "Site Reliability Engineer", "company": "Acme", "location": "Texas", "external_id": "4"})
+    assert [s["text"] for s in client.get("/jobs/suggest", params={"q": "eng"}).json()] == ["Software Engineer"]
+
+    clock[0] += 30
+    index.maybe_refresh().join()
+    assert client.get("/jobs/suggest", params={"q": "eng"}).json() == [
+        {"kind": "title", "text": "Software Engineer", "count": 3},
+        {"kind": "title", "text": "Site Reliability Engineer", "count": 1},
+    ]
+    assert index.suggest("tex") == [("location", "Texas", 1)]
+    assert index.suggest("acme") == [("company", "Acme", 4)]
+
+
+def test_recrawled_postings_are_not_counted_twice(db, index, clock):
+    seed(db)
+    index.maybe_refresh()
+
+    # A re-crawl rewrites two postings in place; refreshes leave their counts alone
+    ingest(
+        db,
+        {"title": "Software Engineer", "company": "Acme", "location": "Austin, TX", "external_id": "0",
+         "description": "Now with a description"},
+        {"title": "Sales Director", "company": "Soylent", "location": "Remote", "external_id": "3"},
+    )
+    clock[0] += 30
+    index.maybe_refresh().join()
+    assert index.suggest("software") == [("title", "Software Engineer", 3)]
+    assert index.suggest("acme") == [("company", "Acme", 3)]
+    assert index.suggest("sales director") == []
+
+    # The periodic rebuild picks up the changed phrases
+    clock[0] += 3600
+    index.maybe_refresh().join()
+    assert index.suggest("sales") == [("title", "Sales Director", 1)]
+    assert index.suggest("software") == [("title", "Software Engineer", 3)]
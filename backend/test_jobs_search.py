@@ -0,0 +1,139 @@
+"""Tests for keyset-paginated job search.
+
+Full-text ranking needs PostgreSQL; on SQLite these cover the unranked
+(newest first) ordering, cursors and the cached total.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.routers import jobs
+from app.scripts.normalize_job_locations import normalize_pending
+from app.utils.cursors import encode_cursor
+from app.utils.geo import Location, normalize_location
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_jobs_search.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+START = datetime(2024, 3, 1, 9)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+def insert_jobs(first_id: int, count: int, location: str = "Austin, TX"):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO jobs (id, title, company, location, description, posted_at, source) "
+            "VALUES (:id, :title, 'Acme', :location, 'Build things', :posted_at, 'test')"
+        ), [
+            # Pairs of jobs share a timestamp, so pages must break ties on id
+            {"id": i, "title": f"Job {i}", "location": location, "posted_at": START + timedelta(hours=i // 2)}
+            for i in range(first_id, first_id + count)
+        ])
+
+
+@pytest.fixture
+def client():
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE jobs (id INTEGER PRIMARY KEY, title TEXT, company TEXT, location TEXT, "
+            "description TEXT, apply_url TEXT, posted_at TIMESTAMP, source TEXT, external_id TEXT, "
+            "loc_city TEXT, loc_state TEXT, loc_remote BOOLEAN)"
+        ))
+    insert_jobs(1, 45)
+    jobs.count_cache.clear()
+
+    app = FastAPI()
+    app.include_router(jobs.router)
+    app.dependency_overrides[jobs.get_db] = override_get_db
+    yield TestClient(app)
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE jobs"))
+
+
+def test_pages_follow_cursor(client):
+    seen, cursor = [], None
+    while True:
+        body = client.get("/jobs/search", params={"per_page": 20, **({"cursor": cursor} if cursor else {})}).json()
+        assert body["total"] == 45 and body["total_is_estimate"] is False
+        seen += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == list(range(45, 0, -1))
+
+
+def test_total_is_cached_per_filters(client):
+    first = client.get("/jobs/search", params={"per_page": 5}).json()
+    insert_jobs(100, 3)
+
+    # Later pages (and repeat searches) reuse the cached total
+    second = client.get("/jobs/search", params={"per_page": 5, "cursor": first["next_cursor"]}).json()
+    assert second["total"] == 45
+    assert second["items"][0]["id"] == first["items"][-1]["id"] - 1
+
+    jobs.count_cache.clear()
+    assert client.get("/jobs/search").json()["total"] == 48
+
+
+def test_rejects_bad_cursors(client):
+    assert client.get("/jobs/search", params={"cursor": "not-a-cursor"}).status_code == 400
+    # A ranked-search cursor has one more value than an unranked one
+    ranked = encode_cursor(0.5, START.isoformat(), 3)
+    assert client.get("/jobs/search", params={"cursor": ranked}).status_code == 400
+    # Valid encoding, wrong value types
+    for values in ([None, 1], [1, {"id": 1}]):
+        token = base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+        assert client.get("/jobs/search", params={"cursor": token}).status_code == 400
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Austin, TX", Location("austin", "TX")),
+    ("New York, New York (Hybrid)", Location("new york", "NY")),
+    ("San Francisco, CA, USA", Location("san francisco", "CA")),
+    ("Hybrid - Seattle, WA", Location("seattle", "WA")),
+    ("Texas", Location(state="TX")),
+    ("London, UK", Location("london")),
+    ("Remote - US", Location(remote=True)),
+    ("Remote (US) / Denver, CO", Location("denver", "CO", remote=True)),
+    ("", Location()),
+])
+def test_normalize_location(raw, expected):
+    assert normalize_location(raw) == expected
+
+
+def test_location_filters_use_normalized_columns(client):
+    insert_jobs(200, 2, "New York, NY")
+    insert_jobs(300, 2, "Remote")
+    insert_jobs(400, 2, "Houston, Texas")
+    insert_jobs(500, 2, "Yorktown, VA")
+
+    db = TestingSessionLocal()
+    assert normalize_pending(db, chunk_size=10) == 53
+    assert normalize_pending(db) == 0
+    db.close()
+
+    def ids(loc):
+        return sorted(item["id"] for item in client.get("/jobs/search", params={"loc": loc, "per_page": 100}).json()["items"])
+
+    assert ids("Texas") == list(range(1, 46)) + [400, 401]
+    assert ids("houston") == [400, 401]
+    assert ids("york") == [500, 501]  # Prefix match outside PostgreSQL
+    assert ids("New York") == [200, 201]
+    assert ids("remote|VA") == [300, 301, 500, 501]
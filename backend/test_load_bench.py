@@ -0,0 +1,83 @@
+"""Tests for bulk seeding and the load benchmark harness."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.db.session import get_db, get_async_db, async_database_url, Base
+from app.models import *
+from app.scripts.bench_load import SCENARIO, regressions, run, scenario_calls, scenario_users
+from app.scripts.seed_demo import seed_bulk
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_load_bench.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    counts = seed_bulk(db, users=4, habits_per_user=3, days=28, seed=1, chunk_size=100)
+    db.close()
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield counts
+
+    app.dependency_overrides = overrides
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_seed_bulk(seeded):
+    db = TestingSessionLocal()
+    assert seeded["users"] == 4 and seeded["habits"] == 12
+    assert db.query(Event).count() == seeded["events"] > 12 * 28 * 3 // 7
+    assert db.query(Streak).count() == 12
+
+    # Later runs append users instead of clashing with existing emails
+    assert seed_bulk(db, users=1, habits_per_user=1, days=7)["users"] == 1
+    assert db.query(User).count() == 5
+    db.close()
+
+
+def test_scenario_reports_every_endpoint(seeded):
+    db = TestingSessionLocal()
+    users = scenario_users(db, limit=3)
+    db.close()
+    assert len(users) == 3
+
+    calls = [scenario_calls(*users[i], requests=14, offset=i) for i in range(3)]
+    report = asyncio.run(run(calls, in_process=True))
+
+    assert set(report["endpoints"]) == {name for name, *_ in SCENARIO}
+    assert report["total"]["requests"] == 42
+    assert report["total"]["errors"] == {}
+    for stats in report["endpoints"].values():
+        assert stats["p50"] <= stats["p95"] <= stats["p99"]
+        assert stats["queries"] > 0
+
+    assert regressions(report, report, max_regression=0.25) == []
+    slower = {"endpoints": {"checkin": {**report["endpoints"]["checkin"], "p95": 0.0, "queries": 1}}}
+    assert [line.split(":")[0] for line in regressions(report, slower, 0.25, min_delta_ms=0)] == ["checkin", "checkin"]
@@ -0,0 +1,47 @@
+"""Tests for connection pool instrumentation."""
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.db.pool_metrics import PoolMetrics, instrument_engine
+from app.db.session import engine_options
+
+
+def test_pool_metrics_track_overflow_and_timeouts(tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "db_pool_size", 1)
+    monkeypatch.setattr(settings, "db_max_overflow", 1)
+    monkeypatch.setattr(settings, "db_pool_timeout", 0.05)
+
+    url = f"sqlite:///{tmp_path}/pool.db"
+    metrics = PoolMetrics("test")
+    engine = instrument_engine(create_engine(url, **engine_options(url, metrics)), metrics).engine
+
+    first, second = engine.connect(), engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["checked_out"] == 2
+    assert snapshot["peak_checked_out"] == 2
+    assert snapshot["overflow_checkouts"] == 1
+    assert snapshot["timeouts"] == 1
+    assert sum(snapshot["wait_ms_histogram"].values()) == 3
+
+    first.close()
+    second.close()
+    with engine.connect() as connection:
+        connection.execute(text("select 1"))
+    assert metrics.snapshot()["checked_out"] == 0
+    assert metrics.snapshot()["connects"] == 2
+
+
+def test_sqlite_and_postgres_connect_args():
+    metrics = PoolMetrics("test")
+    assert engine_options("sqlite:///./x.db", metrics)["connect_args"] == {"check_same_thread": False}
+    assert "poolclass" not in engine_options("sqlite://", metrics)
+
+    options = engine_options("postgresql://u:p@db/habits", metrics)
+    assert "check_same_thread" not in options["connect_args"]
+    assert options["pool_pre_ping"] is True
+    assert "server_settings" in engine_options("postgresql+asyncpg://u:p@db/habits", metrics, is_async=True)["connect_args"]
@@ -0,0 +1,114 @@
+"""Tests for the event projection runner."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models import *
+from app.services.projection_service import (
+    ProjectionRunner, ProjectionConflict, WeeklyTotalsProjector, BanditRewardProjector
+)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_projections.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def seed(db):
+    user = User(email="events@example.com")
+    db.add(user)
+    db.flush()
+    habit = Habit(
+        user_id=user.id, title="Read", schedule_json={"type": "daily"},
+        goal_type="check", timezone="UTC"
+    )
+    db.add(habit)
+    db.flush()
+
+    start = datetime(2024, 1, 1, 8)  # Monday
+    for day in range(10):
+        ts = start + timedelta(days=day)
+        db.add(Event(user_id=user.id, habit_id=habit.id, type="reminder_sent", ts=ts, payload={"hour": 8}))
+        if day % 3 != 2:
+            db.add(Event(user_id=user.id, habit_id=habit.id, type="checkin", ts=ts + timedelta(hours=1)))
+            db.add(Event(user_id=user.id, habit_id=habit.id, type="checkin", ts=ts + timedelta(hours=2)))
+    db.commit()
+    return habit
+
+
+def snapshot(db, habit):
+    totals = {
+        row.week_start: (row.checkins, row.misses, row.reminders_sent)
+        for row in db.query(HabitWeeklyTotal).filter(HabitWeeklyTotal.habit_id == habit.id)
+    }
+    arm = db.get(BanditArm, (habit.id, 8))
+    return totals, arm.successes if arm else 0
+
+
+def runner(db):
+    return ProjectionRunner(
+        db, [WeeklyTotalsProjector(), BanditRewardProjector()], session_factory=TestingSessionLocal, settle_seconds=0
+    )
+
+
+def test_tailing_in_small_batches_matches_rebuild(db):
+    habit = seed(db)
+
+    processed = runner(db).run(batch_size=3)
+    assert processed == {"weekly_totals": 24, "bandit_rewards": 14}
+
+    totals, rewards = snapshot(db, habit)
+    assert totals == {date(2024, 1, 1): (10, 0, 7), date(2024, 1, 8): (4, 0, 3)}
+    # Only the first checkin after each reminder is rewarded
+    assert rewards == 7
+
+    # A second run finds nothing new and does not double count
+    assert runner(db).run() == {}
+    assert snapshot(db, habit) == (totals, rewards)
+
+    for name in ("weekly_totals", "bandit_rewards"):
+        runner(db).rebuild(name, partitions=2)
+    db.expire_all()
+    assert snapshot(db, habit) == (totals, rewards)
+
+
+def test_concurrent_offset_update_is_rejected(db):
+    seed(db)
+    stale = runner(db)
+    offset = stale._load_offset("weekly_totals")
+
+    runner(db).run()
+
+    with pytest.raises(ProjectionConflict):
+        stale._advance("weekly_totals", offset, datetime(2030, 1, 1), None)
+
+
+def test_events_behind_the_offset_are_tailed(db):
+    habit = seed(db)
+    runner(db).run()
+    totals, rewards = snapshot(db, habit)
+
+    # An offline sync records a reminder and checkin from before everything tailed so far
+    late = datetime(2024, 1, 2, 20)
+    db.add(Event(user_id=habit.user_id, habit_id=habit.id, type="reminder_sent", ts=late, payload={"hour": 8}))
+    db.add(Event(user_id=habit.user_id, habit_id=habit.id, type="checkin", ts=late + timedelta(minutes=30)))
+    db.commit()
+
+    # Not read until it has settled, in case earlier transactions are still committing
+    assert ProjectionRunner(db, [WeeklyTotalsProjector()], settle_seconds=60).run() == {}
+
+    assert runner(db).run() == {"weekly_totals": 2, "bandit_rewards": 1}
+    totals[date(2024, 1, 1)] = (11, 0, 8)
+    assert snapshot(db, habit) == (totals, rewards + 1)
@@ -0,0 +1,124 @@
+"""Tests for the batch reminder planner."""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.email import email_service
+from app.db.session import Base
+from app.models import *
+from app.services.bandit_service import ArmStatsBuffer, BanditService
+from app.services.reminder_planner import ReminderPlanner, allowed_hours, compile_reminder, hours_mask
+from app.services.scheduler_service import SchedulerService
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_reminder_planner.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# 20:05 on Monday 2024-01-01 in New York, already Tuesday in UTC
+NOW = datetime(2024, 1, 2, 1, 5, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def seed(db, window, last_checkin=None, habit_tz="UTC", reminder_tz="America/New_York", email="planner@example.com"):
+    user = User(email=email)
+    db.add(user)
+    db.flush()
+    habit = Habit(
+        user_id=user.id, title="Read", schedule_json={"type": "daily"},
+        goal_type="check", timezone=habit_tz
+    )
+    db.add(habit)
+    db.flush()
+    db.add(Reminder(habit_id=habit.id, channel="email", timezone=reminder_tz, window=window))
+    if last_checkin:
+        db.add(Streak(habit_id=habit.id, start_date=last_checkin, length_days=1, last_checkin_date=last_checkin))
+    db.commit()
+    return habit
+
+
+def planner(db, interval_minutes=15):
+    bandit = BanditService(db, strategy="thompson", buffer=ArmStatsBuffer(flush_size=1000))
+    return ReminderPlanner(db, interval_minutes, bandit=bandit)
+
+
+def test_hour_masks():
+    assert hours_mask(9, 11) == 0b111 << 9
+    assert allowed_hours(hours_mask(22, 1)) == [0, 1, 22, 23]
+
+    allowed, days = compile_reminder({"start_hour": 6, "end_hour": 23, "days": [1]}, {"start_hour": 12, "end_hour": 20})
+    assert allowed_hours(allowed) == [6, 7, 8, 9, 10, 11, 21, 22, 23]
+    assert allowed_hours(allowed, 10) == [10, 11, 21, 22, 23]
+    assert days == 0b1
+
+
+def test_sends_once_per_local_day(db):
+    habit = seed(db, {"start_hour": 20, "end_hour": 20})
+
+    plan = planner(db).plan(NOW)
+    assert [(item["habit_id"], item["hour"]) for item in plan] == [(habit.id, 20)]
+    send = db.get(ReminderSend, (habit.id, date(2024, 1, 1)))
+    assert send.hour == 20 and send.sent_at is not None
+
+    # A retried tick, or another worker, finds the send already claimed
+    assert planner(db).plan(NOW) == []
+
+
+def test_chosen_hour_is_stored_and_allowed(db):
+    habit = seed(db, {"start_hour": 6, "end_hour": 23}, reminder_tz="UTC")
+
+    # Planned at 01:05 UTC, past the tick window for 1:00, so from 2:00 on
+    assert planner(db).plan(NOW) == []
+    hour = db.get(ReminderSend, (habit.id, date(2024, 1, 2))).hour
+    assert 6 <= hour <= 23
+
+    # Later ticks keep the stored hour and fire in it
+    assert planner(db).plan(NOW.replace(hour=hour - 1)) == []
+    assert [item["hour"] for item in planner(db).plan(NOW.replace(hour=hour))] == [hour]
+
+
+@pytest.mark.parametrize("last_checkin, due", [(date(2024, 1, 2), False), (date(2024, 1, 1), True)])
+def test_checkin_compared_in_habit_timezone(db, last_checkin, due):
+    # The habit's day (UTC) is Tuesday while the reminder's (New York) is still Monday
+    seed(db, {"start_hour": 20, "end_hour": 20}, last_checkin=last_checkin)
+    assert bool(planner(db).plan(NOW)) is due
+
+
+def test_skips_days_and_closed_windows(db):
+    seed(db, {"start_hour": 20, "end_hour": 20, "days": [2]})
+    seed(db, {"start_hour": 8, "end_hour": 19}, email="closed@example.com")
+    assert planner(db).plan(NOW) == []
+    assert db.query(ReminderSend).count() == 0
+
+
+def test_failed_sends_are_retried_and_not_recorded(db, monkeypatch):
+    habit = seed(db, {"start_hour": 20, "end_hour": 21})
+    db.add(ReminderSend(habit_id=habit.id, local_date=date(2024, 1, 1), hour=20, created_at=datetime.utcnow()))
+    db.commit()
+    delivered = []
+
+    async def send_reminder(email, habit_title, checkin_url):
+        delivered.append(email)
+        return len(delivered) > 1  # The first attempt fails
+
+    monkeypatch.setattr(email_service, "send_reminder", send_reminder)
+
+    assert SchedulerService(db).run_reminders(NOW)["sent"] == 0
+    assert db.get(ReminderSend, (habit.id, date(2024, 1, 1))).sent_at is None
+    assert db.query(Event).count() == 0 and db.get(BanditArm, (habit.id, 20)) is None
+
+    # A later tick, past the planned hour, retries it
+    assert SchedulerService(db).run_reminders(NOW + timedelta(hours=1))["sent"] == 1
+    assert db.query(Event).one().payload == {"hour": 20}
+    assert db.get(BanditArm, (habit.id, 20)).pulls == 1
+    assert SchedulerService(db).run_reminders(NOW + timedelta(hours=1, minutes=15))["due"] == 0
@@ -0,0 +1,56 @@
+"""Tests for the versioned result cache and prediction parsing."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.cache import InProcessBackend, LocalRedis, RedisBackend, ResultCache
+from app.services import prediction_service
+from app.services.prediction_service import PredictionService
+
+
+@pytest.mark.parametrize("backend", [
+    InProcessBackend(maxsize=2, ttl=60),
+    RedisBackend(LocalRedis(maxsize=2)),
+])
+def test_results_are_computed_once_per_version(backend):
+    cache = ResultCache(backend, ttl=60)
+    calls = []
+
+    def compute(version):
+        calls.append(version)
+        return {"best_hour": 9, "version": version}
+
+    for _ in range(3):
+        assert cache.get_or_compute("habit:1", lambda: compute(1)) == {"best_hour": 9, "version": 1}
+    assert calls == [1]
+
+    # A new version misses; the LRU bound evicts the oldest key
+    cache.get_or_compute("habit:2", lambda: compute(2))
+    cache.get_or_compute("habit:3", lambda: compute(3))
+    cache.get_or_compute("habit:1", lambda: compute(1))
+    assert calls == [1, 2, 3, 1]
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_prediction_parses_each_timestamp_once(monkeypatch):
+    parsed = []
+    original = prediction_service.parse_completed_at
+
+    def counting_parse(completion):
+        parsed.append(completion)
+        return original(completion)
+
+    monkeypatch.setattr(prediction_service, "parse_completed_at", counting_parse)
+
+    now = datetime.utcnow()
+    completions = [
+        {"completed_at": (now - timedelta(days=day)).isoformat() + "Z"} for day in range(10)
+    ] + [{"completed_at": "not a date"}]
+
+    result = PredictionService().predict_success("habit-1", completions)
+
+    assert len(parsed) == len(completions)
+    assert result["current_streak"] == 10
+    assert result["recent_completions"] == 7
+    assert result["total_completions"] == 10
@@ -0,0 +1,80 @@
+"""Tests for compiled schedules and their due-date queries."""
+
+import random
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.services.schedule_engine import compile_schedule, iter_weeks, local_today, spread_mask
+from app.services.streak_service import StreakService
+from test_streak_service import make_habit, make_streak
+
+
+def days_between(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+@pytest.mark.parametrize("schedule", [
+    {"type": "daily"},
+    {"type": "weekly", "days": [1, 3, 5]},
+    {"type": "weekly", "days": [7]},
+    {"type": "times_per_week", "count": 4},
+    {"type": "times_per_week"},
+])
+def test_queries_match_day_by_day_walk(schedule):
+    compiled = compile_schedule(schedule)
+    rng = random.Random(repr(schedule))
+
+    for _ in range(200):
+        start = date(2023, 1, 1) + timedelta(days=rng.randint(0, 800))
+        end = start + timedelta(days=rng.randint(-3, 60))
+        due = [day for day in days_between(start, end) if compiled.due_on(day)]
+
+        assert compiled.due_count(start, end) == len(due)
+        expected_next = next(day for day in days_between(start, start + timedelta(days=7)) if compiled.due_on(day))
+        assert compiled.next_due(start) == expected_next
+        assert compiled.next_due(start, inclusive=False) > start
+
+
+def test_schedule_compilation():
+    assert compile_schedule({"type": "weekly", "days": [1, 3, 5]}).mask == 0b0010101
+    assert compile_schedule({"type": "weekly", "days": []}).next_due(date(2024, 1, 1)) is None
+    assert compile_schedule(None) == compile_schedule({"type": "daily"})
+    assert compile_schedule({"type": "mystery"}).per_week == 7
+    # Spread evenly: 4x = Mon, Wed, Fri, Sun
+    assert spread_mask(4) == 0b1010101
+    assert [spread_mask(count).bit_count() for count in range(9)] == [0, 1, 2, 3, 4, 5, 6, 7, 7]
+
+
+def test_iter_weeks_splits_on_mondays():
+    assert list(iter_weeks(date(2024, 1, 5), date(2024, 1, 16))) == [
+        (date(2024, 1, 1), date(2024, 1, 5), date(2024, 1, 7)),
+        (date(2024, 1, 8), date(2024, 1, 8), date(2024, 1, 14)),
+        (date(2024, 1, 15), date(2024, 1, 15), date(2024, 1, 16)),
+    ]
+
+
+def test_local_today_uses_timezone():
+    now = datetime(2024, 1, 2, 3, 0, tzinfo=timezone.utc)
+    assert local_today("America/Chicago", now) == date(2024, 1, 1)
+    assert local_today("Asia/Tokyo", now) == date(2024, 1, 2)
+
+
+def test_times_per_week_streak_spends_grace_per_week():
+    service = StreakService(None)
+    # Due Mon/Wed/Fri/Sun; one grace day per week
+    habit = make_habit({"type": "times_per_week", "count": 4}, grace_per_week=1)
+    streak = make_streak()
+
+    service.apply_event(habit, streak, "checkin", date(2024, 1, 5))  # Fri
+    # Skips Sun 7th (week 1) and Mon 8th (week 2): one grace day from each week
+    service.apply_event(habit, streak, "checkin", date(2024, 1, 10))  # Wed
+    assert streak.length_days == 2
+    assert (streak.grace_week_start, streak.grace_used) == (date(2024, 1, 8), 1)
+
+    # Missing Fri 12th too needs a second grace day that week: lapsed
+    assert service.current_length(habit, streak, date(2024, 1, 12)) == 2
+    assert service.current_length(habit, streak, date(2024, 1, 13)) == 0
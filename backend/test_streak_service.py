@@ -0,0 +1,92 @@
+"""Tests for incremental streak maintenance."""
+
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+from app.models.streak import Streak
+from app.services.streak_service import StreakService
+
+
+def make_habit(schedule=None, grace_per_week=1, tz="UTC"):
+    return SimpleNamespace(
+        id="habit-1",
+        schedule_json=schedule or {"type": "daily"},
+        grace_per_week=grace_per_week,
+        timezone=tz
+    )
+
+
+def make_streak():
+    streak = Streak(habit_id="habit-1")
+    StreakService(None)._reset(streak)
+    return streak
+
+
+def test_consecutive_checkins_extend_streak():
+    service = StreakService(None)
+    habit = make_habit()
+    streak = make_streak()
+
+    for day in (1, 2, 3):
+        service.apply_event(habit, streak, "checkin", date(2024, 1, day))
+
+    assert streak.length_days == 3
+    assert streak.start_date == date(2024, 1, 1)
+    assert streak.last_checkin_date == date(2024, 1, 3)
+
+
+def test_gap_within_weekly_grace_keeps_streak():
+    service = StreakService(None)
+    habit = make_habit(grace_per_week=1)
+    streak = make_streak()
+
+    service.apply_event(habit, streak, "checkin", date(2024, 1, 1))
+    service.apply_event(habit, streak, "checkin", date(2024, 1, 3))
+
+    assert streak.length_days == 2
+    assert streak.grace_used == 1
+
+
+def test_gap_beyond_grace_restarts_streak():
+    service = StreakService(None)
+    habit = make_habit(grace_per_week=1)
+    streak = make_streak()
+
+    service.apply_event(habit, streak, "checkin", date(2024, 1, 1))
+    service.apply_event(habit, streak, "checkin", date(2024, 1, 4))
+
+    assert streak.length_days == 1
+    assert streak.start_date == date(2024, 1, 4)
+
+
+def test_miss_without_grace_breaks_streak():
+    service = StreakService(None)
+    habit = make_habit(grace_per_week=0)
+    streak = make_streak()
+
+    service.apply_event(habit, streak, "checkin", date(2024, 1, 1))
+    service.apply_event(habit, streak, "miss", date(2024, 1, 2))
+
+    assert streak.length_days == 0
+    assert service.current_length(habit, streak, date(2024, 1, 3)) == 0
+
+
+def test_weekly_schedule_skips_non_due_days():
+    service = StreakService(None)
+    habit = make_habit({"type": "weekly", "days": [1, 3, 5]}, grace_per_week=0)
+    streak = make_streak()
+
+    # Monday, Wednesday, Friday
+    for day in (1, 3, 5):
+        service.apply_event(habit, streak, "checkin", date(2024, 1, day))
+
+    assert streak.length_days == 3
+    assert service.current_length(habit, streak, date(2024, 1, 8)) == 3
+
+
+def test_event_dates_use_habit_timezone():
+    service = StreakService(None)
+    habit = make_habit(tz="America/Chicago")
+
+    ts = datetime(2024, 1, 2, 3, 0, tzinfo=timezone.utc)
+    assert service.local_date(habit, ts) == date(2024, 1, 1)
@@ -0,0 +1,153 @@
+"""Tests for training, persisting and batch scoring the habit success model."""
+
+import random
+from datetime import datetime, timedelta
+from itertools import product
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.core.config import settings
+from app.core.etag import bump_user_version
+from app.db.session import get_async_db, async_database_url, Base
+from app.models import *
+from app.routers.auth import get_current_user
+from app.services.prediction_service import rule_based_probability
+from app.services.success_model import (
+    SuccessModel, current_model, fit_logistic, roc_auc, score_habits, train
+)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_success_model.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    """Habits completed with varying regularity over the last 120 days."""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    rng = random.Random(7)
+    user = User(email="model@example.com")
+    db.add(user)
+    db.flush()
+
+    habits = []
+    for i in range(12):
+        habit = Habit(
+            user_id=user.id, title=f"Habit {i}", schedule_json={"type": "daily"},
+            goal_type="check", timezone="UTC"
+        )
+        db.add(habit)
+        db.flush()
+        habits.append(habit.id)
+
+        # Regular habits stay regular, so history predicts the next week
+        rate = (i + 1) / 12
+        db.execute(insert(Event), [
+            {
+                "user_id": user.id, "habit_id": habit.id, "type": "checkin",
+                "ts": NOW - timedelta(days=day, hours=rng.randint(0, 12)), "payload": {}
+            }
+            for day in range(120) if rng.random() < rate
+        ])
+    db.commit()
+    db.refresh(user)
+    db.close()
+
+    yield user, habits
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_roc_auc_matches_pairwise_definition():
+    rng = np.random.default_rng(0)
+    scores = rng.integers(0, 5, 200).astype(float)  # Plenty of ties
+    y = rng.random(200) < 0.4
+
+    pairs = [
+        1.0 if p > n else 0.5 if p == n else 0.0
+        for p, n in product(scores[y], scores[~y])
+    ]
+    assert roc_auc(scores, y) == pytest.approx(np.mean(pairs))
+    assert roc_auc(scores, np.zeros(200)) is None
+
+
+def test_fit_logistic_recovers_direction():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(2000, 6))
+    y = (rng.random(2000) < 1 / (1 + np.exp(-(2 * X[:, 0] - X[:, 2])))).astype(float)
+
+    model = fit_logistic(X, y, "v1", l2=0.1)
+
+    assert model.coef[0] > 1.5 and model.coef[2] < -0.7
+    assert max(abs(c) for c in (model.coef[1], model.coef[3], model.coef[4], model.coef[5])) < 0.2
+
+
+def test_train_save_and_score(seeded, tmp_path, monkeypatch):
+    user, habits = seeded
+    db = TestingSessionLocal()
+
+    model = train(db, now=NOW, baseline=rule_based_probability)
+    assert model.metrics["test"]["auc"] > 0.7
+    assert "baseline_test" in model.metrics
+
+    model.save(str(tmp_path))
+    loaded = current_model(str(tmp_path))
+    assert loaded.version == model.version
+    assert loaded.coef == pytest.approx(model.coef)
+
+    assert score_habits(db, loaded, now=NOW, chunk_size=5) == len(habits)
+    scores = {s.habit_id: s.probability for s in db.query(HabitSuccessScore)}
+    assert scores[habits[-1]] > scores[habits[0]]
+    db.close()
+
+    # Stored scores are served until the user's data changes
+    monkeypatch.setattr(settings, "success_model_dir", str(tmp_path))
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        client = TestClient(app)
+        body = client.get(f"/insights/habits/{habits[-1]}/success-prediction").json()
+        assert body["scored_at"] == NOW.isoformat()
+        assert body["probability"] == round(scores[habits[-1]], 3)
+
+        db = TestingSessionLocal()
+        db.execute(bump_user_version(user.id))
+        db.commit()
+        db.close()
+
+        body = client.get(f"/insights/habits/{habits[-1]}/success-prediction").json()
+        assert "scored_at" not in body
+        assert body["model_version"] == model.version
+    finally:
+        app.dependency_overrides = overrides
+
+
+def test_model_files_are_validated(tmp_path):
+    model = SuccessModel(version="20240101T000000", coef=[0.0] * 6, intercept=0.0,
+                         mean=[0.0] * 6, scale=[1.0] * 6)
+    path = model.save(str(tmp_path))
+    with open(path) as f:
+        data = f.read().replace("days_since_last", "days_idle")
+    with open(path, "w") as f:
+        f.write(data)
+
+    with pytest.raises(ValueError):
+        SuccessModel.load(path)
+    assert current_model(str(tmp_path)) is None
@@ -0,0 +1,94 @@
+"""Tests for chunked, checkpointed weekly digests."""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.email import email_service
+from app.db.session import Base
+from app.models import *
+from app.services.scheduler_service import SchedulerService
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_weekly_digest.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+NOW = datetime(2024, 1, 7, 18)  # Sunday of the week starting 2024-01-01
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+class Recipients(list):
+    fail = None
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Recipients of every digest sent; a recipient listed in ``sent.fail`` raises once."""
+    recipients = Recipients()
+    recipients.fail = set()
+
+    async def send_weekly_digest(email, insights):
+        if email in recipients.fail:
+            recipients.fail.discard(email)
+            raise RuntimeError("mail server went away")
+        recipients.append(email)
+        return True
+
+    monkeypatch.setattr(email_service, "send_weekly_digest", send_weekly_digest)
+    return recipients
+
+
+def seed(db, count=5):
+    for i in range(count):
+        user = User(email=f"user{i}@example.com")
+        db.add(user)
+        db.flush()
+        habit = Habit(
+            user_id=user.id, title="Read", schedule_json={"type": "daily"},
+            goal_type="check", timezone="UTC"
+        )
+        db.add(habit)
+        db.flush()
+        db.add(Event(user_id=user.id, habit_id=habit.id, type="checkin", ts=datetime(2024, 1, 2, 9)))
+    db.commit()
+    return [email for (email,) in db.query(User.email).order_by(User.id)]
+
+
+def test_sends_in_chunks_once_per_period(db, sent):
+    emails = seed(db)
+
+    stats = SchedulerService(db).run_weekly_digest(NOW, chunk_size=2)
+    assert [chunk["users"] for chunk in stats["chunks"]] == [2, 2, 1]
+    assert stats["count_sent"] == 5 and sorted(sent) == sorted(emails)
+
+    # A second trigger in the same week sends nothing
+    assert SchedulerService(db).run_weekly_digest(NOW, chunk_size=2)["skipped"] is True
+    assert len(sent) == 5
+    assert db.query(DigestRun).one().status == "completed"
+
+
+def test_crashed_run_resumes_after_checkpoint(db, sent):
+    emails = seed(db)
+    sent.fail.add(emails[2])
+
+    with pytest.raises(RuntimeError):
+        SchedulerService(db).run_weekly_digest(NOW, chunk_size=2)
+    run = db.query(DigestRun).one()
+    assert (run.status, run.chunks_done, run.count_sent) == ("running", 1, 2)
+
+    # On restart the unfinished run picks up after the first chunk
+    stats = SchedulerService(db).resume_weekly_digest(NOW.replace(day=8, hour=1))
+    assert stats["resumed"] is True and stats["count_sent"] == 5
+    # Only the chunk that crashed can be sent twice
+    assert set(sent) == set(emails) and sent.count(emails[0]) == sent.count(emails[1]) == 1
+    assert SchedulerService(db).resume_weekly_digest(NOW) is None
@@ -2,6 +2,12 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import json
 import random
+import sys
+from pathlib import Path
+
+# Shared search index lives in the backend package
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+from app.utils.job_index import FIELD_WEIGHTS, MODES, JobIndex, location_terms
 
 app = Flask(__name__)
 CORS(app)
@@ -175,6 +181,16 @@ REAL_INTERNSHIPS = [
     }
 ]
 
+# Tokenized once at startup; keywords match title, description and category
+INTERNSHIP_INDEX = JobIndex(REAL_INTERNSHIPS, {f: w for f, w in FIELD_WEIGHTS.items() if f != 'company'})
+
+def find_internships(keyword, location, job_type, mode='and'):
+    """Internships matching the search form, best match first"""
+    locations = location_terms(location) if location not in ('remote', 'united states', '') else []
+    filters = {'type': job_type} if job_type not in ('', 'internship') else None
+    _, jobs = INTERNSHIP_INDEX.search(keyword, locations, mode, filters)
+    return jobs
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -193,37 +209,13 @@ def search_jobs():
         keyword = data.get('keyword', 'software engineer').lower()
         location = data.get('location', 'United States').lower()
         job_type = data.get('jobType', 'internship').lower()
+        mode = data.get('mode', 'and')  # and: every keyword term, or: any
+        if mode not in MODES:
+            return jsonify({'success': False, 'error': f'mode must be one of: {", ".join(MODES)}', 'jobs': []}), 400
         
         print(f"Searching for: {keyword} in {location}")
         
-        # Filter internships based on search criteria
-        filtered_jobs = []
-        
-        for job in REAL_INTERNSHIPS:
-            # Check if job matches keyword
-            keyword_match = (
-                keyword in job['title'].lower() or
-                keyword in job['description'].lower() or
-                keyword in job['category'].lower()
-            )
-            
-            # Check if location matches
-            location_match = (
-                location in job['location'].lower() or
-                location == 'remote' or
-                location == 'united states' or
-                location == ''
-            )
-            
-            # Check if job type matches
-            type_match = (
-                job_type in job['type'].lower() or
-                job_type == '' or
-                job_type == 'internship'
-            )
-            
-            if keyword_match and location_match and type_match:
-                filtered_jobs.append(job)
+        filtered_jobs = find_internships(keyword, location, job_type, mode)
         
         # If no exact matches, return some relevant results
         if not filtered_jobs:
@@ -236,7 +228,8 @@ def search_jobs():
             'search_params': {
                 'keyword': keyword,
                 'location': location,
-                'jobType': job_type
+                'jobType': job_type,
+                'mode': mode
             }
         })
         
@@ -253,37 +246,13 @@ def search_jobs_get():
         keyword = request.args.get('keyword', 'software engineer').lower()
         location = request.args.get('location', 'United States').lower()
         job_type = request.args.get('jobType', 'internship').lower()
+        mode = request.args.get('mode', 'and')
+        if mode not in MODES:
+            return jsonify({'success': False, 'error': f'mode must be one of: {", ".join(MODES)}', 'jobs': []}), 400
         
         print(f"Searching for: {keyword} in {location}")
         
-        # Filter internships based on search criteria
-        filtered_jobs = []
-        
-        for job in REAL_INTERNSHIPS:
-            # Check if job matches keyword
-            keyword_match = (
-                keyword in job['title'].lower() or
-                keyword in job['description'].lower() or
-                keyword in job['category'].lower()
-            )
-            
-            # Check if location matches
-            location_match = (
-                location in job['location'].lower() or
-                location == 'remote' or
-                location == 'united states' or
-                location == ''
-            )
-            
-            # Check if job type matches
-            type_match = (
-                job_type in job['type'].lower() or
-                job_type == '' or
-                job_type == 'internship'
-            )
-            
-            if keyword_match and location_match and type_match:
-                filtered_jobs.append(job)
+        filtered_jobs = find_internships(keyword, location, job_type, mode)
         
         # If no exact matches, return some relevant results
         if not filtered_jobs:
@@ -296,7 +265,8 @@ def search_jobs_get():
             'search_params': {
                 'keyword': keyword,
                 'location': location,
-                'jobType': job_type
+                'jobType': job_type,
+                'mode': mode
             }
         })
         